@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""문서 파일명 분류 벤치마크
+
+docs 폴더 파일명 N개(기본 10k, 100k)에 대해
+기존 방식(파일 × 유형 × 패턴 re.search + detected 선형 탐색/remove)과
+컴파일된 DocClassifier를 비교 (파일 시스템 접근 없음)
+
+    python benchmarks/bench_doc_classifier.py --files 10000 100000
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.docs_service import REQUIRED_DOCS, _DOC_CLASSIFIER
+
+WORDS = ["notes", "meeting", "draft", "design", "roadmap", "prd", "api", "schema", "readme",
+         "changelog", "module", "config", "qa", "retro", "spec", "guide", "openapi", "erd"]
+EXTENSIONS = [".md", ".md", ".md", ".txt", ".yaml", ".json", ".sql", ".pdf", ".png"]
+
+
+def make_names(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(WORDS)}-{rng.choice(WORDS)}-{i}{rng.choice(EXTENSIONS)}"
+        for i in range(count)
+    ]
+
+
+def legacy_confidence(name: str, req: dict) -> float:
+    """v0.8까지의 _calculate_confidence"""
+    confidence = 0.5
+    file_lower = name.lower()
+    extension = os.path.splitext(file_lower)[1]
+    if req["type"].replace("_", "") in file_lower.replace("-", "").replace("_", ""):
+        confidence += 0.3
+    if extension in [".md", ".markdown"]:
+        confidence += 0.1
+    if req["type"] == "api_spec" and extension in [".yaml", ".yml", ".json"]:
+        confidence += 0.2
+    if req["type"] == "db_schema" and extension == ".sql":
+        confidence += 0.2
+    if req["type"] == "env_config" and extension == ".env":
+        confidence += 0.2
+    return min(confidence, 1.0)
+
+
+def legacy_classify(names: list[str]) -> dict[str, tuple[str, float]]:
+    """v0.8까지의 docs_service.analyze_docs 루프"""
+    detected: list[tuple[str, str, float]] = []
+    for name in names:
+        file_lower = name.lower()
+        for req in REQUIRED_DOCS:
+            for pattern in req["patterns"]:
+                if re.search(pattern, file_lower, re.IGNORECASE):
+                    existing = next((d for d in detected if d[0] == req["type"]), None)
+                    confidence = legacy_confidence(name, req)
+                    if existing is None or confidence > existing[2]:
+                        if existing:
+                            detected.remove(existing)
+                        detected.append((req["type"], name, confidence))
+                    break
+    return {t: (n, c) for t, n, c in detected}
+
+
+def classifier_classify(names: list[str]) -> dict[str, tuple[str, float]]:
+    best: dict[str, tuple[str, float]] = {}
+    for name in names:
+        for match in _DOC_CLASSIFIER.classify(name):
+            existing = best.get(match.type)
+            if existing is None or match.confidence > existing[1]:
+                best[match.type] = (name, match.confidence)
+    return best
+
+
+def timed(fn, names: list[str], repeat: int) -> tuple[float, dict]:
+    best = float("inf")
+    result = {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(names)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for count in args.files:
+        names = make_names(count)
+        legacy_ms, legacy = timed(legacy_classify, names, args.repeat)
+        new_ms, new = timed(classifier_classify, names, args.repeat)
+        assert legacy == new, "분류 결과 불일치"
+        print(f"{count:>8,} files | legacy {legacy_ms:8.1f} ms | classifier {new_ms:8.1f} ms | x{legacy_ms / new_ms:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""테스트 파일 탐색 벤치마크
+
+가상의 JS 모노레포(기본 200k 파일, 대부분 node_modules)를 만들고
+기존 rglob 방식과 scandir 단일 패스 워커를 비교
+
+    python benchmarks/bench_test_discovery.py --files 200000
+"""
+
+import argparse
+import re
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from clouvel.tools.scan import find_test_files
+
+
+def legacy_check_tests(project_path: Path) -> int:
+    """v0.8까지의 _check_tests (루트 + tests/test/src/__tests__ 각각 rglob)"""
+    test_patterns = [r"test_.*\.py$", r".*_test\.py$", r".*\.test\.(ts|js)$", r".*\.spec\.(ts|js)$"]
+    count = 0
+    search_paths = [project_path]
+    for subdir in ["tests", "test", "src", "__tests__"]:
+        subpath = project_path / subdir
+        if subpath.exists():
+            search_paths.append(subpath)
+    for search_path in search_paths:
+        for f in search_path.rglob("*"):
+            try:
+                if f.is_file():
+                    for pattern in test_patterns:
+                        if re.match(pattern, f.name, re.IGNORECASE):
+                            count += 1
+                            break
+            except OSError:
+                continue
+    return count
+
+
+def build_monorepo(root: Path, total_files: int, packages: int = 60) -> None:
+    """packages/pkg-N/{src,__tests__,node_modules} 구조, 파일 80%는 node_modules"""
+    (root / ".gitignore").write_text("node_modules/\ndist/\n", encoding="utf-8")
+    per_package = max(total_files // packages, 10)
+    for p in range(packages):
+        pkg = root / "packages" / f"pkg-{p}"
+        own = per_package // 5
+        vendored = per_package - own
+        for sub, count, name in (
+            ("src", own * 3 // 4, "mod{}.ts"),
+            ("__tests__", own - own * 3 // 4, "mod{}.test.ts"),
+        ):
+            d = pkg / sub
+            d.mkdir(parents=True)
+            for i in range(count):
+                (d / name.format(i)).touch()
+        for i in range(vendored):
+            d = pkg / "node_modules" / f"dep{i // 200}" / "lib"
+            if i % 200 == 0:
+                d.mkdir(parents=True)
+            (d / (f"x{i}.spec.js" if i % 10 == 0 else f"x{i}.js")).touch()
+
+
+def timed(fn, repeat: int) -> tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="clouvel-bench-"))
+    try:
+        start = time.perf_counter()
+        build_monorepo(root, args.files)
+        print(f"monorepo: {args.files:,} files ({time.perf_counter() - start:.1f}s to create)")
+
+        legacy_time, legacy_count = timed(lambda: legacy_check_tests(root), args.repeat)
+        walker_time, scan = timed(lambda: find_test_files(root), args.repeat)
+
+        print(f"legacy rglob : {legacy_time * 1000:9.1f} ms  {legacy_count:,} matches (node_modules 포함)")
+        print(f"scandir walk : {walker_time * 1000:9.1f} ms  {len(scan.files):,} matches, {scan.entries:,} entries")
+        print(f"speedup      : {legacy_time / walker_time:9.1f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,7 @@
-from .server import main
+def main():
+    """CLI 진입점 - 서버 모듈은 여기서 로드 (classifier 등만 쓰는 곳이 MCP 런타임까지 불러오지 않도록)"""
+    from .server import main as run
+    return run()
+
 
 __all__ = ["main"]
@@ -1,129 +1,903 @@
 """
 Clouvel Analytics - 도구 사용량 로컬 추적
 
-저장 위치: .clouvel/analytics.json (프로젝트 로컬)
+저장 위치: .clouvel/analytics.jsonl (프로젝트 로컬, 한 줄 = 이벤트 하나)
+         .clouvel/analytics_rollup.json (일별/시간별 집계)
+         .clouvel/analytics.d/<pid>-<토큰>-<호스트 ID>.jsonl (+ .rollup.json) - 프로세스별 shard
 개인정보 없음, 순수 사용량 통계만 기록
+
+기록은 메모리 버퍼에만 쌓고(write-behind), 서버의 백그라운드 태스크가
+주기적으로 파일 끝에 한꺼번에 추가함. 종료 시에도 남은 버퍼를 flush.
+집계(rollup)도 기록 시점에 메모리에서 같이 올리고 flush 때 파일에 합침.
+통계 조회는 rollup 카운터만 읽으므로 이벤트 수와 무관.
+세션(같은 프로세스, idle 간격 이하로 이어진 호출)도 기록 시점에 sessions 모듈 카운터로 올림.
+
+같은 프로젝트에 서버 프로세스가 여러 개 떠도 서로 덮어쓰지 않도록 flush는 자기 shard에만 함
+(프로세스 간 잠금 없음). 조회는 기본 segment + shard 집계를 합산하고,
+백그라운드 compaction이 이 프로세스 shard와 주인 없는 shard를 기본 segment로 합침 (잠금 파일 사용).
+
+CLOUVEL_ANALYTICS_BACKEND=sqlite면 같은 버퍼를 .clouvel/analytics.db에 flush하고
+통계는 SQL 집계로 계산 (analytics_db). sqlite3가 없는 Python이면 JSON 그대로 사용.
 """
 
+import asyncio
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import heapq
 import json
+import os
+import secrets
+import socket
+import threading
+import time
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Iterable, Iterator, Optional
+
+from . import analytics_registry, cancel, config, sessions
+from .metrics import empty_histogram, latency_bucket, percentile
+
+try:
+    from . import analytics_db
+except ImportError:  # sqlite3 모듈 없이 빌드된 Python
+    analytics_db = None
+
+LOG_FILENAME = "analytics.jsonl"
+ROLLUP_FILENAME = "analytics_rollup.json"
+LEGACY_FILENAME = "analytics.json"  # v1.0: 전체 재작성 방식
+SHARD_DIRNAME = "analytics.d"
+LOCK_FILENAME = "analytics.lock"     # compaction 전용
+
+STALE_LOCK_S = 60  # 이보다 오래된 잠금 파일은 비정상 종료로 보고 치움
+
+ROLLUP_VERSION = 2  # v2: sessions 항목 추가
+ROLLUP_KEYS = ("daily", "hourly", "sessions")  # 합산하는 rollup 항목
+HOURLY_RETENTION_DAYS = 7  # 시간별 버킷 보관 기간 (일별은 무제한)
+
+# 기록한 적 있는 (로그 파일, 레지스트리 폴더) (머신 단위 레지스트리에 한 번만 등록)
+_registered: set[tuple[Path, Path]] = set()
+# 로그 파일 경로 → 마지막 기록 시점의 레지스트리 폴더 (flush가 종료 시점에 돌아도 기록 때 환경을 따름)
+_homes: dict[Path, Path] = {}
+
+# 아직 파일에 안 쓴 이벤트/집계 (로그 파일 경로 → {"events", "daily", "hourly", "sessions", "home"})
+_pending: dict[Path, dict] = {}
+_pending_lock = threading.Lock()
+# 이 프로세스의 열린 세션 (로그 파일 경로별, _pending_lock 안에서 갱신)
+_sessions = sessions.SessionTracker()
+# 같은 파일에 동시에 append하지 않도록 (프로세스 안에서만)
+_write_lock = threading.Lock()
+
+# pid 재사용 대비 프로세스 shard 이름 접미사
+_SHARD_TOKEN = secrets.token_hex(3)
+# 이 프로세스 shard 집계 (shard 로그 경로 → rollup)
+_shard_rollups: dict[Path, dict] = {}
+# 다른 프로세스 shard 집계 캐시 (shard 로그 경로 → ((mtime_ns, size), rollup))
+_shard_cache: dict[Path, tuple[tuple[int, int], dict]] = {}
+# 이 프로세스가 기록한 로그 (compaction 대상)
+_known_logs: set[Path] = set()
 
 
 def get_analytics_path(project_path: Optional[str] = None) -> Path:
-    """analytics.json 경로 반환"""
+    """analytics.jsonl 경로 반환 (디렉토리는 flush 시점에 생성)"""
     if project_path:
-        base = Path(project_path)
+        base = Path(project_path).absolute()  # 버퍼는 나중에 flush되므로 cwd에 묶어 둠
     else:
         base = Path.cwd()
 
-    clouvel_dir = base / ".clouvel"
-    clouvel_dir.mkdir(parents=True, exist_ok=True)
-    return clouvel_dir / "analytics.json"
+    return base / ".clouvel" / LOG_FILENAME
+
+
+def _encode(event: dict) -> str:
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+
+
+def _read_legacy(legacy_path: Path) -> list[dict]:
+    """v1.0 analytics.json 이벤트 읽기"""
+    try:
+        return json.loads(legacy_path.read_text(encoding='utf-8')).get("events", [])
+    except (json.JSONDecodeError, IOError, AttributeError):
+        return []
+
+
+def _migrate_legacy(log_path: Path) -> None:
+    """analytics.json이 남아 있으면 이벤트를 로그 앞부분으로 옮기고 삭제"""
+    legacy_path = log_path.with_name(LEGACY_FILENAME)
+    if not legacy_path.exists():
+        return
+
+    events = _read_legacy(legacy_path)
+    existing = log_path.read_text(encoding='utf-8') if log_path.exists() else ""
+    tmp_path = log_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding='utf-8') as f:
+        for event in events:
+            f.write(_encode(event) + "\n")
+        f.write(existing)
+    os.replace(tmp_path, log_path)
+    legacy_path.unlink()
+
+
+def _use_sqlite() -> bool:
+    return analytics_db is not None and config.analytics_backend() == "sqlite"
+
+
+def _ensure_db(log_path: Path) -> Path:
+    """SQLite 파일 경로 (처음이면 기존 JSONL 로그를 가져와서 생성, _write_lock 안에서 호출)"""
+    db_path = analytics_db.db_path_for(log_path)
+    if not db_path.exists() and (
+        log_path.exists() or log_path.with_name(LEGACY_FILENAME).exists() or _shard_files(log_path)
+    ):
+        events = list(_iter_json(log_path))
+        analytics_db.append(db_path, [], backfill=events, counters=sessions.replay(events))
+    return db_path
+
+
+def _empty_rollup() -> dict:
+    return {"version": ROLLUP_VERSION, "daily": {}, "hourly": {}, "sessions": {}}
+
+
+def _new_batch(home: Optional[Path]) -> dict:
+    """home: 등록할 레지스트리 폴더 (None이면 등록 안 함)"""
+    return {"events": [], "daily": {}, "hourly": {}, "sessions": {}, "home": home}
+
+
+def _merge(dst: dict, src: dict) -> None:
+    """집계 dict 재귀 합산 (숫자는 더하고, 리스트는 원소별로 더함)"""
+    for key, value in src.items():
+        if isinstance(value, dict):
+            _merge(dst.setdefault(key, {}), value)
+        elif isinstance(value, list):
+            current = dst.setdefault(key, [0] * len(value))
+            for i, v in enumerate(value):
+                current[i] += v
+        else:
+            dst[key] = dst.get(key, 0) + value
+
+
+def _rollup_event(rollup: dict, event: dict) -> None:
+    """이벤트 하나를 일별/시간별 버킷에 반영
+    버킷 구조: {tool: {ok, fail, [timed, ms, cpu_ms, wait_ms, bytes, files, lat[], errors{}]}}
+    """
+    ts = event.get("ts")
+    if not isinstance(ts, str) or len(ts) < 13:
+        return
+    tool = event.get("tool", "unknown")
+    outcome = "ok" if event.get("success", True) else "fail"
+    duration_ms = event.get("ms")
+    error = event.get("error")
+
+    for bucket_key, buckets in ((ts[:10], rollup["daily"]), (ts[:13], rollup["hourly"])):
+        counts = buckets.setdefault(bucket_key, {}).setdefault(tool, {})
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+        if duration_ms is not None:
+            counts["timed"] = counts.get("timed", 0) + 1
+            for field in ("ms", "cpu_ms", "wait_ms", "bytes", "files"):
+                counts[field] = counts.get(field, 0) + (event.get(field) or 0)
+            histogram = counts.setdefault("lat", empty_histogram())
+            histogram[latency_bucket(duration_ms)] += 1
+        if error:
+            errors = counts.setdefault("errors", {})
+            errors[error] = errors.get(error, 0) + 1
+
+
+def _rolled_up(rollup: dict, events: Iterator[dict]) -> Iterator[dict]:
+    """이벤트를 일별/시간별 버킷에 반영하면서 그대로 넘김 (세션 재생과 한 번에 읽도록)"""
+    for event in events:
+        _rollup_event(rollup, event)
+        yield event
+
+
+def _prune_hourly(rollup: dict) -> None:
+    """오래된 시간별 버킷 정리"""
+    oldest = (datetime.now() - timedelta(days=HOURLY_RETENTION_DAYS)).strftime("%Y-%m-%dT%H")
+    for key in [k for k in rollup["hourly"] if k < oldest]:
+        del rollup["hourly"][key]
+
+
+def _read_rollup(rollup_path: Path) -> Optional[dict]:
+    try:
+        data = json.loads(rollup_path.read_text(encoding='utf-8'))
+    except (json.JSONDecodeError, IOError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != ROLLUP_VERSION:
+        return None
+    return data
+
+
+def _write_rollup(rollup_path: Path, rollup: dict) -> None:
+    tmp_path = rollup_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(rollup, ensure_ascii=False, separators=(",", ":")), encoding='utf-8')
+    os.replace(tmp_path, rollup_path)
+
+
+def _rebuild_rollup(log_path: Path, include_legacy: bool = True) -> dict:
+    """로그 전체를 한 번 읽어 집계 재생성 (rollup 파일이 없거나 깨졌을 때만)"""
+    return _events_rollup(_read_log(log_path) if include_legacy else _read_lines(log_path))
+
+
+def _events_rollup(events: Iterable[dict]) -> dict:
+    rollup = _empty_rollup()
+    rollup["sessions"] = sessions.replay(_rolled_up(rollup, events))
+    _prune_hourly(rollup)
+    return rollup
+
+
+# ============================================================
+# 프로세스별 shard
+# ============================================================
+
+def _host_id() -> str:
+    """pid를 비교할 수 있는 범위의 ID (호스트 이름 + 부팅 ID + pid 네임스페이스)
+    컨테이너끼리 프로젝트 폴더를 공유하면 pid가 겹치므로 같은 ID일 때만 생존 확인
+    """
+    parts = [socket.gethostname()]
+    try:
+        with open("/proc/sys/kernel/random/boot_id", encoding="utf-8") as f:
+            parts.append(f.read().strip())
+    except OSError:
+        pass
+    try:
+        parts.append(str(os.stat("/proc/self/ns/pid").st_ino))
+    except OSError:
+        pass
+    return hashlib.blake2b("\0".join(parts).encode(), digest_size=4).hexdigest()
+
+
+_HOST_ID = _host_id()
+
+
+def _shard_name() -> str:
+    """이 프로세스의 shard 이름 (fork 후에는 pid가 바뀌어 자동으로 분리)"""
+    return f"{os.getpid()}-{_SHARD_TOKEN}-{_HOST_ID}"
+
+
+def _shard_path(log_path: Path, name: Optional[str] = None) -> Path:
+    return log_path.with_name(SHARD_DIRNAME) / f"{name or _shard_name()}.jsonl"
+
+
+def _shard_rollup_path(shard_path: Path) -> Path:
+    return shard_path.with_suffix(".rollup.json")
+
+
+def _shard_files(log_path: Path) -> list[Path]:
+    shard_dir = log_path.with_name(SHARD_DIRNAME)
+    try:
+        return sorted(p for p in shard_dir.iterdir() if p.suffix == ".jsonl")
+    except OSError:
+        return []
+
+
+def _shard_rollup(shard_path: Path) -> dict:
+    """shard 집계 (이 프로세스 것은 메모리, 다른 것은 (mtime, 크기)가 같으면 캐시)"""
+    own = _shard_rollups.get(shard_path)
+    if own is not None:
+        return own
+    rollup_path = _shard_rollup_path(shard_path)
+    try:
+        st = rollup_path.stat()
+        key = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        key = None
+    cached = _shard_cache.get(shard_path)
+    if key is not None and cached is not None and cached[0] == key:
+        return cached[1]
+    rollup = (_read_rollup(rollup_path) if key is not None else None) or _rebuild_rollup(shard_path, include_legacy=False)
+    if key is not None:
+        _shard_cache[shard_path] = (key, rollup)
+    return rollup
+
+
+def _is_abandoned(shard_path: Path) -> bool:
+    """합쳐도 되는 shard인지 - 이 프로세스 것이거나, 주인 프로세스가 없는 것이 확실할 때만
+    주인 확인은 같은 호스트/pid 네임스페이스의 shard만 가능 (다른 곳 것과 호스트 ID 없는
+    이전 형식은 주인이 아직 쓰고 있을 수 있으므로 그대로 둠)
+    """
+    name = shard_path.name.split(".")[0]
+    if name == _shard_name():
+        return True
+    parts = name.split("-")
+    if len(parts) != 3 or parts[2] != _HOST_ID:
+        return False
+    if os.name == "nt":  # Windows의 os.kill은 시그널 0도 프로세스를 종료시킴
+        return False
+    try:
+        os.kill(int(parts[0]), 0)
+    except ProcessLookupError:
+        return True
+    except (PermissionError, ValueError):
+        return False
+    return False
+
+
+def _try_lock(lock_path: Path) -> bool:
+    """프로세스 간 compaction 잠금 (쓰기 경로에서는 사용 안 함). 오래된 잠금은 치움"""
+    for _ in range(2):
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - lock_path.stat().st_mtime < STALE_LOCK_S:
+                    return False
+                lock_path.unlink()
+            except OSError:
+                continue
+        except OSError:
+            return False
+    return False
+
+
+def _write_batch(log_path: Path, batch: dict) -> None:
+    """이벤트 묶음을 이 프로세스 shard 끝에 추가하고 shard 집계에 합침 (다른 프로세스와 잠금 없음)"""
+    with _write_lock:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        home = batch["home"]
+        if home is not None and (log_path, home) not in _registered:
+            _registered.add((log_path, home))
+            try:
+                analytics_registry.register(log_path.parent.parent, home)
+            except OSError:
+                pass
+        if _use_sqlite():
+            analytics_db.append(_ensure_db(log_path), batch["events"], counters=batch["sessions"])
+            return
+        if log_path.with_name(LEGACY_FILENAME).exists():
+            _compact(log_path)  # v1.0 파일 이전은 잠금을 잡고 한 번만
+
+        shard_path = _shard_path(log_path)
+        shard_path.parent.mkdir(exist_ok=True)
+        rollup = _shard_rollups.get(shard_path)
+        if rollup is None or not shard_path.exists():
+            # 처음이거나 다른 곳에서 shard가 정리됨 (save_analytics 등)
+            rollup = _empty_rollup()
+
+        with open(shard_path, "a", encoding='utf-8') as f:
+            f.write("".join(_encode(e) + "\n" for e in batch["events"]))
+
+        for key in ROLLUP_KEYS:
+            _merge(rollup.setdefault(key, {}), batch[key])
+        _prune_hourly(rollup)
+        _write_rollup(_shard_rollup_path(shard_path), rollup)
+        _shard_rollups[shard_path] = rollup
+        _known_logs.add(log_path)
+
+
+def _compact(log_path: Path) -> int:
+    """합쳐도 되는 shard를 기본 segment(analytics.jsonl + rollup)로 옮김 (_write_lock 안에서 호출)
+    Returns: 합친 shard 수 (잠금을 못 잡으면 0)
+    """
+    lock_path = log_path.with_name(LOCK_FILENAME)
+    if not _try_lock(lock_path):
+        return 0
+    try:
+        _migrate_legacy(log_path)
+        rollup_path = log_path.with_name(ROLLUP_FILENAME)
+        shards = [p for p in _shard_files(log_path) if _is_abandoned(p)]
+        if not shards:
+            return 0
+        rollup = _read_rollup(rollup_path) or _rebuild_rollup(log_path)
+
+        claimed = []
+        with open(log_path, "ab") as out:
+            for shard_path in shards:
+                # 읽기 전에 shard를 치워 둠 - 이후 쓰기는 새 shard 파일로 가고, 집계는 실제로 읽은 내용으로
+                private = shard_path.with_name(f"{shard_path.stem}.compacting-{_SHARD_TOKEN}")
+                try:
+                    os.replace(shard_path, private)
+                except OSError:
+                    continue
+                _shard_rollup_path(shard_path).unlink(missing_ok=True)
+                _shard_rollups.pop(shard_path, None)
+                _shard_cache.pop(shard_path, None)
+                try:
+                    data = private.read_bytes()
+                except OSError:
+                    continue  # 못 읽은 파일은 지우지 않고 남겨 둠
+                claimed.append(private)
+                if data and not data.endswith(b"\n"):
+                    data += b"\n"  # 비정상 종료로 잘린 마지막 줄
+                _merge(rollup, {k: v for k, v in _events_rollup(_parse_lines(data)).items() if k in ROLLUP_KEYS})
+                out.write(data)
+        _prune_hourly(rollup)
+        _write_rollup(rollup_path, rollup)
+
+        for private in claimed:
+            private.unlink(missing_ok=True)
+        return len(claimed)
+    finally:
+        lock_path.unlink(missing_ok=True)
+
+
+def compact_analytics(project_path: Optional[str] = None) -> int:
+    """shard를 기본 segment로 합침 (flush 후)
+    project_path가 없으면 이 프로세스가 기록한 모든 프로젝트
+    Returns: 합친 shard 수
+    """
+    flush_analytics(project_path)
+    if _use_sqlite():
+        return 0
+    with _write_lock:
+        log_paths = [get_analytics_path(project_path)] if project_path else list(_known_logs)
+        compacted = 0
+        for log_path in log_paths:
+            try:
+                compacted += _compact(log_path)
+            except OSError:
+                continue
+        return compacted
+
+
+def flush_analytics(project_path: Optional[str] = None) -> int:
+    """버퍼에 쌓인 이벤트를 파일에 기록
+    project_path가 없으면 모든 프로젝트 버퍼를 flush
+    Returns: 기록한 이벤트 수
+    """
+    with _pending_lock:
+        if project_path is None:
+            batches = list(_pending.items())
+            _pending.clear()
+        else:
+            log_path = get_analytics_path(project_path)
+            batches = [(log_path, _pending.pop(log_path, None))]
+
+    written = 0
+    for log_path, batch in batches:
+        if not batch or not (batch["events"] or batch["sessions"]):
+            continue
+        try:
+            _write_batch(log_path, batch)
+            written += len(batch["events"])
+        except OSError:
+            # 쓰기 실패한 통계는 버림 (도구 동작에 영향 주지 않음)
+            continue
+    return written
+
+
+async def run_flusher(interval: Optional[float] = None) -> None:
+    """백그라운드 flush 루프 - 주기적으로 shard compaction, 취소되면 남은 버퍼 flush + 자기 shard 정리"""
+    if interval is None:
+        interval = config.analytics_flush_interval()
+    # scheduler는 mcp를 불러오므로 서버에서 돌 때만 import
+    from . import scheduler
+
+    compact_every = config.analytics_compact_interval()
+    last_compact = time.monotonic()
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.wrap_future(scheduler.submit_background(flush_analytics))
+            if compact_every and time.monotonic() - last_compact >= compact_every:
+                last_compact = time.monotonic()
+                await asyncio.wrap_future(scheduler.submit_background(compact_analytics))
+    finally:
+        close_sessions()
+        compact_analytics()
+
+
+def close_sessions() -> int:
+    """열린 세션을 모두 끝난 것으로 카운터에 반영 (종료 시, flush 전에 호출)
+    Returns: 닫은 세션 수
+    """
+    with _pending_lock:
+        closed = list(_sessions.open.items())
+        _sessions.open.clear()
+        for log_path, state in closed:
+            batch = _pending.get(log_path)
+            if batch is None:
+                batch = _pending[log_path] = _new_batch(_homes.get(log_path))
+            sessions.close_session(state, batch["sessions"])
+    return len(closed)
+
+
+def _flush_at_exit() -> None:
+    close_sessions()
+    flush_analytics()
+
+
+def reset_buffers() -> None:
+    """flush 안 한 이벤트 / 열린 세션 / 등록 기록 버리기 (테스트용)"""
+    with _pending_lock:
+        _pending.clear()
+        _sessions.open.clear()
+        _homes.clear()
+    with _write_lock:
+        _registered.clear()
+
+
+atexit.register(_flush_at_exit)
+
+
+def _read_lines(path: Path) -> Iterator[dict]:
+    """JSONL 파일 한 줄씩 (깨진 줄은 건너뜀)"""
+    if not path.exists():
+        return
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+    except IOError:
+        return
+
+
+def _parse_lines(data: bytes) -> Iterator[dict]:
+    """이미 읽은 JSONL 내용 한 줄씩 (깨진 줄은 건너뜀)"""
+    for line in data.decode('utf-8', errors='replace').splitlines():
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+
+def _read_log(log_path: Path) -> Iterator[dict]:
+    """기본 segment 읽기 (legacy → 로그 순서)"""
+    legacy_path = log_path.with_name(LEGACY_FILENAME)
+    if legacy_path.exists():
+        yield from _read_legacy(legacy_path)
+    yield from _read_lines(log_path)
+
+
+def iter_events(project_path: Optional[str] = None) -> Iterator[dict]:
+    """이벤트를 한 줄씩 읽기 (버퍼 flush 후, shard는 시각 순으로 끼워 넣음)"""
+    flush_analytics(project_path)
+    log_path = get_analytics_path(project_path)
+    if _use_sqlite():
+        with _write_lock:
+            db_path = _ensure_db(log_path)
+        yield from analytics_db.iter_events(db_path)
+        return
+    yield from _iter_json(log_path)
+
+
+def _iter_json(log_path: Path) -> Iterator[dict]:
+    """기본 segment + shard 이벤트 (shard는 시각 순으로 끼워 넣음)"""
+    sources = [_read_log(log_path)] + [_read_lines(p) for p in _shard_files(log_path)]
+    return heapq.merge(*sources, key=lambda e: str(e.get("ts", "")))
+
+
+def _base_rollup(log_path: Path) -> dict:
+    """기본 segment 집계 (없으면 로그에서 한 번 재생성)"""
+    rollup_path = log_path.with_name(ROLLUP_FILENAME)
+    rollup = _read_rollup(rollup_path)
+    if rollup is not None:
+        return rollup
+    if not log_path.exists() and not log_path.with_name(LEGACY_FILENAME).exists():
+        return _empty_rollup()
+
+    rollup = _rebuild_rollup(log_path)
+    lock_path = log_path.with_name(LOCK_FILENAME)
+    if _try_lock(lock_path):  # 다른 프로세스의 compaction과 겹치지 않을 때만 저장
+        try:
+            _write_rollup(rollup_path, rollup)
+        except OSError:
+            pass
+        finally:
+            lock_path.unlink(missing_ok=True)
+    return rollup
+
+
+def load_rollup(project_path: Optional[str] = None) -> dict:
+    """일별/시간별 집계 로드 (기본 segment + 모든 shard 합산)"""
+    flush_analytics(project_path)
+    log_path = get_analytics_path(project_path)
+
+    with _write_lock:
+        rollup = _empty_rollup()
+        _merge(rollup, {k: v for k, v in _base_rollup(log_path).items() if k in ROLLUP_KEYS})
+        for shard_path in _shard_files(log_path):
+            shard = _shard_rollup(shard_path)
+            _merge(rollup, {k: v for k, v in shard.items() if k in ROLLUP_KEYS})
+    return rollup
 
 
 def load_analytics(project_path: Optional[str] = None) -> dict:
     """analytics 데이터 로드"""
-    path = get_analytics_path(project_path)
-    if path.exists():
-        try:
-            return json.loads(path.read_text(encoding='utf-8'))
-        except (json.JSONDecodeError, IOError):
-            return {"events": [], "version": "1.0"}
-    return {"events": [], "version": "1.0"}
+    return {"events": list(iter_events(project_path)), "version": "2.0"}
 
 
 def save_analytics(data: dict, project_path: Optional[str] = None) -> None:
-    """analytics 데이터 저장"""
-    path = get_analytics_path(project_path)
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
-
+    """analytics 데이터 저장 (로그 전체 교체, 모든 shard 삭제)"""
+    log_path = get_analytics_path(project_path)
+    with _write_lock:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        if _use_sqlite():
+            events = data.get("events", [])
+            analytics_db.replace(analytics_db.db_path_for(log_path), events, counters=sessions.replay(events))
+            return
+        tmp_path = log_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding='utf-8') as f:
+            f.write("".join(_encode(e) + "\n" for e in data.get("events", [])))
+        os.replace(tmp_path, log_path)
+        log_path.with_name(LEGACY_FILENAME).unlink(missing_ok=True)
+        for shard_path in _shard_files(log_path):
+            shard_path.unlink(missing_ok=True)
+            _shard_rollup_path(shard_path).unlink(missing_ok=True)
+            _shard_rollups.pop(shard_path, None)
+            _shard_cache.pop(shard_path, None)
+        _write_rollup(log_path.with_name(ROLLUP_FILENAME), _rebuild_rollup(log_path))
 
-def log_tool_call(tool_name: str, success: bool = True, project_path: Optional[str] = None) -> None:
-    """도구 호출 기록"""
-    data = load_analytics(project_path)
 
+def log_tool_call(
+    tool_name: str,
+    success: bool = True,
+    project_path: Optional[str] = None,
+    duration_ms: Optional[float] = None,
+    cpu_ms: Optional[float] = None,
+    response_bytes: Optional[int] = None,
+    files_touched: Optional[int] = None,
+    error: Optional[str] = None,
+    wait_ms: Optional[float] = None,
+) -> None:
+    """도구 호출 기록 (버퍼에만 추가, 파일 I/O 없음)"""
+    now = datetime.now()
     event = {
         "tool": tool_name,
-        "ts": datetime.now().isoformat(),
+        "ts": now.isoformat(),
         "success": success
     }
+    if duration_ms is not None:
+        event["ms"] = round(duration_ms, 3)
+        event["cpu_ms"] = round(cpu_ms or 0.0, 3)
+        event["bytes"] = response_bytes or 0
+        event["files"] = files_touched or 0
+        if wait_ms:
+            event["wait_ms"] = round(wait_ms, 3)
+    if error:
+        event["error"] = error
 
-    data["events"].append(event)
+    log_path = get_analytics_path(project_path)
+    home = config.clouvel_home()
+    with _pending_lock:
+        _homes[log_path] = home
+        batch = _pending.get(log_path)
+        if batch is None:
+            batch = _pending[log_path] = _new_batch(home)
+        event["session"] = _sessions.observe(
+            log_path, tool_name, now, batch["sessions"], prefix=f"{_shard_name()}-"
+        )
+        batch["events"].append(event)
+        _rollup_event(batch, event)
 
-    # 최근 1000개만 유지 (메모리 관리)
-    if len(data["events"]) > 1000:
-        data["events"] = data["events"][-1000:]
 
-    save_analytics(data, project_path)
+def _sqlite_counts(project_path: Optional[str], cutoff: datetime) -> tuple[dict[str, dict], dict[str, int]]:
+    """SQLite 백엔드: 도구별/일별 집계를 SQL로"""
+    flush_analytics(project_path)
+    log_path = get_analytics_path(project_path)
+    with _write_lock:
+        db_path = _ensure_db(log_path)
+    return analytics_db.query_counts(db_path, cutoff.isoformat())
 
 
-def get_stats(project_path: Optional[str] = None, days: int = 30) -> dict:
-    """사용량 통계 반환"""
-    data = load_analytics(project_path)
-    events = data.get("events", [])
-
-    if not events:
-        return {
-            "total_calls": 0,
-            "by_tool": {},
-            "by_date": {},
-            "success_rate": 0,
-            "period_days": days
-        }
+def _rollup_counts(project_path: Optional[str], cutoff: datetime) -> tuple[dict[str, dict], dict[str, int]]:
+    """JSON 백엔드: rollup 버킷 합산"""
+    rollup = load_rollup(project_path)
 
-    # 기간 필터
-    cutoff = datetime.now() - timedelta(days=days)
-    filtered = []
-    for e in events:
-        try:
-            ts = datetime.fromisoformat(e["ts"])
-            if ts >= cutoff:
-                filtered.append(e)
-        except (KeyError, ValueError):
-            continue
+    # 기간 필터: 경계일은 시간별 버킷이 있으면 시간 단위로 자름
+    cutoff_date = cutoff.strftime("%Y-%m-%d")
+    cutoff_hour = cutoff.strftime("%Y-%m-%dT%H")
+    edge_hours = {k: v for k, v in rollup["hourly"].items() if k.startswith(cutoff_date)}
 
     # 도구별 집계
-    by_tool = {}
+    per_tool: dict[str, dict] = {}
     by_date = {}
-    success_count = 0
 
-    for e in filtered:
-        tool = e.get("tool", "unknown")
-        by_tool[tool] = by_tool.get(tool, 0) + 1
+    for date, tools in rollup["daily"].items():
+        if date < cutoff_date:
+            continue
+        if date == cutoff_date and edge_hours:
+            buckets = [t for hour, t in edge_hours.items() if hour >= cutoff_hour]
+        else:
+            buckets = [tools]
+
+        for bucket in buckets:
+            for tool, counts in bucket.items():
+                count = counts.get("ok", 0) + counts.get("fail", 0)
+                if count == 0:
+                    continue
+                _merge(per_tool.setdefault(tool, {}), counts)
+                by_date[date] = by_date.get(date, 0) + count
+    return per_tool, by_date
+
+
+def get_counts(project_path: Optional[str] = None, days: int = 30) -> tuple[dict[str, dict], dict[str, int]]:
+    """기간 안의 도구별 원시 집계 + 일별 호출 수 (프로젝트 간 합산용)"""
+    cutoff = datetime.now() - timedelta(days=days)
+    if _use_sqlite():
+        return _sqlite_counts(project_path, cutoff)
+    return _rollup_counts(project_path, cutoff)
 
-        try:
-            date = datetime.fromisoformat(e["ts"]).strftime("%Y-%m-%d")
-            by_date[date] = by_date.get(date, 0) + 1
-        except (KeyError, ValueError):
-            pass
 
-        if e.get("success", True):
-            success_count += 1
+def get_stats(project_path: Optional[str] = None, days: int = 30) -> dict:
+    """사용량 통계 반환 (집계 버킷 또는 SQL 집계만 사용)"""
+    per_tool, by_date = get_counts(project_path, days)
+    stats = summarize(per_tool, by_date, days)
+    stats["sessions"] = session_stats(project_path)
+    return stats
+
+
+def session_stats(project_path: Optional[str] = None) -> dict:
+    """세션 통계 (전체 기간, 이 프로세스의 열린 세션 포함) - 저장된 카운터만 읽음"""
+    if _use_sqlite():
+        flush_analytics(project_path)
+        log_path = get_analytics_path(project_path)
+        with _write_lock:
+            db_path = _ensure_db(log_path)
+        counters = analytics_db.load_counters(db_path)
+    else:
+        log_path = get_analytics_path(project_path)
+        counters = load_rollup(project_path)["sessions"]
+    with _pending_lock:
+        state = _sessions.get(log_path)
+        open_states = [dict(state)] if state is not None else []
+    return sessions.summarize(counters, open_states)
+
 
-    total = len(filtered)
+def summarize(per_tool: dict[str, dict], by_date: dict[str, int], days: int) -> dict:
+    """원시 집계 → 통계 (호출 수, 성공률, 지연 시간 백분위)"""
+    by_tool = {tool: c.get("ok", 0) + c.get("fail", 0) for tool, c in per_tool.items()}
+    total = sum(by_tool.values())
+    success_count = sum(c.get("ok", 0) for c in per_tool.values())
+
+    # 지연 시간 / 응답 크기 (계측된 호출만)
+    performance = {}
+    for tool, c in per_tool.items():
+        timed = c.get("timed", 0)
+        if not timed:
+            continue
+        histogram = c.get("lat", [])
+        performance[tool] = {
+            "calls": timed,
+            "p50_ms": percentile(histogram, 0.50),
+            "p95_ms": percentile(histogram, 0.95),
+            "p99_ms": percentile(histogram, 0.99),
+            "avg_ms": round(c.get("ms", 0) / timed, 2),
+            "avg_cpu_ms": round(c.get("cpu_ms", 0) / timed, 2),
+            "avg_wait_ms": round(c.get("wait_ms", 0) / timed, 2),
+            "avg_bytes": round(c.get("bytes", 0) / timed),
+            "avg_files": round(c.get("files", 0) / timed, 1),
+            "failures": c.get("fail", 0),
+            "errors": dict(sorted(c.get("errors", {}).items(), key=lambda x: x[1], reverse=True)),
+        }
 
     return {
         "total_calls": total,
         "by_tool": dict(sorted(by_tool.items(), key=lambda x: x[1], reverse=True)),
         "by_date": dict(sorted(by_date.items())),
         "success_rate": round(success_count / total * 100, 1) if total > 0 else 0,
+        "performance": dict(sorted(performance.items(), key=lambda x: x[1]["p95_ms"] or 0, reverse=True)),
         "period_days": days
     }
 
 
+# ============================================================
+# 전체 프로젝트 집계
+# ============================================================
+
+# 프로젝트 경로 → (analytics 파일 signature, 기간 키, (per_tool, by_date))
+_aggregate_cache: dict[str, tuple[tuple, tuple, tuple[dict, dict]]] = {}
+_aggregate_lock = threading.Lock()
+
+
+def _analytics_signature(project_path: Path) -> Optional[tuple]:
+    """analytics 파일들의 (이름, 크기, mtime) - 같으면 집계를 다시 읽지 않음. .clouvel이 없으면 None"""
+    clouvel_dir = project_path / ".clouvel"
+    parts = []
+    for directory, prefix in ((clouvel_dir, "analytics"), (clouvel_dir / SHARD_DIRNAME, "")):
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    name = entry.name
+                    if not name.startswith(prefix) or name == LOCK_FILENAME or name.endswith(".tmp"):
+                        continue
+                    try:
+                        if entry.is_file():
+                            st = entry.stat()
+                            parts.append((directory.name, name, st.st_size, st.st_mtime_ns))
+                    except OSError:
+                        continue
+        except FileNotFoundError:
+            if directory == clouvel_dir:
+                return None
+        except OSError:
+            continue
+    return tuple(sorted(parts))
+
+
+def _project_counts(project_path: Path, days: int, period_key: tuple) -> tuple[Optional[tuple[dict, dict]], bool]:
+    """프로젝트 하나의 원시 집계 (바뀐 파일이 없으면 캐시). Returns: (집계 또는 None, 다시 읽었는지)"""
+    cancel.checkpoint()
+    signature = _analytics_signature(project_path)
+    if signature is None:
+        return None, False
+    key = str(project_path)
+    with _aggregate_lock:
+        cached = _aggregate_cache.get(key)
+    if cached is not None and cached[0] == signature and cached[1] == period_key:
+        return cached[2], False
+    counts = get_counts(key, days)
+    with _aggregate_lock:
+        _aggregate_cache[key] = (signature, period_key, counts)
+    return counts, True
+
+
+def aggregate_stats(days: int = 30) -> dict:
+    """레지스트리의 모든 프로젝트 통계 (동시에 읽고 합산, 프로젝트별 + 전체)"""
+    flush_analytics()
+    period_key = (days, config.analytics_backend(), datetime.now().strftime("%Y-%m-%dT%H"))
+    projects = analytics_registry.projects()
+    workers = min(config.io_workers(), max(len(projects), 1))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="clouvel-aggregate") as executor:
+        loaded = list(executor.map(cancel.bind(lambda p: _project_counts(p, days, period_key)), projects))
+
+    total_tools: dict[str, dict] = {}
+    total_dates: dict[str, int] = {}
+    per_project = {}
+    missing = []
+    refreshed = 0
+    for project_path, (counts, reread) in zip(projects, loaded):
+        if counts is None:
+            missing.append(project_path)
+            continue
+        refreshed += reread
+        per_tool, by_date = counts
+        _merge(total_tools, per_tool)
+        _merge(total_dates, by_date)
+        summary = summarize(per_tool, by_date, days)
+        if summary["total_calls"]:
+            per_project[str(project_path)] = summary
+    try:
+        analytics_registry.forget(missing)
+    except OSError:
+        pass
+
+    stats = summarize(total_tools, total_dates, days)
+    stats["projects"] = dict(sorted(per_project.items(), key=lambda x: x[1]["total_calls"], reverse=True))
+    stats["aggregate"] = {"registered": len(projects) - len(missing), "refreshed": refreshed}
+    return stats
+
+
+def _seconds(value: Optional[float]) -> str:
+    """초 → 읽기 좋은 길이"""
+    if value is None:
+        return "-"
+    if value < 60:
+        return f"{value:g}초"
+    if value < 3600:
+        return f"{value / 60:.1f}분"
+    return f"{value / 3600:.1f}시간"
+
+
 def format_stats(stats: dict) -> str:
     """통계를 읽기 좋은 문자열로 변환"""
+    scope = ", 전체 프로젝트" if "projects" in stats else ""
     lines = [
-        f"# Clouvel 사용량 통계 (최근 {stats['period_days']}일)",
+        f"# Clouvel 사용량 통계 (최근 {stats['period_days']}일{scope})",
         "",
         f"## 요약",
+    ]
+    if stats.get("project"):
+        lines.append(f"- 프로젝트: {stats['project']}")
+    lines += [
         f"- 총 호출: {stats['total_calls']}회",
         f"- 성공률: {stats['success_rate']}%",
         "",
     ]
 
+    if "projects" in stats:
+        aggregate = stats.get("aggregate", {})
+        lines.append(f"## 프로젝트별 ({len(stats['projects'])}개 사용 / 등록 {aggregate.get('registered', 0)}개)")
+        lines.append("")
+        if stats["projects"]:
+            lines.append("| 프로젝트 | 호출 | 성공률 | 많이 쓴 도구 |")
+            lines.append("|----------|------|--------|--------------|")
+            for project, summary in stats["projects"].items():
+                top = next(iter(summary["by_tool"]), "-")
+                lines.append(f"| {project} | {summary['total_calls']} | {summary['success_rate']}% | {top} |")
+            lines.append("")
+
     if stats["by_tool"]:
         lines.append("## 도구별 사용량")
         lines.append("")
@@ -135,6 +909,70 @@ def format_stats(stats: dict) -> str:
             lines.append(f"| {tool} | {count} | {pct}% |")
         lines.append("")
 
+    if stats.get("performance"):
+        lines.append("## 도구별 지연 시간 (느린 순)")
+        lines.append("")
+        lines.append("| 도구 | p50 | p95 | p99 | 평균 CPU | 평균 응답 | 평균 파일 | 실패 |")
+        lines.append("|------|-----|-----|-----|----------|-----------|-----------|------|")
+        for tool, perf in stats["performance"].items():
+            lines.append(
+                f"| {tool} | {perf['p50_ms']}ms | {perf['p95_ms']}ms | {perf['p99_ms']}ms "
+                f"| {perf['avg_cpu_ms']}ms | {perf['avg_bytes']:,}B | {perf['avg_files']} | {perf['failures']} |"
+            )
+        lines.append("")
+
+    session_summary = stats.get("sessions")
+    if session_summary and session_summary["sessions"]:
+        lines.append("## 세션 (전체 기간)")
+        lines.append("")
+        lines.append(
+            f"- 세션: {session_summary['sessions']}개, 길이 중앙값 {_seconds(session_summary['median_duration_s'])} "
+            f"(p95 {_seconds(session_summary['p95_duration_s'])})"
+        )
+        if session_summary["coding_sessions"]:
+            lines.append(
+                f"- 코딩 세션(can_code 호출): {session_summary['coding_sessions']}개, "
+                f"세션당 can_code 중앙값 {session_summary['median_can_code_per_coding_session']}회"
+            )
+        plan = session_summary["plan_to_progress"]
+        if plan["count"]:
+            lines.append(f"- init_planning → 첫 update_progress: 중앙값 {_seconds(plan['median_s'])} ({plan['count']}회)")
+        if session_summary["top_transitions"]:
+            flows = ", ".join(f"{a} → {b} ({n}회)" for a, b, n in session_summary["top_transitions"])
+            lines.append(f"- 자주 이어지는 호출: {flows}")
+        lines.append("")
+
+    cache = stats.get("file_cache")
+    if cache and cache["stat_hits"] + cache["stat_misses"] + cache["read_hits"] + cache["read_misses"]:
+        lines.append("## 파일 캐시 (이 서버 프로세스)")
+        lines.append("")
+        lines.append("| 항목 | 적중 | 미적중 | 적중률 |")
+        lines.append("|------|------|--------|--------|")
+        lines.append(f"| stat | {cache['stat_hits']} | {cache['stat_misses']} | {cache['stat_hit_rate']}% |")
+        lines.append(f"| 파일 내용 | {cache['read_hits']} | {cache['read_misses']} | {cache['read_hit_rate']}% |")
+        lines.append("")
+        lines.append(f"- 캐시된 파일: {cache['cached_files']}개 ({cache['cached_bytes']:,}B), 제거: {cache['evictions']}회")
+        lines.append("")
+
+    coalesced = stats.get("coalesced")
+    if coalesced and coalesced["shared"] + coalesced["memo_hits"]:
+        lines.append(f"- 합쳐진 중복 요청: 동시 {coalesced['shared']}회, 재사용 {coalesced['memo_hits']}회")
+        lines.append("")
+
+    lanes = stats.get("lanes")
+    if lanes:
+        lines.append("## 스케줄러 레인 (이 서버 프로세스)")
+        lines.append("")
+        lines.append("| 레인 | 동시 실행 | 실행 중 | 대기 | 최대 대기 | 완료 | 평균 대기 | p95 대기 |")
+        lines.append("|------|-----------|---------|------|-----------|------|-----------|----------|")
+        for lane, lane_stats in lanes.items():
+            lines.append(
+                f"| {lane} | {lane_stats['workers']} | {lane_stats['running']} | {lane_stats['queued']} "
+                f"| {lane_stats['max_queued']} | {lane_stats['completed']} | {lane_stats['avg_wait_ms']}ms "
+                f"| {lane_stats['p95_wait_ms']}ms |"
+            )
+        lines.append("")
+
     if stats["by_date"]:
         lines.append("## 일별 사용량")
         lines.append("")
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+Analytics SQLite 저장소 (CLOUVEL_ANALYTICS_BACKEND=sqlite)
+
+JSONL 로그 + rollup은 일/시간 단위 집계만 빠르고, "지난주 X 프로젝트 can_code p95" 같은
+임의 구간 질의는 로그 전체를 읽어야 함. 이벤트를 .clouvel/analytics.db에 넣고 집계는 SQL로.
+
+- WAL 모드 (읽기와 flush가 서로 막지 않음), synchronous=NORMAL
+- (ts, tool, project) 인덱스
+- flush 한 번 = 트랜잭션 하나, 같은 INSERT 문을 executemany로 재사용
+- 지연 시간 분포는 metrics.latency_bucket을 SQL 함수로 등록해 GROUP BY → JSON 백엔드와 같은 백분위
+- DB를 처음 만들 때 기존 JSONL 로그를 한 번 가져옴
+- 세션 카운터(sessions 모듈)는 counters 테이블에 경로별 숫자로 펼쳐 UPSERT로 더함
+- 쓰기 실패는 OSError로 바꿔서 올림 (JSON 백엔드와 같은 방식으로 처리되도록)
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from . import sessions
+from .metrics import empty_histogram, latency_bucket
+
+DB_FILENAME = "analytics.db"
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    project TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    ms REAL,
+    cpu_ms REAL,
+    wait_ms REAL,
+    bytes INTEGER,
+    files INTEGER,
+    error TEXT,
+    session TEXT
+);
+CREATE INDEX IF NOT EXISTS events_ts_tool_project ON events (ts, tool, project);
+"""
+_COUNTERS_TABLE = "CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY, value NUMERIC NOT NULL)"
+
+_INSERT = (
+    "INSERT INTO events (ts, tool, project, success, ms, cpu_ms, wait_ms, bytes, files, error, session) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_ADD_COUNTER = (
+    "INSERT INTO counters (key, value) VALUES (?, ?) "
+    "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value"
+)
+
+# DB 경로 → 연결 (스레드 간 공유, _lock으로 직렬화)
+_connections: dict[str, sqlite3.Connection] = {}
+_lock = threading.Lock()
+
+
+def db_path_for(log_path: Path) -> Path:
+    return log_path.with_name(DB_FILENAME)
+
+
+def project_of(db_path: Path) -> str:
+    """.clouvel/analytics.db → 프로젝트 경로"""
+    return str(db_path.parent.parent)
+
+
+def _connect(db_path: Path, create: bool) -> Optional[sqlite3.Connection]:
+    """_lock 안에서 호출. create=False면 DB가 없을 때 None"""
+    key = str(db_path)
+    conn = _connections.get(key)
+    if conn is not None:
+        return conn
+    if not create and not db_path.exists():
+        return None
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(key, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version == 1:
+        _migrate_v1(conn)
+    elif version != SCHEMA_VERSION:
+        conn.executescript(_SCHEMA)
+        conn.execute(_COUNTERS_TABLE)
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+    conn.create_function("latency_bucket", 1, latency_bucket, deterministic=True)
+    _connections[key] = conn
+    return conn
+
+
+def _migrate_v1(conn: sqlite3.Connection) -> None:
+    """v1 → v2: session 열 + counters 테이블 (세션 카운터는 기존 이벤트로 한 번 재생)"""
+    with conn:
+        conn.execute("BEGIN")
+        conn.execute("ALTER TABLE events ADD COLUMN session TEXT")
+        conn.execute(_COUNTERS_TABLE)
+        rows = conn.execute("SELECT ts, tool FROM events ORDER BY id").fetchall()
+        _add_counters(conn, sessions.replay({"ts": ts, "tool": tool} for ts, tool in rows))
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+
+def _flatten(counters: dict, prefix: str = "") -> Iterator[tuple[str, float]]:
+    """중첩 카운터 → (경로, 값). 리스트(히스토그램) 원소는 경로/#칸"""
+    for key, value in counters.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, path + "/")
+        elif isinstance(value, list):
+            for index, count in enumerate(value):
+                if count:
+                    yield f"{path}/#{index}", count
+        elif value:
+            yield path, value
+
+
+def _add_counters(conn: sqlite3.Connection, counters: Optional[dict]) -> None:
+    if counters:
+        conn.executemany(_ADD_COUNTER, _flatten(counters))
+
+
+def _row(project: str, event: dict) -> tuple:
+    return (
+        event.get("ts", ""),
+        event.get("tool", "unknown"),
+        project,
+        1 if event.get("success", True) else 0,
+        event.get("ms"),
+        event.get("cpu_ms"),
+        event.get("wait_ms"),
+        event.get("bytes"),
+        event.get("files"),
+        event.get("error"),
+        event.get("session"),
+    )
+
+
+def append(db_path: Path, events: list[dict], backfill: Optional[Iterable[dict]] = None,
+           counters: Optional[dict] = None) -> None:
+    """이벤트 묶음 + 세션 카운터 증가분을 트랜잭션 하나로 추가
+    backfill: DB를 새로 만들 때 먼저 넣을 기존 이벤트 (JSONL 로그)
+    """
+    project = project_of(db_path)
+    with _lock:
+        created = not db_path.exists()
+        try:
+            conn = _connect(db_path, create=True)
+            with conn:
+                conn.execute("BEGIN")
+                if created and backfill is not None:
+                    conn.executemany(_INSERT, (_row(project, e) for e in backfill))
+                conn.executemany(_INSERT, (_row(project, e) for e in events))
+                _add_counters(conn, counters)
+        except sqlite3.Error as e:
+            raise OSError(f"analytics db: {e}") from e
+
+
+def replace(db_path: Path, events: list[dict], counters: Optional[dict] = None) -> None:
+    """전체 이벤트 + 세션 카운터 교체"""
+    project = project_of(db_path)
+    with _lock:
+        try:
+            conn = _connect(db_path, create=True)
+            with conn:
+                conn.execute("BEGIN")
+                conn.execute("DELETE FROM events")
+                conn.execute("DELETE FROM counters")
+                conn.executemany(_INSERT, (_row(project, e) for e in events))
+                _add_counters(conn, counters)
+        except sqlite3.Error as e:
+            raise OSError(f"analytics db: {e}") from e
+
+
+def iter_events(db_path: Path) -> Iterator[dict]:
+    """저장 순서대로 이벤트 (JSONL과 같은 모양)"""
+    with _lock:
+        conn = _connect(db_path, create=False)
+        if conn is None:
+            return
+        rows = conn.execute(
+            "SELECT ts, tool, success, ms, cpu_ms, wait_ms, bytes, files, error, session FROM events ORDER BY id"
+        ).fetchall()
+    for ts, tool, success, ms, cpu_ms, wait_ms, size, files, error, session in rows:
+        event = {"tool": tool, "ts": ts, "success": bool(success)}
+        if ms is not None:
+            event.update(ms=ms, cpu_ms=cpu_ms or 0.0, bytes=size or 0, files=files or 0)
+            if wait_ms:
+                event["wait_ms"] = wait_ms
+        if error:
+            event["error"] = error
+        if session:
+            event["session"] = session
+        yield event
+
+
+def load_counters(db_path: Path) -> dict:
+    """세션 카운터 (analytics rollup의 "sessions"와 같은 모양)"""
+    with _lock:
+        conn = _connect(db_path, create=False)
+        if conn is None:
+            return {}
+        rows = conn.execute("SELECT key, value FROM counters").fetchall()
+    counters: dict = {}
+    for key, value in rows:
+        *parents, leaf = key.split("/")
+        node = counters
+        for part in parents[:-1]:
+            node = node.setdefault(part, {})
+        if leaf.startswith("#"):
+            node.setdefault(parents[-1], empty_histogram())[int(leaf[1:])] += value
+        else:
+            if parents:
+                node = node.setdefault(parents[-1], {})
+            node[leaf] = value
+    return counters
+
+
+def query_counts(db_path: Path, since: str) -> tuple[dict[str, dict], dict[str, int]]:
+    """since(ISO 시각) 이후 도구별 집계 + 일별 호출 수
+    도구별 집계는 rollup 버킷과 같은 모양: {ok, fail, timed, ms, cpu_ms, wait_ms, bytes, files, lat[], errors{}}
+    """
+    project = project_of(db_path)
+    per_tool: dict[str, dict] = {}
+    by_date: dict[str, int] = {}
+    with _lock:
+        conn = _connect(db_path, create=False)
+        if conn is None:
+            return per_tool, by_date
+        params = (since, project)
+        totals = conn.execute(
+            "SELECT tool, SUM(success), SUM(1 - success), COUNT(ms), TOTAL(ms), TOTAL(cpu_ms), TOTAL(wait_ms), "
+            "TOTAL(bytes), TOTAL(files) FROM events WHERE ts >= ? AND project = ? GROUP BY tool",
+            params,
+        ).fetchall()
+        buckets = conn.execute(
+            "SELECT tool, latency_bucket(ms) AS bucket, COUNT(*) FROM events "
+            "WHERE ts >= ? AND project = ? AND ms IS NOT NULL GROUP BY tool, bucket",
+            params,
+        ).fetchall()
+        errors = conn.execute(
+            "SELECT tool, error, COUNT(*) FROM events "
+            "WHERE ts >= ? AND project = ? AND error IS NOT NULL GROUP BY tool, error",
+            params,
+        ).fetchall()
+        dates = conn.execute(
+            "SELECT substr(ts, 1, 10), COUNT(*) FROM events WHERE ts >= ? AND project = ? GROUP BY 1",
+            params,
+        ).fetchall()
+
+    for tool, ok, fail, timed, ms, cpu_ms, wait_ms, size, files in totals:
+        counts = per_tool[tool] = {"ok": ok, "fail": fail}
+        if timed:
+            counts.update(timed=timed, ms=ms, cpu_ms=cpu_ms, wait_ms=wait_ms, bytes=size, files=files)
+    for tool, bucket, count in buckets:
+        per_tool[tool].setdefault("lat", empty_histogram())[bucket] += count
+    for tool, error, count in errors:
+        per_tool[tool].setdefault("errors", {})[error] = count
+    by_date.update(dates)
+    return per_tool, by_date
+
+
+def close_all() -> None:
+    """열린 연결 닫기 (테스트/종료용)"""
+    with _lock:
+        for conn in _connections.values():
+            conn.close()
+        _connections.clear()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+머신 단위 프로젝트 레지스트리 (~/.clouvel/projects.json, CLOUVEL_HOME으로 변경)
+
+analytics를 기록한 프로젝트 목록 - get_analytics(scope="all")이 여기 있는 프로젝트만 읽음.
+- 프로세스마다 프로젝트당 처음 flush할 때 한 번 등록 (도구 호출 경로 밖)
+- 여러 프로세스가 동시에 등록하면 하나가 빠질 수 있지만 다음 프로세스가 다시 등록함
+- .clouvel 폴더가 없어진 프로젝트는 집계할 때 정리
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from . import config
+
+REGISTRY_VERSION = 1
+REGISTRY_FILENAME = "projects.json"
+
+_lock = threading.Lock()
+
+
+def registry_path(home: Optional[Path] = None) -> Path:
+    return (home or config.clouvel_home()) / REGISTRY_FILENAME
+
+
+def _read(home: Optional[Path] = None) -> dict[str, dict]:
+    try:
+        data = json.loads(registry_path(home).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != REGISTRY_VERSION:
+        return {}
+    projects = data.get("projects")
+    return projects if isinstance(projects, dict) else {}
+
+
+def _write(projects: dict[str, dict], home: Optional[Path] = None) -> None:
+    path = registry_path(home)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{REGISTRY_FILENAME}.{os.getpid()}.tmp")
+    tmp_path.write_text(
+        json.dumps({"version": REGISTRY_VERSION, "projects": projects}, ensure_ascii=False, indent=1),
+        encoding="utf-8",
+    )
+    os.replace(tmp_path, path)
+
+
+def register(project_path: Path, home: Optional[Path] = None) -> None:
+    """프로젝트 등록 (이미 있으면 last_seen만 갱신)
+    home: 레지스트리 폴더 (기본은 지금의 CLOUVEL_HOME) - 기록 시점 값을 넘기면 나중에 flush해도 같은 곳에 등록
+    """
+    key = str(project_path)
+    now = datetime.now().isoformat(timespec="seconds")
+    with _lock:
+        projects = _read(home)
+        entry = projects.setdefault(key, {"first_seen": now})
+        entry["last_seen"] = now
+        _write(projects, home)
+
+
+def projects() -> list[Path]:
+    """등록된 프로젝트 경로"""
+    with _lock:
+        return [Path(p) for p in sorted(_read())]
+
+
+def forget(project_paths: list[Path]) -> None:
+    """없어진 프로젝트 정리"""
+    if not project_paths:
+        return
+    with _lock:
+        projects = _read()
+        for path in project_paths:
+            projects.pop(str(path), None)
+        _write(projects)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+도구 호출 취소 (협력형)
+
+워커 스레드는 밖에서 멈출 수 없으므로, 스케줄러가 호출마다 취소 이벤트를 넘기고
+탐색 루프 같은 오래 걸리는 곳에서 checkpoint()로 확인해 스스로 빠져나옴.
+
+- 시간 초과 / 클라이언트 취소(notifications/cancelled) → 스케줄러가 이벤트 설정
+- checkpoint(): 취소됐으면 ToolCancelled
+- 범위 밖(백그라운드 캐시 채우기 등)에서는 항상 통과
+"""
+
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    "clouvel_cancel_event", default=None
+)
+
+
+class ToolCancelled(Exception):
+    """도구 호출이 취소됨 (시간 초과 또는 클라이언트 요청)"""
+
+
+@contextmanager
+def scope(event: threading.Event) -> Iterator[None]:
+    """이 범위 안의 checkpoint()가 event를 확인"""
+    token = _cancel_event.set(event)
+    try:
+        yield
+    finally:
+        _cancel_event.reset(token)
+
+
+def is_cancelled() -> bool:
+    event = _cancel_event.get()
+    return event is not None and event.is_set()
+
+
+def checkpoint() -> None:
+    """취소됐으면 ToolCancelled (루프 상태가 일관된 지점에서 호출)"""
+    if is_cancelled():
+        raise ToolCancelled()
+
+
+def bind(fn: Callable[..., T]) -> Callable[..., T]:
+    """다른 스레드 풀에 넘길 함수가 현재 호출의 취소 이벤트를 보도록"""
+    event = _cancel_event.get()
+    if event is None:
+        return fn
+
+    def run(*args, **kwargs) -> T:
+        with scope(event):
+            return fn(*args, **kwargs)
+
+    return run
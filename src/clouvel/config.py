@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Clouvel 서버 설정
+
+모든 값은 환경 변수로 덮어쓸 수 있음 (CLOUVEL_*)
+호출 시점에 읽으므로 테스트/프로세스별로 바꿔도 바로 반영됨
+"""
+
+import os
+from pathlib import Path
+
+
+def env_int(name: str, default: int, minimum: int = 0) -> int:
+    """정수 환경 변수 읽기 (잘못된 값이면 기본값)"""
+    raw = os.environ.get(name)
+    if raw is None or raw.strip() == "":
+        return default
+    try:
+        return max(int(raw), minimum)
+    except ValueError:
+        return default
+
+
+def io_workers() -> int:
+    """filesystem 도구용 스레드 풀 크기"""
+    return env_int("CLOUVEL_IO_WORKERS", min(8, (os.cpu_count() or 1) + 4), minimum=1)
+
+
+def subprocess_workers() -> int:
+    """heavy 레인 기본 크기 (이전 설정 이름 유지)"""
+    return env_int("CLOUVEL_SUBPROCESS_WORKERS", 2, minimum=1)
+
+
+def lane_workers(lane: str) -> int:
+    """스케줄러 레인별 동시 실행 수 (interactive / heavy / background)"""
+    defaults = {"interactive": io_workers(), "heavy": subprocess_workers(), "background": 2}
+    return env_int(f"CLOUVEL_LANE_{lane.upper()}_WORKERS", defaults.get(lane, 1), minimum=1)
+
+
+def tool_timeout_ms(name: str, heavy: bool) -> int:
+    """도구 호출 시간 제한 (0 = 무제한), CLOUVEL_TIMEOUT_<도구>_MS가 있으면 우선"""
+    default = env_int("CLOUVEL_HEAVY_TIMEOUT_MS", 600_000) if heavy else env_int("CLOUVEL_TIMEOUT_MS", 60_000)
+    return env_int(f"CLOUVEL_TIMEOUT_{name.upper()}_MS", default)
+
+
+def analytics_flush_interval() -> float:
+    """analytics 버퍼 flush 주기 (초)"""
+    return env_int("CLOUVEL_ANALYTICS_FLUSH_MS", 2000, minimum=10) / 1000
+
+
+def scan_max_depth() -> int:
+    """테스트 탐색 최대 디렉토리 깊이"""
+    return env_int("CLOUVEL_SCAN_MAX_DEPTH", 25, minimum=0)
+
+
+def scan_budget_ms() -> int:
+    """도구 호출 하나의 파일 탐색 시간 예산 (ms, 0 = 무제한)"""
+    return env_int("CLOUVEL_SCAN_BUDGET_MS", 1500)
+
+
+def scan_max_entries() -> int:
+    """도구 호출 하나의 파일 탐색 항목 수 예산 (0 = 무제한)"""
+    return env_int("CLOUVEL_SCAN_MAX_ENTRIES", 200_000)
+
+
+def watch_mode() -> str:
+    """파일 감시 방식: auto(inotify → polling) / inotify / polling / off"""
+    mode = os.environ.get("CLOUVEL_WATCH", "auto").strip().lower()
+    return mode if mode in ("auto", "inotify", "polling", "off") else "auto"
+
+
+def clouvel_home() -> Path:
+    """머신 단위 Clouvel 데이터 폴더 (프로젝트 레지스트리 등)"""
+    return Path(os.environ.get("CLOUVEL_HOME") or Path.home() / ".clouvel")
+
+
+def metrics_textfile() -> str:
+    """메트릭 텍스트 파일 경로 ({pid} 치환, 빈 값 = 내보내지 않음)"""
+    return os.environ.get("CLOUVEL_METRICS_TEXTFILE", "").strip()
+
+
+def metrics_interval() -> float:
+    """메트릭 텍스트 파일 갱신 주기 (초)"""
+    return env_int("CLOUVEL_METRICS_INTERVAL_MS", 15000, minimum=100) / 1000
+
+
+def analytics_compact_interval() -> float:
+    """analytics shard compaction 주기 (초, 0 = 종료 시에만)"""
+    return env_int("CLOUVEL_ANALYTICS_COMPACT_S", 300)
+
+
+def session_idle_s() -> int:
+    """이 시간(초) 넘게 호출이 없으면 사용 세션을 끝난 것으로 봄"""
+    return env_int("CLOUVEL_SESSION_IDLE_S", 1800, minimum=1)
+
+
+def analytics_backend() -> str:
+    """analytics 저장 방식: json(JSONL 로그 + rollup) / sqlite(.clouvel/analytics.db)"""
+    backend = os.environ.get("CLOUVEL_ANALYTICS_BACKEND", "json").strip().lower()
+    return backend if backend in ("json", "sqlite") else "json"
+
+
+def watch_max_dirs() -> int:
+    """감시할 디렉토리 수 상한 (모든 프로젝트 합계)"""
+    return env_int("CLOUVEL_WATCH_MAX_DIRS", 4096, minimum=1)
+
+
+def watch_idle_seconds() -> float:
+    """이 시간 동안 안 쓴 프로젝트는 감시 해제 (초)"""
+    return env_int("CLOUVEL_WATCH_IDLE_S", 900, minimum=1)
+
+
+def watch_poll_seconds() -> float:
+    """polling 방식 검사 주기 (초)"""
+    return env_int("CLOUVEL_WATCH_POLL_MS", 1000, minimum=10) / 1000
+
+
+def disk_cache_enabled() -> bool:
+    """can_code 판정을 .clouvel/cache에 저장해서 다음 프로세스가 재사용 (0 = 끔)"""
+    return env_int("CLOUVEL_DISK_CACHE", 1) > 0
+
+
+def file_cache_bytes() -> int:
+    """작은 파일 내용 캐시 전체 상한 (바이트, 파일 하나는 1/16까지만 캐시)"""
+    return env_int("CLOUVEL_FILE_CACHE_KB", 4096) * 1024
+
+
+def coalesce_ttl_ms() -> int:
+    """읽기 전용 도구 결과 재사용 시간 (ms, 0 = 동시 요청만 합침)"""
+    return env_int("CLOUVEL_COALESCE_TTL_MS", 500)
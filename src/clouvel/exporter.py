@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+메트릭 텍스트 파일 내보내기 (node_exporter textfile collector용)
+
+CLOUVEL_METRICS_TEXTFILE이 설정되면 서버가 주기적으로 프로세스 안의 값을
+Prometheus/OpenMetrics 텍스트 형식으로 써 둠 (임시 파일 + rename → 반쯤 쓴 파일을 읽지 않음).
+analytics 파일은 읽지 않고 metrics / fileio / scheduler의 메모리 카운터만 사용 → 도구 호출 경로에 부담 없음.
+
+- 도구별 호출 수 / 지연 시간 히스토그램
+- 파일 탐색 시간 히스토그램
+- 파일 캐시 / 중복 요청 합치기 적중 수
+- 레인별 대기열 길이 / 실행 중 / 대기 시간 히스토그램
+경로의 {pid}는 프로세스 ID로 바뀜 (서버가 여러 개면 파일을 나눠 쓰도록). 종료 시 파일 삭제.
+"""
+
+import asyncio
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from . import config, fileio, metrics, scheduler
+from .metrics import bucket_upper_ms
+
+# 파일 쓰기와 종료 시 삭제가 겹치지 않도록 (취소돼도 to_thread 쓰기는 끝까지 돎)
+_write_lock = threading.Lock()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Writer:
+    """메트릭 이름별로 HELP/TYPE을 한 번만 쓰는 텍스트 버퍼"""
+
+    def __init__(self):
+        self.lines: list[str] = []
+        self._declared: set[str] = set()
+
+    def declare(self, name: str, kind: str, help_text: str) -> None:
+        if name not in self._declared:
+            self._declared.add(name)
+            self.lines.append(f"# HELP {name} {help_text}")
+            self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, kind: str, help_text: str, value: float, **labels) -> None:
+        self.declare(name, kind, help_text)
+        self.lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, name: str, help_text: str, histogram: list[int], sum_ms: float, **labels) -> None:
+        """ms 히스토그램 → 초 단위 누적 버킷"""
+        self.declare(name, "histogram", help_text)
+        cumulative = 0
+        for index, count in enumerate(histogram[:-1]):
+            cumulative += count
+            le = f"{bucket_upper_ms(index) / 1000:.6g}"
+            self.lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {cumulative}")
+        cumulative += histogram[-1] if histogram else 0
+        self.lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {cumulative}")
+        self.lines.append(f"{name}_sum{_labels(labels)} {_number(round(sum_ms / 1000, 6))}")
+        self.lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def render() -> str:
+    """현재 프로세스 메트릭 텍스트"""
+    out = _Writer()
+    totals = metrics.process_totals()
+
+    for tool, calls in sorted(totals["calls"].items()):
+        for outcome in ("ok", "fail"):
+            out.sample("clouvel_tool_calls_total", "counter", "도구 호출 수", calls[outcome], tool=tool, outcome=outcome)
+    for tool, calls in sorted(totals["calls"].items()):
+        out.histogram("clouvel_tool_duration_seconds", "도구 호출 지연 시간", calls["lat"], calls["ms"], tool=tool)
+    for kind, scans in sorted(totals["scans"].items()):
+        out.histogram("clouvel_scan_duration_seconds", "파일 탐색 시간", scans["lat"], scans["ms"], kind=kind)
+
+    cache = fileio.cache_stats()
+    for kind in ("stat", "read"):
+        out.sample("clouvel_file_cache_hits_total", "counter", "파일 캐시 적중 수", cache[f"{kind}_hits"], cache=kind)
+        out.sample("clouvel_file_cache_misses_total", "counter", "파일 캐시 미적중 수", cache[f"{kind}_misses"], cache=kind)
+    out.sample("clouvel_file_cache_evictions_total", "counter", "파일 내용 캐시 제거 수", cache["evictions"])
+    out.sample("clouvel_file_cache_bytes", "gauge", "캐시된 파일 내용 크기", cache["cached_bytes"])
+
+    coalesced = scheduler.coalesce_stats()
+    out.sample("clouvel_coalesced_calls_total", "counter", "합쳐진 중복 요청 수", coalesced["shared"], how="inflight")
+    out.sample("clouvel_coalesced_calls_total", "counter", "합쳐진 중복 요청 수", coalesced["memo_hits"], how="memo")
+
+    lanes = scheduler.lane_stats()
+    for lane, stats in lanes.items():
+        out.sample("clouvel_lane_workers", "gauge", "레인 동시 실행 수 상한", stats["workers"], lane=lane)
+        out.sample("clouvel_lane_queued", "gauge", "레인 대기열 길이", stats["queued"], lane=lane)
+        out.sample("clouvel_lane_running", "gauge", "레인 실행 중 작업 수", stats["running"], lane=lane)
+        out.sample("clouvel_lane_completed_total", "counter", "레인 완료 작업 수", stats["completed"], lane=lane)
+    for lane, stats in lanes.items():
+        out.histogram("clouvel_lane_wait_seconds", "레인 대기 시간", stats["wait_histogram"], stats["wait_ms_total"], lane=lane)
+
+    return out.text()
+
+
+def textfile_path() -> Optional[Path]:
+    """내보낼 파일 경로 (설정 안 했으면 None)"""
+    template = config.metrics_textfile()
+    if not template:
+        return None
+    return Path(template.replace("{pid}", str(os.getpid())))
+
+
+def write_textfile(path: Path, stopped: Optional[threading.Event] = None) -> None:
+    """같은 폴더의 임시 파일에 쓰고 rename (collector가 반쯤 쓴 파일을 읽지 않도록)
+    stopped가 설정돼 있으면 쓰지 않음 (종료 후 파일이 다시 생기지 않도록)
+    """
+    text = render()
+    with _write_lock:
+        if stopped is not None and stopped.is_set():
+            return
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+async def run_exporter(path: Path, interval: Optional[float] = None) -> None:
+    """주기적으로 파일 갱신 - 취소되면 파일 삭제 (죽은 프로세스 값이 남지 않도록)"""
+    if interval is None:
+        interval = config.metrics_interval()
+    stopped = threading.Event()
+    try:
+        while True:
+            try:
+                await asyncio.to_thread(write_textfile, path, stopped)
+            except OSError:
+                pass
+            await asyncio.sleep(interval)
+    finally:
+        stopped.set()
+        with _write_lock:  # 진행 중인 쓰기가 끝난 뒤 삭제
+            path.unlink(missing_ok=True)
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+도구 공용 파일 접근 계층
+
+도구마다 같은 작은 파일(task_plan.md, progress.md, 규칙 파일 등)을 호출할 때마다 다시 읽고,
+호출 하나 안에서도 같은 경로를 여러 번 stat함. 모든 도구가 여기를 거치도록 해서:
+
+- stat 캐시: 도구 호출 하나(call_scope) 동안만 유효 → 호출 사이에는 항상 새로 stat
+- 내용 캐시: 작은 텍스트 파일, 전체 바이트 상한 LRU, (mtime_ns, size)가 같을 때만 재사용
+  방금 바뀐 파일(mtime 해상도 안)은 캐시하지 않음
+- write_text는 캐시를 같이 갱신
+- 적중률 카운터 → get_analytics
+- 접근한 경로는 metrics.touch로 도구 호출 계측에 알림
+"""
+
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from stat import S_ISDIR, S_ISREG
+from typing import Iterator, Optional
+
+from . import config, metrics
+
+# mtime 해상도 안의 변경을 놓치지 않도록 이 시간 안에 바뀐 파일은 캐시 안 함
+_RACY_WINDOW_NS = 2_000_000_000
+
+# 호출 하나 동안의 stat 결과 (경로 → stat_result 또는 None)
+_stat_scope: contextvars.ContextVar[Optional[dict[str, Optional[os.stat_result]]]] = contextvars.ContextVar(
+    "clouvel_stat_scope", default=None
+)
+
+# 경로 → (mtime_ns, size, 내용) - 상한은 파일 크기(바이트) 기준
+_contents: "OrderedDict[str, tuple[int, int, str]]" = OrderedDict()
+_contents_bytes = 0
+_lock = threading.Lock()
+
+_counters = {"stat_hits": 0, "stat_misses": 0, "read_hits": 0, "read_misses": 0, "evictions": 0}
+
+
+def _count(name: str) -> None:
+    with _lock:
+        _counters[name] += 1
+
+
+@contextmanager
+def call_scope() -> Iterator[None]:
+    """도구 호출 하나 동안 stat 결과 재사용 (중첩 시 바깥 범위 유지)"""
+    if _stat_scope.get() is not None:
+        yield
+        return
+    token = _stat_scope.set({})
+    try:
+        yield
+    finally:
+        _stat_scope.reset(token)
+
+
+def stat(path: Path | str) -> Optional[os.stat_result]:
+    """os.stat (없으면 None), call_scope 안에서는 같은 경로를 한 번만"""
+    key = os.fspath(path)
+    metrics.touch(key)
+    scope = _stat_scope.get()
+    if scope is not None and key in scope:
+        _count("stat_hits")
+        return scope[key]
+    _count("stat_misses")
+    try:
+        result = os.stat(key)
+    except OSError:
+        result = None
+    if scope is not None:
+        scope[key] = result
+    return result
+
+
+def exists(path: Path | str) -> bool:
+    return stat(path) is not None
+
+
+def is_file(path: Path | str) -> bool:
+    st = stat(path)
+    return st is not None and S_ISREG(st.st_mode)
+
+
+def is_dir(path: Path | str) -> bool:
+    st = stat(path)
+    return st is not None and S_ISDIR(st.st_mode)
+
+
+def _forget(key: str) -> None:
+    """_lock 안에서 호출"""
+    global _contents_bytes
+    cached = _contents.pop(key, None)
+    if cached is not None:
+        _contents_bytes -= cached[1]
+
+
+def read_text(path: Path | str) -> str:
+    """UTF-8 텍스트 읽기 (작은 파일은 내용 캐시). 없으면 FileNotFoundError"""
+    key = os.fspath(path)
+    st = stat(key)
+    if st is None:
+        raise FileNotFoundError(key)
+
+    with _lock:
+        cached = _contents.get(key)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            _contents.move_to_end(key)
+            _counters["read_hits"] += 1
+            return cached[2]
+        _counters["read_misses"] += 1
+
+    with open(key, encoding="utf-8") as f:
+        text = f.read()
+
+    limit = config.file_cache_bytes()
+    if st.st_size <= limit // 16 and st.st_mtime_ns < time.time_ns() - _RACY_WINDOW_NS:
+        _store(key, st, text, limit)
+    return text
+
+
+def _store(key: str, st: os.stat_result, text: str, limit: int) -> None:
+    global _contents_bytes
+    with _lock:
+        _forget(key)
+        _contents[key] = (st.st_mtime_ns, st.st_size, text)
+        _contents_bytes += st.st_size
+        while _contents_bytes > limit and _contents:
+            _forget(next(iter(_contents)))
+            _counters["evictions"] += 1
+
+
+def write_text(path: Path | str, text: str) -> None:
+    """UTF-8 텍스트 쓰기 + 캐시 무효화"""
+    key = os.fspath(path)
+    metrics.touch(key)
+    with open(key, "w", encoding="utf-8") as f:
+        f.write(text)
+    with _lock:
+        _forget(key)
+    scope = _stat_scope.get()
+    if scope is not None:
+        scope.pop(key, None)
+        scope.pop(os.path.dirname(key), None)
+
+
+def cache_stats() -> dict:
+    """stat/내용 캐시 적중률 (프로세스 시작 이후 누적)"""
+    with _lock:
+        counters = dict(_counters)
+        files = len(_contents)
+        cached_bytes = _contents_bytes
+
+    def rate(hits: int, misses: int) -> float:
+        return round(hits / (hits + misses) * 100, 1) if hits + misses else 0.0
+
+    return {
+        **counters,
+        "stat_hit_rate": rate(counters["stat_hits"], counters["stat_misses"]),
+        "read_hit_rate": rate(counters["read_hits"], counters["read_misses"]),
+        "cached_files": files,
+        "cached_bytes": cached_bytes,
+    }
+
+
+def clear() -> None:
+    """내용 캐시와 카운터 초기화"""
+    global _contents_bytes
+    with _lock:
+        _contents.clear()
+        _contents_bytes = 0
+        for name in _counters:
+            _counters[name] = 0
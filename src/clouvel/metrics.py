@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+도구 실행 계측
+
+- 지연 시간은 고정 크기 로그 스케일 히스토그램으로 집계 (메모리/파일 크기 일정)
+- CPU 시간은 핸들러가 실제로 돈 스레드의 thread_time 기준
+- 파일 접근 수는 파일을 여는 곳(fileio, 트리 탐색)이 touch()로 직접 알림
+- 프로세스 누적 호출 수 / 지연 시간 / 탐색 시간 (exporter가 읽음)
+"""
+
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# 0.1ms부터 √2배씩 48칸 → 마지막 칸 상한 약 20분
+LATENCY_BASE_MS = 0.1
+LATENCY_FACTOR = math.sqrt(2)
+LATENCY_BUCKETS = 48
+
+_current_probe: contextvars.ContextVar[Optional["ToolProbe"]] = contextvars.ContextVar("clouvel_probe", default=None)
+
+
+def latency_bucket(ms: float) -> int:
+    """지연 시간(ms) → 히스토그램 칸 번호"""
+    if ms <= LATENCY_BASE_MS:
+        return 0
+    index = math.ceil(math.log(ms / LATENCY_BASE_MS, LATENCY_FACTOR) - 1e-9)
+    return min(index, LATENCY_BUCKETS - 1)
+
+
+def bucket_upper_ms(index: int) -> float:
+    """히스토그램 칸의 상한(ms)"""
+    return LATENCY_BASE_MS * LATENCY_FACTOR ** index
+
+
+def empty_histogram() -> list[int]:
+    return [0] * LATENCY_BUCKETS
+
+
+def percentile(histogram: list[int], q: float) -> Optional[float]:
+    """히스토그램에서 q(0~1) 분위 값 (해당 칸 상한, ms)"""
+    total = sum(histogram)
+    if total == 0:
+        return None
+    rank = q * total
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= rank:
+            return round(bucket_upper_ms(index), 2)
+    return round(bucket_upper_ms(len(histogram) - 1), 2)
+
+
+def touch(path) -> None:
+    """현재 도구 호출이 파일/디렉토리에 접근했음을 기록 (측정 중이 아니면 무시)"""
+    probe = _current_probe.get()
+    if probe is not None:
+        probe.paths.add(path)
+
+
+class ToolProbe:
+    """도구 호출 하나의 CPU 시간 / 파일 접근 측정"""
+
+    def __init__(self):
+        self.cpu_ms = 0.0
+        self.paths: set = set()
+        self.wait_ms = 0.0  # 레인 대기열에서 기다린 시간
+
+    @property
+    def files_touched(self) -> int:
+        return len(self.paths)
+
+    @contextmanager
+    def track(self) -> Iterator["ToolProbe"]:
+        """핸들러를 실행하는 스레드에서 감싸서 사용"""
+        token = _current_probe.set(self)
+        start = time.thread_time()
+        try:
+            yield self
+        finally:
+            self.cpu_ms += (time.thread_time() - start) * 1000
+            _current_probe.reset(token)
+
+
+# ============================================================
+# 프로세스 누적 값 (OpenMetrics 파일 내보내기용, analytics 파일을 다시 읽지 않음)
+# ============================================================
+
+_totals_lock = threading.Lock()
+_call_totals: dict[str, dict] = {}   # 도구 → {"ok", "fail", "ms", "lat": 히스토그램}
+_scan_totals: dict[str, dict] = {}   # 탐색 종류(walk / docs) → {"count", "ms", "lat"}
+
+
+def _observe(totals: dict, ms: float) -> None:
+    totals["ms"] = totals.get("ms", 0.0) + ms
+    totals.setdefault("lat", empty_histogram())[latency_bucket(ms)] += 1
+
+
+def record_call(tool: str, success: bool, duration_ms: float) -> None:
+    """도구 호출 하나 누적"""
+    with _totals_lock:
+        totals = _call_totals.setdefault(tool, {"ok": 0, "fail": 0})
+        totals["ok" if success else "fail"] += 1
+        _observe(totals, duration_ms)
+
+
+def record_scan(kind: str, elapsed_ms: float) -> None:
+    """파일 탐색 한 번 누적"""
+    with _totals_lock:
+        totals = _scan_totals.setdefault(kind, {"count": 0})
+        totals["count"] += 1
+        _observe(totals, elapsed_ms)
+
+
+def process_totals() -> dict:
+    """누적 값 복사본 {"calls": {...}, "scans": {...}}"""
+    with _totals_lock:
+        copy = lambda d: {k: {**v, "lat": list(v.get("lat", empty_histogram()))} for k, v in d.items()}
+        return {"calls": copy(_call_totals), "scans": copy(_scan_totals)}
+
+
+def reset_totals() -> None:
+    with _totals_lock:
+        _call_totals.clear()
+        _scan_totals.clear()
@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+"""
+도구 실행 스케줄러
+
+핸들러는 전부 async def지만 내부는 동기 파일 I/O라서
+이벤트 루프에서 그대로 돌리면 느린 호출 하나가 서버 전체를 멈춤.
+도구별 분류에 따라 static은 루프에서 바로, 나머지는 레인별 스레드 풀에서 실행.
+- interactive: can_code 등 가벼운 파일 도구 (무거운 작업 뒤에 줄서지 않도록 분리)
+- heavy: gate / hook_verify / spawn_* / 워크스페이스 전체 검사
+- background: 캐시 채우기, 디스크 캐시 저장, analytics flush
+레인마다 동시 실행 수 상한과 대기열 길이 / 대기 시간 통계가 따로 있음.
+
+읽기 전용 도구는 같은 요청(도구 이름 + 정규화한 인자)이 동시에 들어오면
+먼저 들어온 계산 하나를 같이 기다리고, 결과를 짧게(TTL) 재사용함.
+쓰기 도구가 같은 프로젝트를 건드리면 해당 결과는 바로 버림.
+
+레인에서 도는 호출에는 시간 제한이 있고(레인/도구별 설정), 시간 초과나 클라이언트 취소 시
+취소 이벤트를 설정함 → 탐색 루프의 cancel.checkpoint()에서 빠져나와 워커를 바로 돌려줌.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+from mcp.types import TextContent
+
+from . import cancel, config, fileio
+from .metrics import ToolProbe, empty_histogram, latency_bucket, percentile
+
+# 도구 분류
+KIND_STATIC = "static"          # 순수 문자열 생성, I/O 없음 → 루프에서 바로 실행
+KIND_FILESYSTEM = "filesystem"  # 파일 읽기/쓰기/탐색 → 레인 스레드 풀
+
+TOOL_KINDS = {
+    # Core
+    "can_code": KIND_FILESYSTEM,
+    "scan_docs": KIND_FILESYSTEM,
+    "analyze_docs": KIND_FILESYSTEM,
+    "get_prd_section": KIND_FILESYSTEM,
+    "init_docs": KIND_FILESYSTEM,
+
+    # Docs
+    "get_prd_template": KIND_STATIC,
+    "write_prd_section": KIND_STATIC,
+    "get_prd_guide": KIND_STATIC,
+    "get_verify_checklist": KIND_STATIC,
+    "get_setup_guide": KIND_STATIC,
+    "get_analytics": KIND_FILESYSTEM,
+
+    # Setup
+    "init_clouvel": KIND_STATIC,
+    "setup_cli": KIND_FILESYSTEM,
+
+    # Rules (v0.5)
+    "init_rules": KIND_FILESYSTEM,
+    "get_rule": KIND_FILESYSTEM,
+    "add_rule": KIND_FILESYSTEM,
+
+    # Verify (v0.5)
+    "verify": KIND_STATIC,
+    "gate": KIND_FILESYSTEM,
+    "handoff": KIND_FILESYSTEM,
+
+    # Planning (v0.6)
+    "init_planning": KIND_FILESYSTEM,
+    "save_finding": KIND_FILESYSTEM,
+    "refresh_goals": KIND_FILESYSTEM,
+    "update_progress": KIND_FILESYSTEM,
+
+    # Agents (v0.7)
+    "spawn_explore": KIND_FILESYSTEM,
+    "spawn_librarian": KIND_FILESYSTEM,
+
+    # Hooks (v0.8)
+    "hook_design": KIND_FILESYSTEM,
+    "hook_verify": KIND_FILESYSTEM,
+
+    # Batch (하위 호출은 각자 분류대로 실행)
+    "batch": KIND_STATIC,
+
+    # Pro 안내
+    "upgrade_pro": KIND_STATIC,
+}
+
+# 레인
+LANE_INTERACTIVE = "interactive"
+LANE_HEAVY = "heavy"
+LANE_BACKGROUND = "background"
+LANES = (LANE_INTERACTIVE, LANE_HEAVY, LANE_BACKGROUND)
+
+# 오래 걸릴 수 있는 도구 (interactive 레인을 점유하지 않도록)
+HEAVY_TOOLS = frozenset({"gate", "hook_verify", "spawn_explore", "spawn_librarian"})
+
+# 같은 인자면 같은 결과를 주는 도구 (요청 합치기 / 짧은 재사용 대상)
+READ_ONLY_TOOLS = frozenset({
+    "can_code", "scan_docs", "analyze_docs", "get_prd_section",
+    "get_rule", "refresh_goals", "get_analytics",
+})
+
+Handler = Callable[[dict], Awaitable[list[TextContent]]]
+
+def get_tool_kind(name: str) -> str:
+    """도구 분류 반환 (모르는 도구는 안전하게 filesystem 취급)"""
+    return TOOL_KINDS.get(name, KIND_FILESYSTEM)
+
+
+def get_lane(name: str, arguments: dict) -> Optional[str]:
+    """도구 호출이 돌 레인 (static이면 None = 이벤트 루프에서 바로)"""
+    kind = get_tool_kind(name)
+    if kind == KIND_STATIC:
+        return None
+    if name in HEAVY_TOOLS or arguments.get("workspace"):
+        return LANE_HEAVY
+    return LANE_INTERACTIVE
+
+
+class Lane:
+    """스레드 풀 하나 + 대기열 / 대기 시간 통계"""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"clouvel-{name}")
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._loops: list[asyncio.AbstractEventLoop] = []
+        self.queued = 0
+        self.running = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.wait_ms = 0.0
+        self.wait_histogram = empty_histogram()
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """fn 실행 예약 (대기 시간은 fn이 시작될 때 기록, 첫 인자가 ToolProbe면 거기에도)"""
+        submitted = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+        def run():
+            waited = (time.perf_counter() - submitted) * 1000
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.wait_ms += waited
+                self.wait_histogram[latency_bucket(waited)] += 1
+            if args and isinstance(args[-1], ToolProbe):
+                args[-1].wait_ms = waited
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        try:
+            future = self._executor.submit(run)
+        except RuntimeError:
+            self._unqueue()
+            raise
+        future.add_done_callback(lambda f: f.cancelled() and self._unqueue())
+        return future
+
+    def thread_loop(self) -> asyncio.AbstractEventLoop:
+        """현재 워커 스레드의 이벤트 루프 (호출마다 asyncio.run으로 새로 만들지 않고 계속 씀)"""
+        loop = getattr(self._local, "loop", None)
+        if loop is None:
+            loop = self._local.loop = asyncio.new_event_loop()
+            with self._lock:
+                self._loops.append(loop)
+        return loop
+
+    def _unqueue(self) -> None:
+        """시작 전에 취소된 작업"""
+        with self._lock:
+            self.queued -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            started = self.completed + self.running
+            return {
+                "workers": self.workers,
+                "queued": self.queued,
+                "running": self.running,
+                "max_queued": self.max_queued,
+                "completed": self.completed,
+                "avg_wait_ms": round(self.wait_ms / started, 2) if started else 0.0,
+                "p95_wait_ms": percentile(self.wait_histogram, 0.95),
+                "wait_ms_total": round(self.wait_ms, 3),
+                "wait_histogram": list(self.wait_histogram),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        if wait:  # 워커 스레드가 모두 끝났으므로 루프도 닫음
+            with self._lock:
+                loops, self._loops = self._loops, []
+            for loop in loops:
+                loop.close()
+
+
+_lanes: dict[str, Lane] = {}
+_lanes_lock = threading.Lock()
+
+
+def get_lane_pool(lane: str) -> Lane:
+    """레인별 스레드 풀 (처음 쓸 때 생성)"""
+    with _lanes_lock:
+        pool = _lanes.get(lane)
+        if pool is None:
+            pool = Lane(lane, config.lane_workers(lane))
+            _lanes[lane] = pool
+        return pool
+
+
+def submit_background(fn: Callable[[], object]) -> Future:
+    """유지보수 작업 (캐시 채우기 등) - 도구 호출과 스레드를 나눠 쓰지 않음"""
+    return get_lane_pool(LANE_BACKGROUND).submit(fn)
+
+
+def lane_stats() -> dict:
+    """레인별 대기열 / 대기 시간 (이 서버 프로세스)"""
+    with _lanes_lock:
+        pools = dict(_lanes)
+    return {lane: pools[lane].stats() for lane in LANES if lane in pools}
+
+
+class ToolTimeout(Exception):
+    """도구 호출이 시간 제한 안에 끝나지 않음"""
+
+    def __init__(self, name: str, timeout_ms: int):
+        super().__init__(f"{name}: {timeout_ms}ms")
+        self.name = name
+        self.timeout_ms = timeout_ms
+
+
+def get_timeout_ms(name: str, arguments: dict) -> Optional[int]:
+    """도구 호출 시간 제한 (None = 무제한)"""
+    lane = get_lane(name, arguments)
+    if lane is None:
+        return None
+    return config.tool_timeout_ms(name, heavy=lane == LANE_HEAVY) or None
+
+
+def _run_in_thread(pool: Lane, handler: Handler, arguments: dict, cancel_event: threading.Event, probe: ToolProbe) -> list[TextContent]:
+    """워커 스레드에서 핸들러 코루틴을 끝까지 실행 (스레드마다 하나인 이벤트 루프에서)"""
+    with probe.track(), fileio.call_scope(), cancel.scope(cancel_event):
+        cancel.checkpoint()  # 대기열에 있는 동안 취소됨
+        return pool.thread_loop().run_until_complete(handler(arguments))
+
+
+async def dispatch(name: str, handler: Handler, arguments: dict, probe: Optional[ToolProbe] = None) -> list[TextContent]:
+    """도구 분류에 맞는 곳에서 핸들러 실행 (probe가 있으면 CPU/파일 접근/대기 시간 측정)
+    시간 초과 → ToolTimeout, 호출 쪽 취소 → CancelledError (둘 다 워커에 취소를 알림)
+    """
+    probe = probe or ToolProbe()
+    lane = get_lane(name, arguments)
+    if lane is None:
+        with probe.track(), fileio.call_scope():
+            return await handler(arguments)
+
+    cancel_event = threading.Event()
+    pool = get_lane_pool(lane)
+    future = pool.submit(_run_in_thread, pool, handler, arguments, cancel_event, probe)
+    timeout_ms = get_timeout_ms(name, arguments)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout_ms / 1000 if timeout_ms else None)
+    except asyncio.TimeoutError:
+        cancel_event.set()
+        raise ToolTimeout(name, timeout_ms) from None
+    except asyncio.CancelledError:
+        cancel_event.set()
+        raise
+
+
+def shutdown(wait: bool = True) -> None:
+    """스레드 풀 정리 (서버 종료 시)"""
+    with _lanes_lock:
+        pools = list(_lanes.values())
+        _lanes.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
+
+
+# ============================================================
+# 읽기 전용 요청 합치기 (in-flight 공유 + 짧은 TTL 재사용)
+# ============================================================
+
+# 요청 키 → 진행 중인 계산
+_inflight: dict[str, asyncio.Future] = {}
+# 재사용 결과 최대 개수 (넘으면 가장 오래 안 쓴 것부터 버림)
+MEMO_SIZE = 256
+
+# 요청 키 → (만료 시각, 프로젝트 경로, 결과) (LRU 순서)
+_memo: "OrderedDict[str, tuple[float, Optional[str], list[TextContent]]]" = OrderedDict()
+# 쓰기 도구가 시작/끝날 때마다 증가 (계산 중에 쓰기가 있었으면 결과를 보관하지 않음)
+_write_epoch = 0
+_coalesce_stats = {"shared": 0, "memo_hits": 0}
+
+
+def project_of(arguments: dict) -> Optional[str]:
+    """인자의 path (절대 경로, 없으면 None)"""
+    path = arguments.get("path")
+    return os.path.abspath(path) if isinstance(path, str) and path else None
+
+
+def _request_key(name: str, arguments: dict) -> str:
+    normalized = dict(arguments)
+    project = project_of(arguments)
+    if project is not None:
+        normalized["path"] = project
+    return name + "\0" + json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def paths_overlap(a: Optional[str], b: Optional[str]) -> bool:
+    """같은 경로이거나 한쪽이 다른 쪽 안에 있음 (경로를 모르면 겹친다고 봄)"""
+    if a is None or b is None:
+        return True
+    return a == b or a.startswith(b + os.sep) or b.startswith(a + os.sep)
+
+
+def is_writer(name: str) -> bool:
+    """프로젝트 파일을 바꿀 수 있는 도구 (static / 읽기 전용이 아닌 것)"""
+    return get_tool_kind(name) != KIND_STATIC and name not in READ_ONLY_TOOLS
+
+
+def invalidate(project: Optional[str]) -> None:
+    """project와 겹치는 재사용 결과 버리기 (None이면 전부)"""
+    global _write_epoch
+    _write_epoch += 1
+    for key in [k for k, (_, path, _) in _memo.items() if paths_overlap(project, path)]:
+        del _memo[key]
+
+
+async def coalesce(name: str, arguments: dict, compute: Callable[[], Awaitable[list[TextContent]]]) -> list[TextContent]:
+    """읽기 전용 도구는 동일 요청을 합치고, 쓰기 도구는 끝난 뒤 관련 결과를 무효화"""
+    if get_tool_kind(name) == KIND_STATIC:
+        return await compute()
+    if name not in READ_ONLY_TOOLS:
+        project = project_of(arguments)
+        invalidate(project)
+        try:
+            return await compute()
+        finally:
+            invalidate(project)
+
+    key = _request_key(name, arguments)
+    now = time.monotonic()
+    memo = _memo.get(key)
+    if memo is not None:
+        if memo[0] > now:
+            _coalesce_stats["memo_hits"] += 1
+            _memo.move_to_end(key)
+            return memo[2]
+        del _memo[key]
+
+    pending = _inflight.get(key)
+    if pending is not None and pending.get_loop() is asyncio.get_running_loop():
+        _coalesce_stats["shared"] += 1
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            # 먼저 시작한 호출만 취소된 경우 → 직접 계산
+            if not pending.cancelled():
+                raise
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    epoch = _write_epoch
+    try:
+        result = await compute()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # 기다리는 쪽이 없어도 경고 안 나도록
+        raise
+    finally:
+        if _inflight.get(key) is future:
+            del _inflight[key]
+    future.set_result(result)
+
+    ttl = config.coalesce_ttl_ms() / 1000
+    if ttl > 0 and epoch == _write_epoch:
+        _remember(key, (time.monotonic() + ttl, project_of(arguments), result))
+    return result
+
+
+def _remember(key: str, entry: tuple[float, Optional[str], list[TextContent]]) -> None:
+    """결과 보관 - 만료된 것은 먼저 버리고, 그래도 넘치면 LRU로 정리"""
+    now = time.monotonic()
+    for expired in [k for k, (expires, _, _) in _memo.items() if expires <= now]:
+        del _memo[expired]
+    _memo[key] = entry
+    _memo.move_to_end(key)
+    while len(_memo) > MEMO_SIZE:
+        _memo.popitem(last=False)
+
+
+def coalesce_stats() -> dict:
+    """합쳐진 요청 수 (진행 중 공유 / TTL 재사용)"""
+    return dict(_coalesce_stats, inflight=len(_inflight), memo=len(_memo))
+
+
+def clear_coalesced() -> None:
+    _memo.clear()
+    _inflight.clear()
@@ -6,14 +6,20 @@ Clouvel MCP Server v0.8.0
 Free 버전 - Pro 기능은 clouvel-pro 패키지 참조
 """
 
+import asyncio
+import time
+
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
-from .analytics import log_tool_call, get_stats, format_stats
+from .analytics import log_tool_call, get_stats, aggregate_stats, format_stats, get_analytics_path, run_flusher
+from . import exporter, fileio, metrics, scheduler, watcher
+from .metrics import ToolProbe
+from .tools.output import OUTPUT_SCHEMA, OUTPUT_MARKDOWN, OUTPUT_JSON, output_mode, render
 from .tools import (
     # core
-    can_code, scan_docs, analyze_docs, init_docs, REQUIRED_DOCS,
+    can_code, scan_docs, analyze_docs, get_prd_section, init_docs, REQUIRED_DOCS,
     # docs
     get_prd_template, write_prd_section, get_prd_guide, get_verify_checklist, get_setup_guide,
     # setup
@@ -44,7 +50,13 @@ TOOL_DEFINITIONS = [
         description="코드 작성 전 반드시 호출. 문서 상태 확인 후 코딩 가능 여부 판단.",
         inputSchema={
             "type": "object",
-            "properties": {"path": {"type": "string", "description": "프로젝트 docs 폴더 경로"}},
+            "properties": {
+                "path": {"type": "string", "description": "프로젝트 docs 폴더 경로"},
+                "budget_ms": {"type": "number", "description": "파일 탐색 시간 예산 (ms, 기본: 서버 설정)"},
+                "max_entries": {"type": "integer", "description": "파일 탐색 항목 수 예산 (기본: 서버 설정)"},
+                "workspace": {"type": "boolean", "description": "모노레포 모드: path를 저장소 루트로 보고 패키지(pyproject.toml/package.json/go.mod)별로 검사"},
+                "output": OUTPUT_SCHEMA
+            },
             "required": ["path"]
         }
     ),
@@ -53,7 +65,12 @@ TOOL_DEFINITIONS = [
         description="프로젝트 docs 폴더 스캔. 파일 목록 반환.",
         inputSchema={
             "type": "object",
-            "properties": {"path": {"type": "string", "description": "docs 폴더 경로"}},
+            "properties": {
+                "path": {"type": "string", "description": "docs 폴더 경로"},
+                "budget_ms": {"type": "number", "description": "파일 탐색 시간 예산 (ms, 기본: 서버 설정)"},
+                "max_entries": {"type": "integer", "description": "파일 탐색 항목 수 예산 (기본: 서버 설정)"},
+                "output": OUTPUT_SCHEMA
+            },
             "required": ["path"]
         }
     ),
@@ -62,10 +79,31 @@ TOOL_DEFINITIONS = [
         description="docs 폴더 분석. 필수 문서 체크.",
         inputSchema={
             "type": "object",
-            "properties": {"path": {"type": "string", "description": "docs 폴더 경로"}},
+            "properties": {
+                "path": {"type": "string", "description": "docs 폴더 경로"},
+                "budget_ms": {"type": "number", "description": "파일 탐색 시간 예산 (ms, 기본: 서버 설정)"},
+                "max_entries": {"type": "integer", "description": "파일 탐색 항목 수 예산 (기본: 서버 설정)"},
+                "workspace": {"type": "boolean", "description": "모노레포 모드: path를 저장소 루트로 보고 패키지(pyproject.toml/package.json/go.mod)별로 검사"},
+                "output": OUTPUT_SCHEMA
+            },
             "required": ["path"]
         }
     ),
+    Tool(
+        name="get_prd_section",
+        description="PRD에서 필요한 섹션만 조회. acceptance/scope/non_goals 또는 제목으로 찾음. 전체 PRD를 읽지 않아도 됨.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "path": {"type": "string", "description": "프로젝트 docs 폴더 경로"},
+                "section": {"type": "string", "description": "섹션 이름 (acceptance, scope, non_goals 또는 제목)"},
+                "items_only": {"type": "boolean", "description": "체크박스 항목만 반환 (기본: false)"},
+                "max_chars": {"type": "integer", "description": "최대 글자 수 (기본: 20000, 0 = 무제한)"},
+                "output": OUTPUT_SCHEMA
+            },
+            "required": ["path", "section"]
+        }
+    ),
     Tool(
         name="init_docs",
         description="docs 폴더 초기화 + 템플릿 생성.",
@@ -73,7 +111,8 @@ TOOL_DEFINITIONS = [
             "type": "object",
             "properties": {
                 "path": {"type": "string", "description": "프로젝트 루트 경로"},
-                "project_name": {"type": "string", "description": "프로젝트 이름"}
+                "project_name": {"type": "string", "description": "프로젝트 이름"},
+                "output": OUTPUT_SCHEMA
             },
             "required": ["path", "project_name"]
         }
@@ -120,8 +159,13 @@ TOOL_DEFINITIONS = [
         inputSchema={
             "type": "object",
             "properties": {
-                "path": {"type": "string", "description": "프로젝트 경로"},
-                "days": {"type": "integer", "description": "조회 기간 (기본: 30일)"}
+                "path": {"type": "string", "description": "프로젝트 경로 (없으면 현재 디렉토리)"},
+                "days": {"type": "integer", "description": "조회 기간 (기본: 30일)"},
+                "scope": {
+                    "type": "string",
+                    "enum": ["project", "all"],
+                    "description": "all: 이 머신에서 analytics를 기록한 모든 프로젝트 합산",
+                }
             }
         }
     ),
@@ -347,6 +391,31 @@ TOOL_DEFINITIONS = [
         }
     ),
 
+    # === Batch ===
+    Tool(
+        name="batch",
+        description="여러 도구를 한 번에 호출 (예: can_code + get_rule + refresh_goals). 결과는 순서대로, 항목별 시간/에러 포함.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "calls": {
+                    "type": "array",
+                    "description": "호출 목록 (최대 32개)",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "name": {"type": "string", "description": "도구 이름"},
+                            "arguments": {"type": "object", "description": "도구 인자"}
+                        },
+                        "required": ["name"]
+                    }
+                },
+                "output": OUTPUT_SCHEMA
+            },
+            "required": ["calls"]
+        }
+    ),
+
     # === Pro 안내 ===
     Tool(
         name="upgrade_pro",
@@ -367,10 +436,11 @@ async def list_tools() -> list[Tool]:
 
 TOOL_HANDLERS = {
     # Core
-    "can_code": lambda args: can_code(args.get("path", "")),
-    "scan_docs": lambda args: scan_docs(args.get("path", "")),
-    "analyze_docs": lambda args: analyze_docs(args.get("path", "")),
-    "init_docs": lambda args: init_docs(args.get("path", ""), args.get("project_name", "")),
+    "can_code": lambda args: can_code(args.get("path", ""), args.get("budget_ms"), args.get("max_entries"), args.get("workspace", False), args.get("output", "markdown")),
+    "scan_docs": lambda args: scan_docs(args.get("path", ""), args.get("budget_ms"), args.get("max_entries"), args.get("output", "markdown")),
+    "analyze_docs": lambda args: analyze_docs(args.get("path", ""), args.get("budget_ms"), args.get("max_entries"), args.get("workspace", False), args.get("output", "markdown")),
+    "get_prd_section": lambda args: get_prd_section(args.get("path", ""), args.get("section", ""), args.get("items_only", False), args.get("max_chars", 20000), args.get("output", "markdown")),
+    "init_docs": lambda args: init_docs(args.get("path", ""), args.get("project_name", ""), args.get("output", "markdown")),
 
     # Docs
     "get_prd_template": lambda args: get_prd_template(args.get("project_name", ""), args.get("output_path", "")),
@@ -407,10 +477,79 @@ TOOL_HANDLERS = {
     "hook_design": lambda args: hook_design(args.get("path", ""), args.get("trigger", "pre_code"), args.get("checks", []), args.get("block_on_fail", True)),
     "hook_verify": lambda args: hook_verify(args.get("path", ""), args.get("trigger", "post_code"), args.get("steps", ["lint", "test", "build"]), args.get("parallel", False), args.get("continue_on_error", False)),
 
+    # Batch
+    "batch": lambda args: _batch(args.get("calls", []), args.get("output", "markdown")),
+
     # Pro 안내
     "upgrade_pro": lambda args: _upgrade_pro(),
 }
 
+BATCH_MAX_CALLS = 32
+
+
+async def _batch(calls: list, output: str = OUTPUT_MARKDOWN) -> list[TextContent]:
+    """여러 도구 호출을 한 번에 실행
+    같은 프로젝트를 건드리는 쓰기 도구가 있으면 그 앞뒤 호출은 순서대로, 나머지는 동시에
+    """
+    mode = output_mode(output)
+    if not isinstance(calls, list) or not calls:
+        return [TextContent(type="text", text="❌ calls가 비어 있습니다.")]
+    if len(calls) > BATCH_MAX_CALLS:
+        return [TextContent(type="text", text=f"❌ 한 번에 최대 {BATCH_MAX_CALLS}개까지 호출할 수 있습니다. (받은 수: {len(calls)})")]
+
+    items = []
+    for call in calls:
+        name = call.get("name", "") if isinstance(call, dict) else ""
+        arguments = call.get("arguments") if isinstance(call, dict) else None
+        items.append((name, arguments if isinstance(arguments, dict) else {}))
+
+    async def run(index: int, name: str, arguments: dict, after: list[asyncio.Task]) -> dict:
+        if after:
+            await asyncio.wait(after)
+        started = time.perf_counter()
+        entry = {"index": index, "name": name, "ok": True}
+        try:
+            if name == "batch":
+                raise ValueError("batch 안에서 batch는 호출할 수 없음")
+            result = await call_tool(name, arguments)
+            entry["text"] = "\n".join(c.text for c in result if isinstance(c, TextContent))
+            if name not in TOOL_HANDLERS and name != "get_analytics":
+                entry["ok"] = False
+                entry["error"] = "UnknownTool"
+        except Exception as e:
+            entry["ok"] = False
+            entry["error"] = f"{type(e).__name__}: {e}"
+        entry["ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return entry
+
+    # 앞선 호출과 경로가 겹치고 둘 중 하나라도 쓰기 도구면 그 호출이 끝난 뒤 실행
+    tasks: list[asyncio.Task] = []
+    for index, (name, arguments) in enumerate(items):
+        project = scheduler.project_of(arguments)
+        writer = scheduler.is_writer(name)
+        after = [
+            tasks[j] for j, (other, other_args) in enumerate(items[:index])
+            if (writer or scheduler.is_writer(other)) and scheduler.paths_overlap(project, scheduler.project_of(other_args))
+        ]
+        tasks.append(asyncio.create_task(run(index, name, arguments, after)))
+    entries = await asyncio.gather(*tasks)
+
+    failed = len([e for e in entries if not e["ok"]])
+    if mode == OUTPUT_JSON:
+        return render(mode, {"tool": "batch", "calls": entries, "failed": failed}, "")
+    if mode != OUTPUT_MARKDOWN:
+        lines = [f"{e['index'] + 1}. {e['name']} {'✅' if e['ok'] else '❌'} {e['ms']}ms" for e in entries]
+        return [TextContent(type="text", text="\n".join(lines))]
+
+    result = f"# Batch: {len(entries)}개 호출 | 실패 {failed}개\n"
+    for e in entries:
+        result += f"\n---\n\n## {e['index'] + 1}. {e['name']} {'✅' if e['ok'] else '❌'} ({e['ms']}ms)\n\n"
+        if "error" in e:
+            result += f"에러: {e['error']}\n\n"
+        if e.get("text"):
+            result += e["text"].strip() + "\n"
+    return [TextContent(type="text", text=result)]
+
 
 async def _upgrade_pro() -> list[TextContent]:
     """Pro 업그레이드 안내"""
@@ -456,29 +595,76 @@ pip install clouvel-pro
 
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
-    # Analytics 기록
-    project_path = arguments.get("path", None)
-    if name != "get_analytics":
-        try:
-            log_tool_call(name, success=True, project_path=project_path)
-        except Exception:
-            pass
-
     # get_analytics 특별 처리
     if name == "get_analytics":
-        return await _get_analytics(arguments.get("path", None), arguments.get("days", 30))
-
-    # 핸들러 실행
-    handler = TOOL_HANDLERS.get(name)
-    if handler:
-        return await handler(arguments)
+        handler = lambda args: _get_analytics(args.get("path", None), args.get("days", 30), args.get("scope", "project"))
+    else:
+        handler = TOOL_HANDLERS.get(name)
 
-    return [TextContent(type="text", text=f"Unknown tool: {name}")]
+    if not handler:
+        _record_call(name, arguments, error="UnknownTool")
+        return [TextContent(type="text", text=f"Unknown tool: {name}")]
 
+    if name == "batch":
+        # 하위 호출이 각자 call_tool로 기록되므로 batch 자체는 기록하지 않음 (같은 작업을 두 번 세지 않도록)
+        return await handler(arguments)
 
-async def _get_analytics(path: str, days: int) -> list[TextContent]:
-    """도구 사용량 통계"""
-    stats = get_stats(days=days, project_path=path)
+    # 핸들러 실행 (블로킹 I/O는 스레드 풀에서, 같은 읽기 요청은 합침) + 계측
+    # 시간 초과 / 클라이언트 취소(notifications/cancelled → 이 태스크 취소)는 워커에도 전달됨
+    probe = ToolProbe()
+    started = time.perf_counter()
+    try:
+        result = await scheduler.coalesce(name, arguments, lambda: scheduler.dispatch(name, handler, arguments, probe))
+    except scheduler.ToolTimeout as e:
+        _record_call(name, arguments, started=started, probe=probe, error="Timeout")
+        return [TextContent(type="text", text=(
+            f"⏱️ {name}: {e.timeout_ms / 1000:g}초 안에 끝나지 않아 중단했습니다. "
+            f"(시간 제한 조정: CLOUVEL_TIMEOUT_{name.upper()}_MS)"
+        ))]
+    except asyncio.CancelledError:
+        _record_call(name, arguments, started=started, probe=probe, error="Cancelled")
+        raise
+    except Exception as e:
+        _record_call(name, arguments, started=started, probe=probe, error=type(e).__name__)
+        raise
+    _record_call(name, arguments, started=started, probe=probe, result=result)
+    return result
+
+
+def _record_call(name: str, arguments: dict, started: float | None = None, probe: ToolProbe | None = None,
+                 result: list[TextContent] | None = None, error: str | None = None) -> None:
+    """Analytics 기록 (버퍼에만 쌓이므로 응답을 지연시키지 않음)"""
+    if started is not None:
+        metrics.record_call(name, error is None, (time.perf_counter() - started) * 1000)
+    if name == "get_analytics":
+        return
+    try:
+        log_tool_call(
+            name,
+            success=error is None,
+            project_path=arguments.get("path", None),
+            duration_ms=(time.perf_counter() - started) * 1000 if started is not None else None,
+            cpu_ms=probe.cpu_ms if probe else None,
+            response_bytes=sum(len(c.text.encode("utf-8")) for c in result if isinstance(c, TextContent)) if result else None,
+            files_touched=probe.files_touched if probe else None,
+            error=error,
+            wait_ms=probe.wait_ms if probe else None,
+        )
+    except Exception:
+        pass
+
+
+async def _get_analytics(path: str, days: int, scope: str = "project") -> list[TextContent]:
+    """도구 사용량 통계 (scope=all이면 등록된 모든 프로젝트)"""
+    if scope == "all":
+        stats = aggregate_stats(days=days)
+    else:
+        stats = get_stats(days=days, project_path=path)
+        project = get_analytics_path(path).parent.parent
+        stats["project"] = str(project) if path else f"{project} (path 미지정 → 현재 디렉토리)"
+    stats["file_cache"] = fileio.cache_stats()
+    stats["coalesced"] = scheduler.coalesce_stats()
+    stats["lanes"] = scheduler.lane_stats()
     return [TextContent(type="text", text=format_stats(stats))]
 
 
@@ -487,8 +673,27 @@ async def _get_analytics(path: str, days: int) -> list[TextContent]:
 # ============================================================
 
 async def run_server():
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, server.create_initialization_options())
+    # analytics 버퍼는 백그라운드에서 주기적으로 flush (종료 시 마지막 flush)
+    flusher = asyncio.create_task(run_flusher())
+    background = [flusher]
+    # 메트릭 텍스트 파일 (CLOUVEL_METRICS_TEXTFILE 설정 시)
+    textfile = exporter.textfile_path()
+    if textfile is not None:
+        background.append(asyncio.create_task(exporter.run_exporter(textfile)))
+    # can_code가 본 프로젝트의 docs/테스트 변경 감시 (CLOUVEL_WATCH=off면 끔)
+    watcher.start_watcher()
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, server.create_initialization_options())
+    finally:
+        for task in background:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        watcher.stop_watcher()
+        scheduler.shutdown(wait=False)
 
 
 def _run_setup(global_only: bool = False) -> str:
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+세션 분석 (스트리밍 카운터)
+
+세션 = 같은 서버 프로세스에서 호출 간격이 CLOUVEL_SESSION_IDLE_S 이하로 이어지는 도구 호출들.
+호출마다 열린 세션 상태 몇 개만 갱신하고, 세션이 끝날 때(idle 뒤 다음 호출 또는 서버 종료)
+요약을 카운터에 더함 → 통계 조회 때 이벤트 기록을 다시 읽지 않음.
+
+카운터 (rollup의 "sessions" 항목, analytics._merge로 합산 가능한 모양):
+- transitions: {이전 도구: {다음 도구: 횟수}} (같은 세션 안에서만)
+- count / duration_s / duration_lat: 끝난 세션 수, 길이 합(초), 길이 히스토그램(초 단위 칸)
+- can_code_calls: {세션당 can_code 호출 수: 세션 수}
+- plan_to_progress: init_planning → 첫 update_progress 간격 {count, total_s, lat}
+"""
+
+import copy
+import itertools
+from datetime import datetime
+from typing import Hashable, Iterable, Optional
+
+from . import config
+from .metrics import empty_histogram, latency_bucket, percentile
+
+_sequence = itertools.count(1)
+
+
+def _add_seconds(counters: dict, count_key: Optional[str], total_key: str, lat_key: str, seconds: float) -> None:
+    seconds = max(seconds, 0.0)
+    if count_key:
+        counters[count_key] = counters.get(count_key, 0) + 1
+    counters[total_key] = counters.get(total_key, 0) + seconds
+    counters.setdefault(lat_key, empty_histogram())[latency_bucket(seconds)] += 1
+
+
+def close_session(state: dict, counters: dict) -> None:
+    """끝난 세션 하나를 카운터에 더함"""
+    _add_seconds(counters, "count", "duration_s", "duration_lat", (state["last"] - state["start"]).total_seconds())
+    calls = counters.setdefault("can_code_calls", {})
+    key = str(state["can_code"])
+    calls[key] = calls.get(key, 0) + 1
+
+
+class SessionTracker:
+    """키(프로젝트 로그 등)별 열린 세션 상태"""
+
+    def __init__(self):
+        self.open: dict[Hashable, dict] = {}
+
+    def observe(self, key: Hashable, tool: str, ts: datetime, counters: dict,
+                session_id: Optional[str] = None, prefix: str = "") -> str:
+        """호출 하나 반영. 세션 ID 반환
+        session_id: 기록된 ID로 재생할 때 (주어지면 idle 간격 대신 ID로 세션 구분)
+        """
+        state = self.open.get(key)
+        if state is not None:
+            if session_id is not None:
+                ended = session_id != state["id"]
+            else:
+                ended = (ts - state["last"]).total_seconds() > config.session_idle_s()
+            if ended:
+                close_session(state, counters)
+                state = None
+        if state is None:
+            state = self.open[key] = {
+                "id": session_id or f"{prefix}{next(_sequence)}",
+                "start": ts, "last": ts, "prev": None, "can_code": 0, "plan_at": None, "progressed": False,
+            }
+
+        if state["prev"] is not None:
+            row = counters.setdefault("transitions", {}).setdefault(state["prev"], {})
+            row[tool] = row.get(tool, 0) + 1
+        if tool == "can_code":
+            state["can_code"] += 1
+        elif tool == "init_planning" and state["plan_at"] is None:
+            state["plan_at"] = ts
+        elif tool == "update_progress" and state["plan_at"] is not None and not state["progressed"]:
+            state["progressed"] = True
+            gap = counters.setdefault("plan_to_progress", {})
+            _add_seconds(gap, "count", "total_s", "lat", (ts - state["plan_at"]).total_seconds())
+        state["prev"] = tool
+        state["last"] = max(state["last"], ts)
+        return state["id"]
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        return self.open.get(key)
+
+
+def replay(events: Iterable[dict]) -> dict:
+    """기록된 이벤트로 카운터 재생성 (rollup 재생성 / 전체 교체 때만)"""
+    counters: dict = {}
+    tracker = SessionTracker()
+    for event in events:
+        try:
+            ts = datetime.fromisoformat(event["ts"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        session_id = event.get("session")
+        tracker.observe(session_id or "", event.get("tool", "unknown"), ts, counters, session_id=session_id)
+    for state in tracker.open.values():
+        close_session(state, counters)
+    return counters
+
+
+def _median_calls(distribution: dict[str, int], minimum: int) -> Optional[float]:
+    """{호출 수: 세션 수}에서 minimum회 이상 세션의 중앙값"""
+    items = sorted((int(calls), sessions) for calls, sessions in distribution.items() if int(calls) >= minimum)
+    total = sum(sessions for _, sessions in items)
+    if not total:
+        return None
+    seen = 0
+    for calls, sessions in items:
+        seen += sessions
+        if seen >= total / 2:
+            return calls
+    return items[-1][0]
+
+
+def summarize(counters: dict, open_states: Iterable[dict] = ()) -> dict:
+    """세션 통계 (열린 세션은 지금 끝난 것으로 보고 포함)"""
+    counters = copy.deepcopy(counters)
+    for state in open_states:
+        close_session(state, counters)
+
+    count = counters.get("count", 0)
+    duration_lat = counters.get("duration_lat", empty_histogram())
+    calls = counters.get("can_code_calls", {})
+    plan = counters.get("plan_to_progress", {})
+    transitions = [
+        (before, after, n)
+        for before, row in counters.get("transitions", {}).items()
+        for after, n in row.items()
+    ]
+    transitions.sort(key=lambda t: t[2], reverse=True)
+    return {
+        "sessions": count,
+        "avg_duration_s": round(counters.get("duration_s", 0) / count, 1) if count else None,
+        "median_duration_s": percentile(duration_lat, 0.5),
+        "p95_duration_s": percentile(duration_lat, 0.95),
+        "coding_sessions": sum(n for c, n in calls.items() if int(c) > 0),
+        "median_can_code_per_coding_session": _median_calls(calls, 1),
+        "plan_to_progress": {
+            "count": plan.get("count", 0),
+            "median_s": percentile(plan.get("lat", empty_histogram()), 0.5),
+            "avg_s": round(plan["total_s"] / plan["count"], 1) if plan.get("count") else None,
+        },
+        "top_transitions": transitions[:5],
+    }
@@ -6,6 +6,7 @@ from .core import (
     can_code,
     scan_docs,
     analyze_docs,
+    get_prd_section,
     init_docs,
     REQUIRED_DOCS,
 )
@@ -57,7 +58,7 @@ from .hooks import (
 
 __all__ = [
     # core
-    "can_code", "scan_docs", "analyze_docs", "init_docs", "REQUIRED_DOCS",
+    "can_code", "scan_docs", "analyze_docs", "get_prd_section", "init_docs", "REQUIRED_DOCS",
     # docs
     "get_prd_template", "write_prd_section", "get_prd_guide", "get_verify_checklist", "get_setup_guide",
     # setup
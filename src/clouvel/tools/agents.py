@@ -5,12 +5,14 @@ from pathlib import Path
 from datetime import datetime
 from mcp.types import TextContent
 
+from .. import fileio
+
 
 async def spawn_explore(path: str, query: str, scope: str, save_findings: bool) -> list[TextContent]:
     """탐색 전문 에이전트"""
     project_path = Path(path)
 
-    if not project_path.exists():
+    if not fileio.exists(project_path):
         return [TextContent(type="text", text=f"❌ 경로가 존재하지 않습니다: {path}")]
 
     # 스코프별 탐색 전략
@@ -82,7 +84,7 @@ async def spawn_explore(path: str, query: str, scope: str, save_findings: bool)
         planning_dir = project_path / ".claude" / "planning"
         findings_file = planning_dir / "findings.md"
 
-        if findings_file.exists():
+        if fileio.exists(findings_file):
             timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
             finding_entry = f"""
 ---
@@ -94,8 +96,8 @@ async def spawn_explore(path: str, query: str, scope: str, save_findings: bool)
 - **결과**: *(탐색 후 업데이트)*
 
 """
-            existing = findings_file.read_text(encoding='utf-8')
-            findings_file.write_text(existing + finding_entry, encoding='utf-8')
+            existing = fileio.read_text(findings_file)
+            fileio.write_text(findings_file, existing + finding_entry)
 
     return [TextContent(type="text", text=explore_prompt)]
 
@@ -104,7 +106,7 @@ async def spawn_librarian(path: str, topic: str, research_type: str, depth: str)
     """라이브러리언 에이전트"""
     project_path = Path(path)
 
-    if not project_path.exists():
+    if not fileio.exists(project_path):
         return [TextContent(type="text", text=f"❌ 경로가 존재하지 않습니다: {path}")]
 
     # 조사 타입별 전략
@@ -226,7 +228,7 @@ async def spawn_librarian(path: str, topic: str, research_type: str, depth: str)
     planning_dir = project_path / ".claude" / "planning"
     findings_file = planning_dir / "findings.md"
 
-    if findings_file.exists():
+    if fileio.exists(findings_file):
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
         finding_entry = f"""
 ---
@@ -239,7 +241,7 @@ async def spawn_librarian(path: str, topic: str, research_type: str, depth: str)
 - **결과**: *(조사 후 업데이트)*
 
 """
-        existing = findings_file.read_text(encoding='utf-8')
-        findings_file.write_text(existing + finding_entry, encoding='utf-8')
+        existing = fileio.read_text(findings_file)
+        fileio.write_text(findings_file, existing + finding_entry)
 
     return [TextContent(type="text", text=librarian_prompt)]
@@ -1,11 +1,28 @@
 # -*- coding: utf-8 -*-
-"""Core tools: can_code, scan_docs, analyze_docs, init_docs"""
+"""Core tools: can_code, scan_docs, analyze_docs, get_prd_section, init_docs"""
 
+import os
 import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 from datetime import datetime
+from typing import Callable
 from mcp.types import TextContent
 
+from .. import cancel, config, fileio, metrics, scheduler, watcher
+from . import disk_cache
+from .fingerprint import cache_key, clear_trees, digest_stats, project_tree
+from ..classifier import DocClassifier
+from .output import OUTPUT_MARKDOWN, error, output_mode, render, join
+from .prd import (
+    read_heading_index, read_section_tree, read_section_text,
+    compile_section_rules, find_sections, find_section, clear_heading_cache,
+)
+from .scan import ProjectWalker, ScanBudget, ScanResult, truncation_note
+
 # 필수 문서 정의
 REQUIRED_DOCS = [
     {"type": "prd", "name": "PRD", "patterns": [r"prd", r"product.?requirement"], "priority": "critical"},
@@ -15,6 +32,8 @@ REQUIRED_DOCS = [
     {"type": "verification", "name": "검증 계획", "patterns": [r"verif", r"test.?plan"], "priority": "warn"},
 ]
 
+_DOC_CLASSIFIER = DocClassifier(REQUIRED_DOCS)
+
 # PRD 필수 섹션 (B4: acceptance 없으면 BLOCK)
 REQUIRED_PRD_SECTIONS = [
     {"name": "acceptance", "patterns": [r"##\s*(acceptance|완료\s*기준|수락\s*조건|done\s*when)"], "priority": "critical"},
@@ -22,23 +41,32 @@ REQUIRED_PRD_SECTIONS = [
     {"name": "non_goals", "patterns": [r"##\s*(non.?goals?|하지\s*않을|제외|out\s*of\s*scope)"], "priority": "warn"},
 ]
 
+_PRD_SECTION_RULES = compile_section_rules(REQUIRED_PRD_SECTIONS)
 
-def _find_prd_file(docs_path: Path) -> Path | None:
-    """PRD 파일 찾기"""
-    for f in docs_path.iterdir():
-        if f.is_file():
-            name_lower = f.name.lower()
-            if "prd" in name_lower or "product" in name_lower and "requirement" in name_lower:
-                return f
+
+def _find_prd_file(docs_path: Path, file_names: list[str] | None = None) -> Path | None:
+    """PRD 파일 찾기 (file_names가 있으면 디렉토리를 다시 읽지 않음)"""
+    if file_names is None:
+        file_names = [f.name for f in docs_path.iterdir() if f.is_file()]
+    for name in file_names:
+        name_lower = name.lower()
+        if "prd" in name_lower or "product" in name_lower and "requirement" in name_lower:
+            return docs_path / name
     return None
 
 
-def _check_prd_sections(prd_path: Path) -> tuple[list[str], list[str], list[str]]:
-    """PRD 파일 내용에서 필수 섹션 확인
+def _prd_key(prd_path: Path) -> str:
+    """PRD 색인 캐시 키 - docs 폴더 fingerprint (같으면 PRD를 다시 읽고 해시하지 않음)"""
+    return cache_key(prd_path.parent, max_depth=0)
+
+
+def _check_prd_sections(prd_path: Path, key: str | None = None) -> tuple[list[str], list[str], list[str]]:
+    """PRD 제목 색인에서 필수 섹션 확인 (본문 크기와 무관)
+    key: PRD 색인 캐시 키 (_prd_key)
     Returns: (found_critical, missing_critical, missing_warn)
     """
     try:
-        content = prd_path.read_text(encoding='utf-8')
+        found = find_sections(read_heading_index(prd_path, key=key), _PRD_SECTION_RULES)
     except Exception:
         return [], ["acceptance"], []
 
@@ -47,13 +75,7 @@ def _check_prd_sections(prd_path: Path) -> tuple[list[str], list[str], list[str]
     missing_warn = []
 
     for section in REQUIRED_PRD_SECTIONS:
-        found = False
-        for pattern in section["patterns"]:
-            if re.search(pattern, content, re.IGNORECASE | re.MULTILINE):
-                found = True
-                break
-
-        if found:
+        if section["name"] in found:
             if section["priority"] == "critical":
                 found_critical.append(section["name"])
         else:
@@ -65,106 +87,625 @@ def _check_prd_sections(prd_path: Path) -> tuple[list[str], list[str], list[str]
     return found_critical, missing_critical, missing_warn
 
 
-def _check_tests(project_path: Path) -> tuple[int, list[str]]:
-    """테스트 파일 확인
-    Returns: (test_count, test_files)
-    """
-    test_patterns = [r"test_.*\.py$", r".*_test\.py$", r".*\.test\.(ts|js)$", r".*\.spec\.(ts|js)$"]
-    test_files = []
-
-    # 프로젝트 루트와 하위 폴더에서 테스트 파일 검색
-    search_paths = [project_path]
-    for subdir in ["tests", "test", "src", "__tests__"]:
-        subpath = project_path / subdir
-        if subpath.exists():
-            search_paths.append(subpath)
-
-    for search_path in search_paths:
-        if not search_path.exists():
-            continue
-        try:
-            for f in search_path.rglob("*"):
-                try:
-                    if f.is_file():
-                        for pattern in test_patterns:
-                            if re.match(pattern, f.name, re.IGNORECASE):
-                                test_files.append(str(f.relative_to(project_path)))
-                                break
-                except (OSError, PermissionError):
-                    # 심볼릭 링크 깨짐, 접근 권한 없음 등 무시
-                    continue
-        except (OSError, PermissionError):
-            continue
+# mtime 해상도 안에서 생긴 변경을 놓치지 않도록, 스냅샷 생성 직전에
+# 바뀐 항목이 있으면 그 스냅샷은 재사용하지 않음 (git의 racy-clean 처리와 같은 방식)
+_RACY_WINDOW_NS = 2_000_000_000
+_SNAPSHOT_CACHE_SIZE = 64
 
-    return len(test_files), test_files[:5]  # 최대 5개만 반환
+# 예산 초과로 멈춘 탐색을 이어서 끝내는 백그라운드 작업 (다음 호출용 캐시 채우기)
+# 스케줄러 background 레인에서 실행 → 도구 호출 스레드를 차지하지 않음
+_warming: set[str] = set()
+_warming_lock = threading.Lock()
 
 
-async def can_code(path: str) -> list[TextContent]:
-    """코딩 가능 여부 확인 - 핵심 기능 (B4: 품질 게이트 확장)"""
-    docs_path = Path(path)
-    project_path = docs_path.parent if docs_path.name == "docs" else docs_path
+def _warm_in_background(key: str, fn: Callable[[], None]) -> None:
+    """같은 키의 백그라운드 작업은 하나만"""
+    with _warming_lock:
+        if key in _warming:
+            return
+        _warming.add(key)
 
-    if not docs_path.exists():
-        return [TextContent(type="text", text=f"""
-# ⛔ BLOCK: 코딩 금지
+    def run() -> None:
+        try:
+            fn()
+        except Exception:
+            pass
+        finally:
+            with _warming_lock:
+                _warming.discard(key)
 
-## 이유
-docs 폴더가 없습니다: `{path}`
+    try:
+        scheduler.submit_background(run)
+    except RuntimeError:  # 종료 중
+        with _warming_lock:
+            _warming.discard(key)
+
+
+def _is_warming(key: str) -> bool:
+    with _warming_lock:
+        return key in _warming
+
+
+def _stat_key(path: Path) -> tuple[int, int] | None:
+    """(mtime_ns, size) - 없으면 None"""
+    st = fileio.stat(path)
+    if st is None:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+# ============================================================
+# docs 폴더 목록 캐시 (can_code, scan_docs, analyze_docs)
+# ============================================================
+
+@dataclass
+class DocsListing:
+    """docs 폴더의 파일 이름 목록 (폴더 mtime이 그대로면 재사용)"""
+    docs_path: Path
+    mtime_ns: int
+    file_names: list[str]
+    truncated: bool = False
+    entries: int = 0
+    elapsed_ms: float = 0.0
+    built_ns: int = 0
+
+    def is_fresh(self) -> bool:
+        key = _stat_key(self.docs_path)
+        return (
+            not self.truncated
+            and key is not None
+            and key[0] == self.mtime_ns
+            and key[0] < self.built_ns - _RACY_WINDOW_NS
+        )
+
+
+_listings: OrderedDict[str, DocsListing] = OrderedDict()
+_listings_lock = threading.Lock()
+
+
+def _read_listing(docs_path: Path, budget: ScanBudget | None) -> DocsListing:
+    """os.scandir로 파일 이름 수집 (예산 초과 시 부분 목록)"""
+    started = time.monotonic()
+    built_ns = time.time_ns()
+    metrics.touch(os.fspath(docs_path))
+    mtime_ns = docs_path.stat().st_mtime_ns
+    file_names = []
+    entries = 0
+    truncated = False
+
+    with os.scandir(docs_path) as it:
+        for entry in it:
+            entries += 1
+            if entries % 256 == 0:
+                cancel.checkpoint()
+            if budget is not None:
+                budget.charge(1)
+                if budget.exhausted:
+                    truncated = True
+                    break
+            try:
+                if entry.is_file():
+                    file_names.append(entry.name)
+            except OSError:
+                continue
+
+    elapsed_ms = (time.monotonic() - started) * 1000
+    metrics.record_scan("docs", elapsed_ms)
+    return DocsListing(
+        docs_path=docs_path,
+        mtime_ns=mtime_ns,
+        file_names=sorted(file_names),
+        truncated=truncated,
+        entries=entries,
+        elapsed_ms=elapsed_ms,
+        built_ns=built_ns,
+    )
+
+
+def _store_listing(key: str, listing: DocsListing) -> None:
+    with _listings_lock:
+        _listings[key] = listing
+        _listings.move_to_end(key)
+        while len(_listings) > _SNAPSHOT_CACHE_SIZE:
+            _listings.popitem(last=False)
+
+
+def list_docs(docs_path: Path, budget: ScanBudget | None = None) -> DocsListing:
+    """docs 폴더 파일 목록 (캐시 → 없으면 예산 안에서 읽고, 잘렸으면 백그라운드로 마저 읽음)"""
+    docs_path = docs_path.absolute()
+    key = str(docs_path)
+
+    with _listings_lock:
+        listing = _listings.get(key)
+    if listing is not None and listing.is_fresh():
+        return listing
+
+    listing = _read_listing(docs_path, budget)
+    if listing.truncated:
+        _warm_in_background(f"listing:{key}", lambda: _store_listing(key, _read_listing(docs_path, None)))
+    else:
+        _store_listing(key, listing)
+    return listing
 
-## 지금 해야 할 것
-1. `docs` 폴더를 생성하세요
-2. PRD(제품 요구사항 문서)를 먼저 작성하세요
-3. `get_prd_template` 도구로 템플릿을 생성할 수 있습니다
 
-## 왜?
-PRD 없이 코딩하면:
-- 요구사항 불명확 → 재작업
-- 예외 케이스 누락 → 버그
-- 팀원 간 인식 차이 → 충돌
+# ============================================================
+# DocsSnapshot 캐시 (can_code)
+# ============================================================
 
-**문서 먼저, 코딩은 나중에.**
-
-사용자에게 PRD 작성을 도와주겠다고 말하세요.
-""")]
+@dataclass
+class DocsSnapshot:
+    """can_code 판정에 필요한 docs/PRD/테스트 상태
+    PRD mtime/size가 그대로이고 프로젝트 fingerprint 기준으로 docs 폴더 / 테스트 탐색 경로가
+    바뀌지 않았으면 재사용
+    """
+    docs_path: Path
+    project_path: Path
+    docs_mtime_ns: int
+    detected_critical: list[str]
+    detected_warn: list[str]
+    missing_critical: list[str]
+    missing_warn: list[str]
+    prd_file: Path | None
+    prd_stat: tuple[int, int] | None
+    prd_sections_found: list[str]
+    prd_sections_missing_critical: list[str]
+    prd_sections_missing_warn: list[str]
+    test_count: int
+    test_files: list[str]
+    test_dirs: dict[str, int] = field(default_factory=dict)
+    built_ns: int = 0
+    doc_files: list[str] = field(default_factory=list)
+    # 예산 초과로 일부만 검사한 경우 (백그라운드에서 마저 검사 중)
+    truncated: bool = False
+    docs_truncated: bool = False
+    scanned_entries: int = 0
+    scan_ms: float = 0.0
+    # 마지막으로 확인했을 때의 프로젝트 fingerprint (아직 확인 전이면 None)
+    tree_digest: str | None = None
+
+    @property
+    def truncation_note(self) -> str | None:
+        return truncation_note(self.scanned_entries, self.scan_ms) if self.truncated else None
+
+    def dependencies(self) -> dict[str, int]:
+        """판정이 의존하는 디렉토리 / .gitignore → mtime_ns"""
+        return {str(self.docs_path): self.docs_mtime_ns, **self.test_dirs}
+
+    def is_fresh(self) -> bool:
+        """스냅샷 이후 관련 파일/디렉토리가 바뀌지 않았는지
+        프로젝트 fingerprint 트리가 있으면 지난 확인 이후 바뀐 디렉토리만 봄 (inotify 감시 중이면 stat도 거의 없음)
+        트리가 아직 없으면 백그라운드에서 만들고 이번에는 기록한 경로를 stat
+        """
+        racy_after = self.built_ns - _RACY_WINDOW_NS
+        if self.prd_file is not None:
+            prd_key = _stat_key(self.prd_file)
+            if prd_key is None or prd_key != self.prd_stat or prd_key[0] >= racy_after:
+                return False
+        tree = project_tree(self.project_path)
+        if not tree.digest:
+            _warm_in_background(f"tree:{tree.root}", tree.refresh)
+            return self._stat_fresh(racy_after)
+        digest = tree.refresh()
+        if digest != self.tree_digest:
+            if tree.deps_changed(self.tree_digest, self.dependencies(), racy_after):
+                return False
+            self.tree_digest = digest
+        return True
+
+    def _stat_fresh(self, racy_after: int) -> bool:
+        docs_key = _stat_key(self.docs_path)
+        if docs_key is None or docs_key[0] != self.docs_mtime_ns or docs_key[0] >= racy_after:
+            return False
+        for scanned_path, mtime_ns in self.test_dirs.items():
+            try:
+                current = os.stat(scanned_path).st_mtime_ns
+            except OSError:
+                return False
+            if current != mtime_ns or current >= racy_after:
+                return False
+        return True
+
+
+_snapshots: OrderedDict[str, DocsSnapshot] = OrderedDict()
+_snapshots_lock = threading.Lock()
+
+
+def _test_fields(scan: ScanResult) -> dict:
+    """탐색 결과 → 스냅샷 필드 (백그라운드 탐색과 공유하지 않도록 복사)"""
+    return {
+        "test_count": len(scan.files),
+        "test_files": scan.files[:5],  # 최대 5개만 보관
+        "test_dirs": dict(scan.mtimes),
+    }
 
-    files = [f for f in docs_path.iterdir() if f.is_file()]
-    file_names = [f.name.lower() for f in files]
 
+def _classify_docs(file_names: list[str]) -> tuple[list[str], list[str], list[str], list[str]]:
+    """docs 파일 이름 → (detected_critical, detected_warn, missing_critical, missing_warn)"""
     detected_critical = []
     detected_warn = []
     missing_critical = []
     missing_warn = []
 
+    found_types = _DOC_CLASSIFIER.detect(file_names)
     for req in REQUIRED_DOCS:
-        found = False
-        for filename in file_names:
-            for pattern in req["patterns"]:
-                if re.search(pattern, filename, re.IGNORECASE):
-                    if req["priority"] == "critical":
-                        detected_critical.append(req["name"])
-                    else:
-                        detected_warn.append(req["name"])
-                    found = True
-                    break
-            if found:
-                break
-        if not found:
+        if req["type"] in found_types:
+            if req["priority"] == "critical":
+                detected_critical.append(req["name"])
+            else:
+                detected_warn.append(req["name"])
+        else:
             if req["priority"] == "critical":
                 missing_critical.append(req["name"])
             else:
                 missing_warn.append(req["name"])
 
+    return detected_critical, detected_warn, missing_critical, missing_warn
+
+
+def _build_snapshot(docs_path: Path, project_path: Path, budget: ScanBudget | None = None) -> tuple[DocsSnapshot, ProjectWalker]:
+    """docs 폴더/PRD/테스트를 실제로 검사해서 스냅샷 생성
+    Returns: (스냅샷, 테스트 워커) - 예산 초과 시 워커로 이어서 탐색 가능
+    """
+    built_ns = time.time_ns()
+    listing = list_docs(docs_path, budget)
+
+    detected_critical, detected_warn, missing_critical, missing_warn = _classify_docs(listing.file_names)
+
     # B4: PRD 내용 검사 (acceptance 섹션 필수)
-    prd_file = _find_prd_file(docs_path)
+    prd_file = _find_prd_file(docs_path, listing.file_names)
+    prd_stat = None
     prd_sections_found = []
     prd_sections_missing_critical = []
     prd_sections_missing_warn = []
 
     if prd_file:
-        prd_sections_found, prd_sections_missing_critical, prd_sections_missing_warn = _check_prd_sections(prd_file)
+        prd_stat = _stat_key(prd_file)
+        prd_sections_found, prd_sections_missing_critical, prd_sections_missing_warn = _check_prd_sections(
+            prd_file, key=_prd_key(prd_file))
 
     # B4: 테스트 파일 확인
-    test_count, test_files = _check_tests(project_path)
+    walker = ProjectWalker(project_path)
+    scan = walker.run(budget)
+
+    snapshot = DocsSnapshot(
+        docs_path=docs_path,
+        project_path=project_path,
+        docs_mtime_ns=listing.mtime_ns,
+        detected_critical=detected_critical,
+        detected_warn=detected_warn,
+        missing_critical=missing_critical,
+        missing_warn=missing_warn,
+        prd_file=prd_file,
+        prd_stat=prd_stat,
+        prd_sections_found=prd_sections_found,
+        prd_sections_missing_critical=prd_sections_missing_critical,
+        prd_sections_missing_warn=prd_sections_missing_warn,
+        built_ns=built_ns,
+        doc_files=listing.file_names,
+        truncated=listing.truncated or scan.truncated,
+        docs_truncated=listing.truncated,
+        scanned_entries=listing.entries + scan.entries,
+        scan_ms=listing.elapsed_ms + scan.elapsed_ms,
+        **_test_fields(scan),
+    )
+    return snapshot, walker
+
+
+def _fingerprint(snapshot: DocsSnapshot) -> str:
+    """스냅샷이 의존하는 경로들의 stat → 해시 (디스크 캐시 키)"""
+    return digest_stats([
+        str(snapshot.docs_path), snapshot.docs_mtime_ns,
+        str(snapshot.prd_file) if snapshot.prd_file else None, snapshot.prd_stat,
+        sorted(snapshot.test_dirs.items()),
+    ])
+
+
+def _snapshot_record(snapshot: DocsSnapshot) -> dict:
+    """완성된 스냅샷 → 디스크 캐시 항목"""
+    return {
+        "fingerprint": _fingerprint(snapshot),
+        "snapshot": {
+            "docs_mtime_ns": snapshot.docs_mtime_ns,
+            "doc_files": snapshot.doc_files,
+            "detected_critical": snapshot.detected_critical,
+            "detected_warn": snapshot.detected_warn,
+            "missing_critical": snapshot.missing_critical,
+            "missing_warn": snapshot.missing_warn,
+            "prd_file": str(snapshot.prd_file) if snapshot.prd_file else None,
+            "prd_stat": list(snapshot.prd_stat) if snapshot.prd_stat else None,
+            "prd_sections_found": snapshot.prd_sections_found,
+            "prd_sections_missing_critical": snapshot.prd_sections_missing_critical,
+            "prd_sections_missing_warn": snapshot.prd_sections_missing_warn,
+            "test_count": snapshot.test_count,
+            "test_files": snapshot.test_files,
+            "test_dirs": snapshot.test_dirs,
+            "built_ns": snapshot.built_ns,
+        },
+    }
+
+
+def _snapshot_from_record(docs_path: Path, record: dict) -> DocsSnapshot | None:
+    """디스크 캐시 항목 → 스냅샷 (형식이 안 맞거나 fingerprint가 다르면 None)"""
+    try:
+        data = record["snapshot"]
+        snapshot = DocsSnapshot(
+            docs_path=docs_path,
+            project_path=_project_path(docs_path),
+            docs_mtime_ns=int(data["docs_mtime_ns"]),
+            detected_critical=list(data["detected_critical"]),
+            detected_warn=list(data["detected_warn"]),
+            missing_critical=list(data["missing_critical"]),
+            missing_warn=list(data["missing_warn"]),
+            prd_file=Path(data["prd_file"]) if data["prd_file"] else None,
+            prd_stat=tuple(data["prd_stat"]) if data["prd_stat"] else None,
+            prd_sections_found=list(data["prd_sections_found"]),
+            prd_sections_missing_critical=list(data["prd_sections_missing_critical"]),
+            prd_sections_missing_warn=list(data["prd_sections_missing_warn"]),
+            test_count=int(data["test_count"]),
+            test_files=list(data["test_files"]),
+            test_dirs={str(k): int(v) for k, v in data["test_dirs"].items()},
+            built_ns=int(data["built_ns"]),
+            doc_files=list(data["doc_files"]),
+        )
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+    return snapshot if _fingerprint(snapshot) == record.get("fingerprint") else None
+
+
+def _persist_snapshot(snapshot: DocsSnapshot) -> None:
+    """완성된 스냅샷을 .clouvel/cache에 저장 (백그라운드)
+    방금 바뀐 경로가 있으면 다음 프로세스에서 어차피 못 쓰므로 저장 안 함
+    """
+    if snapshot.truncated or not config.disk_cache_enabled():
+        return
+    racy_after = snapshot.built_ns - _RACY_WINDOW_NS
+    mtimes = [snapshot.docs_mtime_ns, *snapshot.test_dirs.values()]
+    if snapshot.prd_stat:
+        mtimes.append(snapshot.prd_stat[0])
+    if max(mtimes) >= racy_after:
+        return
+    key = str(snapshot.docs_path)
+    record = _snapshot_record(snapshot)
+    _warm_in_background(f"persist:{key}", lambda: disk_cache.put_entry(snapshot.project_path, key, record))
+
+
+def _load_persisted(key: str, docs_path: Path) -> DocsSnapshot | None:
+    """이전 프로세스가 저장한 스냅샷 (stat 검사를 통과할 때만)"""
+    record = disk_cache.get_entry(_project_path(docs_path), key)
+    if record is None:
+        return None
+    snapshot = _snapshot_from_record(docs_path, record)
+    if snapshot is None or not snapshot.is_fresh():
+        return None
+    # scan_docs / analyze_docs도 같은 목록 재사용
+    _store_listing(key, DocsListing(
+        docs_path=docs_path,
+        mtime_ns=snapshot.docs_mtime_ns,
+        file_names=snapshot.doc_files,
+        built_ns=snapshot.built_ns,
+    ))
+    return snapshot
+
+
+def _store_snapshot(key: str, snapshot: DocsSnapshot) -> None:
+    evicted = []
+    with _snapshots_lock:
+        _snapshots[key] = snapshot
+        _snapshots.move_to_end(key)
+        while len(_snapshots) > _SNAPSHOT_CACHE_SIZE:
+            evicted.append(_snapshots.popitem(last=False)[0])
+    active = watcher.get_watcher()
+    if active is not None:
+        for old_key in evicted:
+            active.unwatch(old_key)
+    _persist_snapshot(snapshot)
+
+
+def _project_path(docs_path: Path) -> Path:
+    return docs_path.parent if docs_path.name == "docs" else docs_path
+
+
+def _watch_snapshot(key: str, snapshot: DocsSnapshot) -> None:
+    """watcher가 켜져 있으면 완성된 스냅샷의 docs/PRD/테스트 경로 감시"""
+    active = watcher.get_watcher()
+    if active is None or snapshot.truncated:
+        return
+    dirs = {str(snapshot.docs_path): snapshot.docs_mtime_ns}
+    files = {}
+    if snapshot.prd_file is not None:
+        files[str(snapshot.prd_file)] = snapshot.prd_stat[0] if snapshot.prd_stat else None
+    for scanned_path, mtime_ns in snapshot.test_dirs.items():
+        # test_dirs에는 디렉토리와 읽은 .gitignore 파일이 섞여 있음
+        if os.path.basename(scanned_path) == ".gitignore":
+            files[scanned_path] = mtime_ns
+        else:
+            dirs[scanned_path] = mtime_ns
+    if not active.watch(key, dirs, files, _on_watch_change):
+        _invalidate(key)
+
+
+def _invalidate(key: str) -> None:
+    """key의 스냅샷/docs 목록만 버림"""
+    with _snapshots_lock:
+        _snapshots.pop(key, None)
+    with _listings_lock:
+        _listings.pop(key, None)
+
+
+def _on_watch_change(key: str) -> None:
+    """watcher 스레드에서 호출: 해당 프로젝트 캐시만 무효화 후 백그라운드에서 다시 계산"""
+    _invalidate(key)
+    docs_path = Path(key)
+    if not fileio.is_dir(docs_path):
+        return
+
+    def rebuild() -> None:
+        snapshot, _ = _build_snapshot(docs_path, _project_path(docs_path))
+        _store_snapshot(key, snapshot)
+        _watch_snapshot(key, snapshot)
+
+    _warm_in_background(f"snapshot:{key}", rebuild)
+
+
+def _complete_snapshot(key: str, snapshot: DocsSnapshot, walker: ProjectWalker) -> None:
+    """잘린 스냅샷을 백그라운드에서 끝까지 검사해서 캐시에 넣음"""
+    if snapshot.docs_truncated:
+        # docs 목록이 잘린 경우 → 처음부터 다시
+        complete, _ = _build_snapshot(snapshot.docs_path, snapshot.project_path)
+    else:
+        scan = walker.run()
+        complete = replace(snapshot, truncated=False, scanned_entries=scan.entries, scan_ms=scan.elapsed_ms, **_test_fields(scan))
+    _store_snapshot(key, complete)
+    _watch_snapshot(key, complete)
+
+
+def get_docs_snapshot(docs_path: Path, budget: ScanBudget | None = None) -> DocsSnapshot:
+    """캐시된 스냅샷 반환 (바뀌었으면 다시 생성)
+    감시 중이어도 stat 검사는 함 - watcher 알림은 늦게 올 수 있으므로 무효화 / 미리 계산에만 씀
+    예산 안에 못 끝내면 부분 스냅샷을 반환하고 나머지는 백그라운드에서 검사
+    """
+    docs_path = docs_path.absolute()
+    key = str(docs_path)
+
+    with _snapshots_lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is not None:
+            _snapshots.move_to_end(key)
+
+    if snapshot is not None:
+        # 부분 스냅샷은 백그라운드 검사가 끝날 때까지만 재사용
+        if snapshot.truncated and _is_warming(f"snapshot:{key}"):
+            return snapshot
+        if not snapshot.truncated and snapshot.is_fresh():
+            active = watcher.get_watcher()
+            if active is None or not active.is_watched(key):
+                _watch_snapshot(key, snapshot)
+                _persist_snapshot(snapshot)
+            return snapshot
+    else:
+        # 새 프로세스의 첫 호출 → 이전 세션이 저장한 판정
+        snapshot = _load_persisted(key, docs_path)
+        if snapshot is not None:
+            with _snapshots_lock:
+                _snapshots[key] = snapshot
+            _watch_snapshot(key, snapshot)
+            return snapshot
+
+    snapshot, walker = _build_snapshot(docs_path, _project_path(docs_path), budget)
+    _store_snapshot(key, snapshot)
+    if snapshot.truncated:
+        _warm_in_background(f"snapshot:{key}", lambda: _complete_snapshot(key, snapshot, walker))
+    else:
+        _watch_snapshot(key, snapshot)
+    return snapshot
+
+
+def clear_snapshot_cache() -> None:
+    """스냅샷/docs 목록/PRD 색인/fingerprint 트리 비우기 (디스크 캐시 파일은 그대로, 다음 조회 때 다시 읽음)"""
+    with _snapshots_lock:
+        _snapshots.clear()
+    with _listings_lock:
+        _listings.clear()
+    clear_heading_cache()
+    clear_trees()
+    disk_cache.clear()
+
+
+def _truncation_footer(note: str | None) -> str:
+    """부분 결과 안내 (예산 초과 시에만)"""
+    if not note:
+        return ""
+    return f"\n> ⏱️ {note} - 나머지는 백그라운드에서 검사 중, 다시 호출하면 전체 결과\n"
+
+
+def _verdict(status: str, missing_critical: list[str], warn: list[str], detected: list[str],
+             tests: int | None, snapshot: DocsSnapshot | None = None) -> dict:
+    """can_code 판정 객체 (json/compact 출력용)"""
+    return {
+        "tool": "can_code",
+        "status": status,
+        "ok": status != "BLOCK",
+        "missing_critical": missing_critical,
+        "warn": warn,
+        "detected": detected,
+        "tests": tests,
+        "partial": bool(snapshot and snapshot.truncated),
+        "cache_age_s": round((time.time_ns() - snapshot.built_ns) / 1e9, 1) if snapshot else None,
+    }
+
+
+def _verdict_line(verdict: dict) -> str:
+    """can_code 한 줄 요약"""
+    parts = [verdict["status"]]
+    if verdict["missing_critical"]:
+        parts.append(f"없음: {join(verdict['missing_critical'])}")
+    if verdict["warn"]:
+        parts.append(f"권장 없음: {join(verdict['warn'])}")
+    if verdict["tests"] is not None:
+        parts.append(f"테스트 {verdict['tests']}" + ("+" if verdict["partial"] else ""))
+    if verdict["cache_age_s"] is not None:
+        parts.append(f"캐시 {verdict['cache_age_s']:.0f}s")
+    return " | ".join(parts)
+
+
+async def can_code(path: str, budget_ms: float | None = None, max_entries: int | None = None, workspace: bool = False,
+                   output: str = OUTPUT_MARKDOWN) -> list[TextContent]:
+    """코딩 가능 여부 확인 - 핵심 기능 (B4: 품질 게이트 확장)
+    budget_ms / max_entries: 파일 탐색 예산 (없으면 서버 설정값)
+    workspace: path를 모노레포 루트로 보고 패키지별로 판정
+    output: markdown / compact / json
+    """
+    mode = output_mode(output)
+    if workspace:
+        from .workspace import can_code_workspace
+        return await can_code_workspace(path, budget_ms, max_entries, mode)
+
+    docs_path = Path(path)
+
+    if not fileio.exists(docs_path):
+        if mode != OUTPUT_MARKDOWN:
+            verdict = _verdict("BLOCK", ["docs 폴더"], [], [], None)
+            return render(mode, verdict, _verdict_line(verdict))
+        return [TextContent(type="text", text=f"""
+# ⛔ BLOCK: 코딩 금지
+
+## 이유
+docs 폴더가 없습니다: `{path}`
+
+## 지금 해야 할 것
+1. `docs` 폴더를 생성하세요
+2. PRD(제품 요구사항 문서)를 먼저 작성하세요
+3. `get_prd_template` 도구로 템플릿을 생성할 수 있습니다
+
+## 왜?
+PRD 없이 코딩하면:
+- 요구사항 불명확 → 재작업
+- 예외 케이스 누락 → 버그
+- 팀원 간 인식 차이 → 충돌
+
+**문서 먼저, 코딩은 나중에.**
+
+사용자에게 PRD 작성을 도와주겠다고 말하세요.
+""")]
+
+    # docs/PRD/테스트가 그대로면 이전 검사 결과 재사용
+    snapshot = get_docs_snapshot(docs_path, ScanBudget.from_config(budget_ms, max_entries))
+    detected_critical = snapshot.detected_critical
+    detected_warn = snapshot.detected_warn
+    missing_critical = snapshot.missing_critical
+    missing_warn = snapshot.missing_warn
+    prd_sections_missing_critical = snapshot.prd_sections_missing_critical
+    prd_sections_missing_warn = snapshot.prd_sections_missing_warn
+    test_count = snapshot.test_count
+
+    if mode != OUTPUT_MARKDOWN:
+        blockers = missing_critical + [f"PRD.{s}" for s in prd_sections_missing_critical]
+        warn_items = missing_warn + [f"PRD.{s}" for s in prd_sections_missing_warn]
+        if test_count == 0:
+            warn_items.append("테스트")
+        status = "BLOCK" if blockers else ("WARN" if warn_items else "PASS")
+        verdict = _verdict(status, blockers, [] if blockers else warn_items, detected_critical + detected_warn, test_count, snapshot)
+        return render(mode, verdict, _verdict_line(verdict))
 
     # BLOCK 조건: PRD 없음 OR acceptance 섹션 없음
     if missing_critical or prd_sections_missing_critical:
@@ -195,7 +736,7 @@ PRD 없이 코딩하면:
 제가 PRD 작성을 도와드릴까요?"
 
 **절대 코드를 작성하지 마세요. 문서 작성을 도와주세요.**
-""")]
+{_truncation_footer(snapshot.truncation_note)}""")]
 
     # WARN 조건: 아키텍처 없음, 테스트 0개 등
     warn_count = len(missing_warn) + len(prd_sections_missing_warn) + (1 if test_count == 0 else 0)
@@ -208,6 +749,8 @@ PRD 없이 코딩하면:
     warn_summary = ", ".join(warn_items) if warn_items else "없음"
 
     test_info = f" | 테스트 {test_count}개" if test_count > 0 else ""
+    if snapshot.truncated:
+        test_info = f" | 테스트 {test_count}개+ | ⏱️ {snapshot.truncation_note}"
 
     if warn_count > 0:
         return [TextContent(type="text", text=f"✅ PASS | ⚠️ WARN {warn_count}개 | 필수: {found_docs} ✓{test_info} | 권장 없음: {warn_summary}")]
@@ -215,56 +758,73 @@ PRD 없이 코딩하면:
         return [TextContent(type="text", text=f"✅ PASS | 필수: {found_docs} ✓{test_info} | 코딩 시작 가능")]
 
 
-async def scan_docs(path: str) -> list[TextContent]:
+
+async def scan_docs(path: str, budget_ms: float | None = None, max_entries: int | None = None,
+                    output: str = OUTPUT_MARKDOWN) -> list[TextContent]:
     """docs 폴더 스캔"""
+    mode = output_mode(output)
     docs_path = Path(path)
 
-    if not docs_path.exists():
-        return [TextContent(type="text", text=f"경로 없음: {path}")]
+    if not fileio.exists(docs_path):
+        return error(mode, "scan_docs", "not_found", f"경로 없음: {path}", path=path)
+
+    if not fileio.is_dir(docs_path):
+        return error(mode, "scan_docs", "not_a_directory", f"디렉토리 아님: {path}", path=path)
+
+    listing = list_docs(docs_path, ScanBudget.from_config(budget_ms, max_entries))
 
-    if not docs_path.is_dir():
-        return [TextContent(type="text", text=f"디렉토리 아님: {path}")]
+    if mode != OUTPUT_MARKDOWN:
+        data = {"tool": "scan_docs", "count": len(listing.file_names), "files": listing.file_names, "partial": listing.truncated}
+        return render(mode, data, f"{len(listing.file_names)}개{'+' if listing.truncated else ''}: {join(listing.file_names)}")
 
     files = []
-    for f in sorted(docs_path.iterdir()):
-        if f.is_file():
-            stat = f.stat()
-            files.append(f"{f.name} ({stat.st_size:,} bytes)")
+    for name in listing.file_names:
+        try:
+            size = (docs_path / name).stat().st_size
+        except OSError:
+            continue
+        files.append(f"{name} ({size:,} bytes)")
 
     result = f"📁 {path}\n총 {len(files)}개 파일\n\n"
     result += "\n".join(files)
+    if listing.truncated:
+        result += "\n" + _truncation_footer(truncation_note(listing.entries, listing.elapsed_ms))
 
     return [TextContent(type="text", text=result)]
 
 
-async def analyze_docs(path: str) -> list[TextContent]:
-    """docs 폴더 분석"""
+async def analyze_docs(path: str, budget_ms: float | None = None, max_entries: int | None = None, workspace: bool = False,
+                       output: str = OUTPUT_MARKDOWN) -> list[TextContent]:
+    """docs 폴더 분석 (workspace: 모노레포 패키지별 분석)"""
+    mode = output_mode(output)
+    if workspace:
+        from .workspace import analyze_docs_workspace
+        return await analyze_docs_workspace(path, budget_ms, max_entries, mode)
+
     docs_path = Path(path)
 
-    if not docs_path.exists():
-        return [TextContent(type="text", text=f"경로 없음: {path}")]
+    if not fileio.exists(docs_path):
+        return error(mode, "analyze_docs", "not_found", f"경로 없음: {path}", path=path)
 
-    files = [f.name.lower() for f in docs_path.iterdir() if f.is_file()]
+    listing = list_docs(docs_path, ScanBudget.from_config(budget_ms, max_entries))
+    found_types = _DOC_CLASSIFIER.detect(listing.file_names)
     detected = []
     missing = []
 
     for req in REQUIRED_DOCS:
-        found = False
-        for filename in files:
-            for pattern in req["patterns"]:
-                if re.search(pattern, filename, re.IGNORECASE):
-                    detected.append(req["name"])
-                    found = True
-                    break
-            if found:
-                break
-        if not found:
+        if req["type"] in found_types:
+            detected.append(req["name"])
+        else:
             missing.append(req["name"])
 
     critical_total = len([r for r in REQUIRED_DOCS if r["priority"] == "critical"])
     critical_found = len([r for r in REQUIRED_DOCS if r["priority"] == "critical" and r["name"] in detected])
     coverage = critical_found / critical_total if critical_total > 0 else 1.0
 
+    if mode != OUTPUT_MARKDOWN:
+        data = {"tool": "analyze_docs", "coverage": round(coverage, 2), "detected": detected, "missing": missing, "partial": listing.truncated}
+        return render(mode, data, f"커버리지 {coverage:.0%} | 없음: {join(missing)}")
+
     result = f"## 분석 결과: {path}\n\n"
     result += f"커버리지: {coverage:.0%}\n\n"
 
@@ -279,11 +839,101 @@ async def analyze_docs(path: str) -> list[TextContent]:
     else:
         result += f"⛔ {len(missing)}개 문서 먼저 작성하고 코딩 시작할 것.\n"
 
+    if listing.truncated:
+        result += _truncation_footer(truncation_note(listing.entries, listing.elapsed_ms))
+
+    return [TextContent(type="text", text=result)]
+
+
+async def get_prd_section(path: str, section: str, items_only: bool = False, max_chars: int = 20000,
+                          output: str = OUTPUT_MARKDOWN) -> list[TextContent]:
+    """PRD에서 섹션 하나만 반환 (acceptance 등 섹션 규칙 이름 또는 제목)"""
+    mode = output_mode(output)
+    docs_path = Path(path)
+
+    if not fileio.exists(docs_path):
+        return error(mode, "get_prd_section", "not_found", f"경로 없음: {path}", path=path)
+
+    prd_file = _find_prd_file(docs_path, list_docs(docs_path).file_names)
+    if not prd_file:
+        return error(mode, "get_prd_section", "prd_not_found", f"PRD 없음: {path}", path=path)
+
+    try:
+        tree = read_section_tree(prd_file, key=_prd_key(prd_file))
+    except OSError as e:
+        return error(mode, "get_prd_section", "prd_unreadable", f"PRD 읽기 실패: {e}", path=str(prd_file))
+
+    index = find_section(tree, section, _PRD_SECTION_RULES)
+    if index is None:
+        available = "\n".join(
+            f"{'  ' * (s.heading.level - 1)}- {s.heading.title}" for s in tree.sections
+        ) or "없음"
+        return error(
+            mode, "get_prd_section", "section_not_found", f"'{section}' 섹션 없음 ({prd_file.name})",
+            markdown=f"'{section}' 섹션 없음 ({prd_file.name})\n\n### 섹션 목록\n{available}",
+            section=section, sections=[s.heading.title for s in tree.sections],
+        )
+
+    found = tree.sections[index]
+    items = tree.checkboxes(index)
+    done = len([item for item in items if item.checked])
+
+    if mode != OUTPUT_MARKDOWN and items_only:
+        data = {
+            "tool": "get_prd_section",
+            "section": found.heading.title,
+            "done": done,
+            "total": len(items),
+            "items": [{"checked": item.checked, "text": item.text} for item in items],
+        }
+        compact = f"{found.heading.title} {done}/{len(items)}: " + "; ".join(
+            f"[{'x' if item.checked else ' '}] {item.text}" for item in items
+        )
+        return render(mode, data, compact)
+
+    if items_only:
+        result = f"## {found.heading.title} 항목 ({done}/{len(items)} 완료)\n\n"
+        if items:
+            result += "\n".join(f"- [{'x' if item.checked else ' '}] {item.text}" for item in items) + "\n"
+        else:
+            result += "체크박스 항목 없음\n"
+        return [TextContent(type="text", text=result)]
+
+    # 섹션 범위만 읽음 (max_chars는 UTF-8 최대 4바이트 기준으로 넉넉히)
+    limit = max_chars * 4 if max_chars > 0 else None
+    text = read_section_text(prd_file, found, max_bytes=limit)
+    total = found.end - found.heading.offset
+    clipped = limit is not None and (len(text) > max_chars or total > limit)
+    if mode != OUTPUT_MARKDOWN:
+        data = {
+            "tool": "get_prd_section",
+            "section": found.heading.title,
+            "text": text[:max_chars] if clipped else text,
+            "clipped": clipped,
+            "done": done,
+            "total": len(items),
+        }
+        return render(mode, data, (text[:max_chars] if clipped else text).strip())
+    if clipped:
+        text = text[:max_chars].rstrip() + f"\n\n... (섹션 {total:,}바이트 중 일부만 표시, max_chars={max_chars})\n"
+
+    result = f"📄 {prd_file.name} › {found.heading.title}\n\n{text.rstrip()}\n"
+    tables = [t for i in tree.subtree(index) for t in tree.sections[i].tables]
+    if items or tables:
+        result += "\n---\n"
+        if items:
+            result += f"체크박스 {len([item for item in items if item.checked])}/{len(items)} 완료"
+        if tables:
+            result += (" | " if items else "") + ", ".join(
+                f"표 {' / '.join(t.header)[:60]} ({t.rows}행)" for t in tables
+            )
+        result += "\n"
     return [TextContent(type="text", text=result)]
 
 
-async def init_docs(path: str, project_name: str) -> list[TextContent]:
+async def init_docs(path: str, project_name: str, output: str = OUTPUT_MARKDOWN) -> list[TextContent]:
     """docs 폴더 초기화 + 템플릿 생성"""
+    mode = output_mode(output)
     project_path = Path(path)
     docs_path = project_path / "docs"
 
@@ -300,10 +950,14 @@ async def init_docs(path: str, project_name: str) -> list[TextContent]:
     created = []
     for filename, content in templates.items():
         file_path = docs_path / filename
-        if not file_path.exists():
-            file_path.write_text(content, encoding='utf-8')
+        if not fileio.exists(file_path):
+            fileio.write_text(file_path, content)
             created.append(filename)
 
+    if mode != OUTPUT_MARKDOWN:
+        data = {"tool": "init_docs", "docs_path": str(docs_path), "created": created}
+        return render(mode, data, f"docs 초기화: {join(created)}")
+
     result = f"## docs 폴더 초기화 완료\n\n경로: `{docs_path}`\n\n"
     if created:
         result += "### 생성된 파일\n" + "\n".join(f"- {f}" for f in created) + "\n\n"
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""can_code 판정 디스크 캐시 (.clouvel/cache/verdict.json)
+
+세션/git 훅마다 새 서버 프로세스가 뜨면 메모리 캐시가 비어서
+첫 can_code가 docs/PRD/테스트를 처음부터 다시 검사함.
+완성된 스냅샷을 프로젝트 로컬에 저장해 두고 다음 프로세스가 이어서 사용.
+
+- 프로젝트당 파일 하나, 프로세스에서 처음 한 번만 읽음 (이후는 메모리)
+- 항목: docs 경로 → {fingerprint, snapshot} (fingerprint가 같으면 다시 쓰지 않음)
+- 불러온 스냅샷도 stat 검사를 통과해야 사용 (호출하는 쪽 책임)
+- .clouvel 폴더가 이미 있는 프로젝트에만 저장
+  (프로젝트 루트에 폴더를 새로 만들면 루트 mtime이 바뀌어 방금 저장한 스냅샷이 무효가 됨)
+- 쓰기는 임시 파일 + os.replace
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+from .. import config
+
+CACHE_VERSION = 1
+CACHE_DIRNAME = "cache"
+CACHE_FILENAME = "verdict.json"
+
+# 프로젝트 경로 → {docs 경로: 항목}
+_loaded: dict[str, dict[str, dict]] = {}
+_lock = threading.Lock()
+
+
+def cache_file(project_path: Path) -> Path:
+    return project_path / ".clouvel" / CACHE_DIRNAME / CACHE_FILENAME
+
+
+def _read(path: Path) -> dict[str, dict]:
+    try:
+        data = json.loads(path.read_bytes())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        return {}
+    entries = data.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+def _entries(project_path: Path) -> dict[str, dict]:
+    """프로젝트 캐시 항목 (처음 한 번만 파일을 읽음, _lock 안에서 호출)"""
+    project_key = str(project_path)
+    entries = _loaded.get(project_key)
+    if entries is None:
+        entries = _read(cache_file(project_path))
+        _loaded[project_key] = entries
+    return entries
+
+
+def get_entry(project_path: Path, key: str) -> dict | None:
+    """저장된 항목 (없거나 꺼져 있으면 None)"""
+    if not config.disk_cache_enabled():
+        return None
+    with _lock:
+        return _entries(project_path).get(key)
+
+
+def put_entry(project_path: Path, key: str, entry: dict) -> bool:
+    """항목 저장 (fingerprint가 같으면 생략). 실제로 썼으면 True"""
+    if not config.disk_cache_enabled() or not (project_path / ".clouvel").is_dir():
+        return False
+    path = cache_file(project_path)
+    with _lock:
+        entries = _entries(project_path)
+        current = entries.get(key)
+        if current is not None and current.get("fingerprint") == entry.get("fingerprint"):
+            return False
+        entries[key] = entry
+        text = json.dumps({"version": CACHE_VERSION, "entries": entries}, ensure_ascii=False, separators=(",", ":"))
+        try:
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_name(f"{CACHE_FILENAME}.{os.getpid()}.tmp")
+            tmp_path.write_text(text, encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError:
+            return False
+    return True
+
+
+def clear() -> None:
+    """읽어 둔 내용 비우기 (다음 조회 때 파일을 다시 읽음)"""
+    with _lock:
+        _loaded.clear()
@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+"""프로젝트 fingerprint (Merkle 트리)
+
+"관련 파일이 바뀌었나?"를 도구마다 따로 확인하지 않도록 공유하는 변경 감지 모듈.
+clouvel.tools의 캐시는 여기서 만든 digest를 무효화 키로 사용
+(can_code 스냅샷, 워크스페이스 탐색 / 패키지별 판정, PRD 색인, get_rule 규칙 폴더).
+
+- 디렉토리 노드 digest = 자기 항목(하위 디렉토리 / 파일 이름, 내용 추적 파일의 크기 / mtime_ns)
+  + 하위 디렉토리 digest의 해시
+- 프로젝트 트리(TRACK_PROJECT)는 ProjectWalker와 같은 범위(.gitignore 적용)만 보고, 도구가 내용을 읽는 파일
+  (docs 폴더, .gitignore, 워크스페이스 설정)만 내용 추적, 나머지 파일은 이름만 (소스 수정으로 판정 캐시가 깨지지 않도록)
+- refresh(): inotify watcher가 감시 중인 디렉토리는 알림(mark_dirty)이 온 것만 다시 확인 → O(바뀐 것)
+  감시 밖 디렉토리는 stat 비교 (mtime이 그대로면 scandir 생략)
+- changed_since(digest): 그 digest 이후 자기 항목이 바뀐 디렉토리 (세대별 기록 합집합)
+- deps_changed(): 캐시가 기록한 경로 mtime을 바뀐 디렉토리만 골라 비교
+- mtime 해상도 안에서 바뀌었을 수 있는 노드(racy)는 안정될 때까지 갱신마다 다른 digest
+- digest_stats(): 트리 없이 stat 몇 개만 묶는 평평한 fingerprint (디스크 캐시 항목 검증)
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+
+from .. import cancel, config, watcher
+from .scan import DEFAULT_PRUNE, IgnoreRule, _is_ignored, parse_gitignore
+
+# 세대 기록 보관 수 (이보다 오래된 digest는 changed_since → None)
+HISTORY_SIZE = 64
+# 공유 트리 수 (프로젝트 / docs 폴더 / 규칙 폴더별)
+TREE_CACHE_SIZE = 64
+# 이 시간 안에 바뀐 노드는 같은 mtime으로 또 바뀔 수 있음 → 안정될 때까지 매번 다시 확인
+RACY_WINDOW_NS = 2_000_000_000
+
+TRACK_ALL = "all"            # 모든 파일의 크기 / mtime 추적
+TRACK_PROJECT = "project"    # .gitignore 적용, docs 폴더 파일 + CONTENT_FILES만 (나머지는 이름만)
+# 프로젝트 트리에서 내용까지 추적하는 파일 이름
+CONTENT_FILES = frozenset({".gitignore", "package.json", "pnpm-workspace.yaml"})
+
+_nonce = itertools.count(1)
+
+
+def _hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def digest_stats(parts: Iterable) -> str:
+    """JSON으로 표현 가능한 stat 값 묶음 → digest"""
+    return _hash(json.dumps(list(parts), separators=(",", ":")).encode())
+
+
+@dataclass
+class _Node:
+    """디렉토리 하나"""
+    path: str                                   # 절대 경로
+    rel: str                                    # 트리 루트 기준 ("" = 루트)
+    mtime_ns: int | None = None
+    files: dict[str, tuple[int, int] | None] = field(default_factory=dict)   # 이름 → (size, mtime_ns), 이름만 추적하면 None
+    children: dict[str, "_Node"] = field(default_factory=dict)
+    # 이 디렉토리 항목에 적용할 .gitignore - 비교용 (기준 경로, 내용) / 매칭용 (기준 경로, 규칙)
+    ignores: tuple[tuple[str, str], ...] = ()
+    rule_sets: list[tuple[str, list[IgnoreRule]]] = field(default_factory=list)
+    own: str = ""                               # 자기 항목 digest
+    digest: str = ""
+
+
+class FingerprintTree:
+    """디렉토리 트리의 Merkle digest (스레드 안전)"""
+
+    def __init__(self, root: Path, max_depth: int = 25, prune: frozenset[str] = DEFAULT_PRUNE,
+                 track: str = TRACK_ALL):
+        self.root = Path(root).absolute()
+        self.max_depth = max_depth
+        self.prune = prune
+        self.track = track
+        self.use_gitignore = track == TRACK_PROJECT
+        self._root_node = _Node(path=str(self.root), rel="")
+        self._nodes: dict[str, _Node] = {str(self.root): self._root_node}   # 절대 경로 → 노드
+        self._history: list[tuple[str, frozenset[str]]] = []   # (digest, 그 세대에 바뀐 디렉토리)
+        self._lock = threading.Lock()
+        self._dirty: set[str] | None = set()    # watcher가 알려준 디렉토리 (None = 전부)
+        self._dirty_lock = threading.Lock()
+        self._unwatched: set[str] = set()       # 마지막 확인 때 감시 밖이던 디렉토리 → 매번 stat
+        self._racy: set[str] = set()            # 안정될 때까지 매번 다시 확인
+        self._source: int | None = None         # 믿고 있는 watcher (id)
+        self._racy_after = 0
+        self.stats = 0                          # 누적 stat 호출 수 (테스트/진단용)
+
+    # ---------- 조회 ----------
+
+    @property
+    def digest(self) -> str:
+        """현재 루트 digest (한 번도 refresh 안 했으면 빈 문자열)"""
+        return self._root_node.digest
+
+    def abspath(self, rel: str) -> str:
+        return os.path.join(str(self.root), *rel.split("/")) if rel else str(self.root)
+
+    def subtree_digest(self, rel: str) -> str | None:
+        """하위 디렉토리 digest (트리에 없으면 None)"""
+        with self._lock:
+            node = self._nodes.get(self.abspath(rel))
+            return node.digest if node is not None else None
+
+    def changed_since(self, digest: str) -> list[str] | None:
+        """digest 이후 자기 항목이 바뀐 디렉토리 (상대 경로, 사라진 것 포함)
+        모르는 digest면 None (= 전부 바뀐 것으로 취급)
+        """
+        with self._lock:
+            changed = self._changed_since_locked(digest)
+            return sorted(changed) if changed is not None else None
+
+    def _changed_since_locked(self, digest: str) -> set[str] | None:
+        for index in range(len(self._history) - 1, -1, -1):
+            if self._history[index][0] == digest:
+                changed: set[str] = set()
+                for _, paths in self._history[index + 1:]:
+                    changed |= paths
+                return changed
+        return None
+
+    def deps_changed(self, since: str | None, deps: dict[str, int], racy_after: int) -> bool:
+        """since 이후 deps(디렉토리 / 내용 추적 파일 → 기록한 mtime_ns)가 바뀌었는지 (refresh 직후 호출)
+        since를 알면 그 뒤 바뀐 디렉토리만 확인 → O(바뀐 것), 모르면 deps 전부를 트리 기록과 비교
+        racy_after 이후 mtime은 같아도 바뀐 것으로 취급
+        """
+        with self._lock:
+            changed = self._changed_since_locked(since) if since else None
+            if changed is None:
+                paths: Iterable[str] = deps
+            else:
+                paths = []
+                for rel in changed:
+                    path = self.abspath(rel)
+                    if path in deps:
+                        paths.append(path)
+                    node = self._nodes.get(path)
+                    if node is not None:
+                        paths.extend(p for name in node.files if (p := os.path.join(path, name)) in deps)
+            for path in paths:
+                current = self._recorded_mtime(path)
+                if current is None or current != deps[path] or current >= racy_after:
+                    return True
+            return False
+
+    def _recorded_mtime(self, path: str) -> int | None:
+        """트리가 기록한 mtime (트리 밖이면 stat)"""
+        node = self._nodes.get(path)
+        if node is not None:
+            return node.mtime_ns
+        parent = self._nodes.get(os.path.dirname(path))
+        stat = parent.files.get(os.path.basename(path)) if parent is not None else None
+        if stat is not None:
+            return stat[1]
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    # ---------- 갱신 ----------
+
+    def mark_dirty(self, paths: Iterable[str] | None) -> None:
+        """바뀐 디렉토리 알림 (None = 전부) → 다음 refresh에서 다시 확인"""
+        root = str(self.root)
+        with self._dirty_lock:
+            if paths is None:
+                self._dirty = None
+            elif self._dirty is not None:
+                self._dirty.update(p for p in paths if p == root or p.startswith(root + os.sep))
+
+    def refresh(self, dirty: Iterable[str] | None = None) -> str:
+        """트리 갱신 후 루트 digest 반환
+        dirty: 호출한 쪽이 아는 바뀐 디렉토리 (절대 경로) → 그것만 다시 읽음
+        없으면 inotify watcher의 대기 이벤트를 처리하고 감시 중인 디렉토리는 알림 온 것만,
+        나머지는 stat 비교 (watcher가 없거나 바뀌었으면 전체)
+        """
+        with self._lock:
+            active = _synced_watcher()
+            source = id(active) if active is not None else None
+            with self._dirty_lock:
+                pending, self._dirty = self._dirty, set()
+            changed: set[str] = set()
+            self._racy_after = time.time_ns() - RACY_WINDOW_NS
+            if dirty is not None and self._root_node.digest:
+                targets = {os.path.normpath(str(p)) for p in dirty} | self._racy
+            elif pending is None or active is None or source != self._source or not self._root_node.digest:
+                targets = None
+            else:
+                targets = pending | self._unwatched | self._racy
+            self._source = source
+
+            if targets is None:
+                self._refresh_node(self._root_node, 0, changed, active, recursive=True)
+            else:
+                # 상위 디렉토리부터 (하위는 상위를 다시 읽으며 사라졌을 수 있음)
+                for path in sorted(targets):
+                    node = self._nearest_node(path)
+                    if node is not None and self._refresh_node(node, self._depth(node), changed, active, recursive=False):
+                        self._rehash_ancestors(node)
+
+            digest = self._root_node.digest
+            if not self._history or self._history[-1][0] != digest:
+                self._history.append((digest, frozenset(changed)))
+                del self._history[:-HISTORY_SIZE]
+            return digest
+
+    @staticmethod
+    def _depth(node: _Node) -> int:
+        return node.rel.count("/") + 1 if node.rel else 0
+
+    def _nearest_node(self, path: str) -> _Node | None:
+        """path 또는 트리에 있는 가장 가까운 상위 디렉토리"""
+        root = str(self.root)
+        while True:
+            node = self._nodes.get(path)
+            if node is not None:
+                return node
+            parent = os.path.dirname(path)
+            if path == root or parent == path or not path.startswith(root):
+                return None
+            path = parent
+
+    def _rehash_ancestors(self, node: _Node) -> None:
+        """노드 digest가 바뀌었을 때 루트까지 다시 해시 (바뀌지 않는 곳에서 멈춤)"""
+        while node.rel:
+            parent = self._nodes.get(os.path.dirname(node.path))
+            if parent is None:
+                return
+            digest = self._node_digest(parent)
+            if digest == parent.digest:
+                return
+            parent.digest = digest
+            node = parent
+
+    def _refresh_node(self, node: _Node, depth: int, changed: set[str],
+                      active: "watcher.Watcher | None", recursive: bool, force: bool = False) -> bool:
+        """노드 하나 (recursive면 하위도) 갱신. digest가 바뀌었으면 True
+        force: 적용할 .gitignore가 바뀜 → 하위까지 항목을 다시 읽음
+        """
+        self.stats += 1
+        if self.stats % 256 == 0:
+            cancel.checkpoint()
+        # 확인 전에 감시 여부를 봐야 확인 ~ 등록 사이의 변경을 놓치지 않음
+        if active is not None and active.is_dir_watched(node.path):
+            self._unwatched.discard(node.path)
+        else:
+            self._unwatched.add(node.path)
+        try:
+            mtime_ns = os.stat(node.path).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+
+        if force or mtime_ns != node.mtime_ns or not node.digest or self._restat_files(node):
+            self._rescan(node, mtime_ns, depth, changed, active, recursive, force)
+        elif recursive:
+            for child in node.children.values():
+                self._refresh_node(child, depth + 1, changed, active, recursive)
+
+        own = self._own_digest(node)
+        if own != node.own:
+            node.own = own
+            changed.add(node.rel)
+        digest = self._node_digest(node)
+        if digest == node.digest:
+            return False
+        node.digest = digest
+        return True
+
+    def _restat_files(self, node: _Node) -> bool:
+        """항목 목록은 그대로 → 내용 추적 파일만 확인. .gitignore가 바뀌었으면 True"""
+        ignore_changed = False
+        for name, old in list(node.files.items()):
+            if old is None:
+                continue
+            self.stats += 1
+            try:
+                st = os.stat(os.path.join(node.path, name))
+                current = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                current = None
+            if current == old:
+                continue
+            if current is None:
+                del node.files[name]
+            else:
+                node.files[name] = current
+            ignore_changed = ignore_changed or (self.use_gitignore and name == ".gitignore")
+        return ignore_changed
+
+    def _tracks(self, rel: str, name: str) -> bool:
+        if self.track == TRACK_ALL:
+            return True
+        return name in CONTENT_FILES or rel == "docs" or rel.endswith("/docs")
+
+    def _read_ignores(self, node: _Node, has_gitignore: bool) -> None:
+        """상위 규칙 + 이 디렉토리 .gitignore (ProjectWalker와 같은 방식)"""
+        parent = self._nodes.get(os.path.dirname(node.path)) if node.rel else None
+        ignores = parent.ignores if parent is not None else ()
+        rule_sets = parent.rule_sets if parent is not None else []
+        if has_gitignore:
+            try:
+                with open(os.path.join(node.path, ".gitignore"), encoding="utf-8", errors="ignore") as f:
+                    text = f.read()
+            except OSError:
+                text = ""
+            rules = parse_gitignore(text)
+            if rules:
+                prefix = node.rel + "/" if node.rel else ""
+                ignores = ignores + ((prefix, text),)
+                rule_sets = rule_sets + [(prefix, rules)]
+        if ignores != node.ignores:
+            node.ignores = ignores
+            node.rule_sets = rule_sets
+
+    def _rescan(self, node: _Node, mtime_ns: int | None, depth: int, changed: set[str],
+                active: "watcher.Watcher | None", recursive: bool, force: bool) -> None:
+        """디렉토리 항목 다시 읽기 (새 하위 디렉토리는 전체, 기존 것은 recursive일 때만 갱신)"""
+        node.mtime_ns = mtime_ns
+        entries: list[os.DirEntry] = []
+        if mtime_ns is not None:
+            try:
+                with os.scandir(node.path) as it:
+                    entries = list(it)
+            except OSError:
+                pass
+        self.stats += len(entries)
+
+        old_ignores = node.ignores
+        if self.use_gitignore:
+            self._read_ignores(node, any(entry.name == ".gitignore" for entry in entries))
+        # 적용할 규칙이 바뀌면 하위 항목 범위도 바뀜
+        force = force or node.ignores != old_ignores
+        prefix = node.rel + "/" if node.rel else ""
+
+        files: dict[str, tuple[int, int] | None] = {}
+        dir_names: list[tuple[str, str]] = []
+        for entry in entries:
+            name = entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if is_dir and (name in self.prune or depth >= self.max_depth):
+                    continue
+                if node.rule_sets and _is_ignored(node.rule_sets, prefix + name, name, is_dir):
+                    continue
+                if is_dir:
+                    dir_names.append((name, entry.path))
+                    continue
+                if not self._tracks(node.rel, name):
+                    files[name] = None
+                    continue
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            files[name] = (st.st_size, st.st_mtime_ns)
+        node.files = files
+
+        children: dict[str, _Node] = {}
+        for name, path in dir_names:
+            child = node.children.pop(name, None)
+            if child is None:
+                child = _Node(path=path, rel=prefix + name)
+                self._nodes[path] = child
+                self._refresh_node(child, depth + 1, changed, active, recursive=True)
+            elif recursive or force:
+                self._refresh_node(child, depth + 1, changed, active, recursive=True, force=force)
+            children[name] = child
+        for gone in node.children.values():
+            self._forget(gone, changed)
+        node.children = children
+
+    def _forget(self, node: _Node, changed: set[str]) -> None:
+        """사라진 하위 트리 정리"""
+        self._nodes.pop(node.path, None)
+        self._unwatched.discard(node.path)
+        self._racy.discard(node.path)
+        changed.add(node.rel)
+        for child in node.children.values():
+            self._forget(child, changed)
+
+    def _own_digest(self, node: _Node) -> str:
+        """자기 항목 digest - mtime 해상도 안에서 바뀌었을 수 있으면 매번 다른 값"""
+        parts = [f"f\0{name}\0{stat[0]}\0{stat[1]}" if stat else f"f\0{name}" for name, stat in node.files.items()]
+        parts += [f"d\0{name}" for name in node.children]
+        parts.sort()
+        racy = (node.mtime_ns or 0) >= self._racy_after or any(
+            stat is not None and stat[1] >= self._racy_after for stat in node.files.values()
+        )
+        if racy:
+            self._racy.add(node.path)
+            parts.append(f"racy\0{next(_nonce)}")
+        else:
+            self._racy.discard(node.path)
+        return _hash("\n".join(parts).encode())
+
+    @staticmethod
+    def _node_digest(node: _Node) -> str:
+        parts = [node.own] + sorted(f"{name}\0{child.digest}" for name, child in node.children.items())
+        return _hash("\n".join(parts).encode())
+
+
+def _synced_watcher() -> "watcher.Watcher | None":
+    """알림을 믿을 수 있는 watcher (inotify + 대기 중인 이벤트를 방금 처리함). 없으면 None"""
+    active = watcher.get_watcher()
+    if active is None:
+        return None
+    active.add_listener(mark_dirty)
+    return active if active.sync() else None
+
+
+# ============================================================
+# 공유 트리 (모든 도구가 같은 트리를 씀)
+# ============================================================
+
+_trees: "OrderedDict[tuple[str, int, str], FingerprintTree]" = OrderedDict()
+_trees_lock = threading.Lock()
+
+
+def get_tree(root: Path, max_depth: int = 25, track: str = TRACK_ALL) -> FingerprintTree:
+    """root의 공유 트리 (LRU)"""
+    key = (str(Path(root).absolute()), max_depth, track)
+    with _trees_lock:
+        tree = _trees.get(key)
+        if tree is None:
+            tree = FingerprintTree(Path(key[0]), max_depth=max_depth, track=track)
+            _trees[key] = tree
+            while len(_trees) > TREE_CACHE_SIZE:
+                _trees.popitem(last=False)
+        else:
+            _trees.move_to_end(key)
+        return tree
+
+
+def project_tree(root: Path) -> FingerprintTree:
+    """프로젝트 루트의 공유 트리 (탐색 깊이 설정을 따름, TRACK_PROJECT)"""
+    return get_tree(root, config.scan_max_depth(), TRACK_PROJECT)
+
+
+def cache_key(root: Path, max_depth: int = 25) -> str:
+    """root 트리를 갱신하고 루트 digest 반환 - 도구 캐시의 무효화 키"""
+    return get_tree(root, max_depth).refresh()
+
+
+def mark_dirty(paths: Iterable[str] | None) -> None:
+    """watcher 알림: 바뀐 디렉토리 (None = 전부) → 공유 트리에 표시"""
+    if paths is not None:
+        paths = [os.path.normpath(p) for p in paths]
+    with _trees_lock:
+        trees = list(_trees.values())
+    for tree in trees:
+        tree.mark_dirty(paths)
+
+
+def clear_trees() -> None:
+    with _trees_lock:
+        _trees.clear()
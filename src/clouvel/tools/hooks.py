@@ -6,12 +6,14 @@ from pathlib import Path
 from datetime import datetime
 from mcp.types import TextContent
 
+from .. import fileio
+
 
 async def hook_design(path: str, trigger: str, checks: list, block_on_fail: bool) -> list[TextContent]:
     """설계 훅 - 코드 작성 전 자동 체크포인트"""
     project_path = Path(path)
 
-    if not project_path.exists():
+    if not fileio.exists(project_path):
         return [TextContent(type="text", text=f"❌ 경로가 존재하지 않습니다: {path}")]
 
     # 트리거별 기본 체크 항목
@@ -38,7 +40,7 @@ async def hook_design(path: str, trigger: str, checks: list, block_on_fail: bool
     }
 
     hook_file = hooks_dir / f"{trigger}.json"
-    hook_file.write_text(json.dumps(hook_config, indent=2, ensure_ascii=False), encoding='utf-8')
+    fileio.write_text(hook_file, json.dumps(hook_config, indent=2, ensure_ascii=False))
 
     # 체크리스트 생성
     checklist_md = "\n".join(f"- [ ] {check}" for check in active_checks)
@@ -83,7 +85,7 @@ async def hook_verify(path: str, trigger: str, steps: list, parallel: bool, cont
     """검증 훅 - 코드 완료 후 자동 검증 체크포인트"""
     project_path = Path(path)
 
-    if not project_path.exists():
+    if not fileio.exists(project_path):
         return [TextContent(type="text", text=f"❌ 경로가 존재하지 않습니다: {path}")]
 
     # 트리거별 기본 단계
@@ -121,7 +123,7 @@ async def hook_verify(path: str, trigger: str, steps: list, parallel: bool, cont
     }
 
     hook_file = hooks_dir / f"{trigger}.json"
-    hook_file.write_text(json.dumps(hook_config, indent=2, ensure_ascii=False), encoding='utf-8')
+    fileio.write_text(hook_file, json.dumps(hook_config, indent=2, ensure_ascii=False))
 
     # 단계 목록 생성
     steps_md = ""
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Core 도구 출력 형식
+
+- markdown: 기존 안내 문구 (기본)
+- compact: 한 줄 요약 (긴 세션에서 토큰 절약)
+- json: 훅/에이전트가 바로 쓰는 작은 판정 객체
+오류(경로 없음 등)도 markdown이 아니면 {"tool", "status": "error", "error", "message"} / "ERROR | ..." 한 줄
+"""
+
+import json
+
+from mcp.types import TextContent
+
+OUTPUT_MARKDOWN = "markdown"
+OUTPUT_COMPACT = "compact"
+OUTPUT_JSON = "json"
+OUTPUT_MODES = (OUTPUT_MARKDOWN, OUTPUT_COMPACT, OUTPUT_JSON)
+
+# inputSchema에 그대로 넣는 속성 정의
+OUTPUT_SCHEMA = {
+    "type": "string",
+    "enum": list(OUTPUT_MODES),
+    "description": "출력 형식: markdown(기본) / compact(한 줄) / json(판정 객체)",
+}
+
+
+def output_mode(output: str | None) -> str:
+    """모르는 값은 markdown (batch 안의 호출은 스키마 검사를 거치지 않으므로 문자열이 아닌 값도 올 수 있음)"""
+    if not isinstance(output, str):
+        return OUTPUT_MARKDOWN
+    mode = output.strip().lower()
+    return mode if mode in OUTPUT_MODES else OUTPUT_MARKDOWN
+
+
+def render(mode: str, data: dict, compact: str) -> list[TextContent]:
+    """json이면 data, 아니면 compact 한 줄"""
+    if mode == OUTPUT_JSON:
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = compact
+    return [TextContent(type="text", text=text)]
+
+
+def error(mode: str, tool: str, code: str, message: str, markdown: str | None = None, **fields) -> list[TextContent]:
+    """오류 응답
+    code: 기계용 오류 종류 (not_found 등), message: 한 줄 설명, markdown: markdown 모드 문구 (없으면 message)
+    fields: json에 같이 넣을 값
+    """
+    if mode == OUTPUT_MARKDOWN:
+        return [TextContent(type="text", text=markdown or message)]
+    data = {"tool": tool, "status": "error", "error": code, "message": message, **fields}
+    return render(mode, data, f"ERROR | {code} | {message}")
+
+
+def join(items: list[str]) -> str:
+    return ", ".join(items) if items else "-"
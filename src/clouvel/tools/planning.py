@@ -5,12 +5,14 @@ from pathlib import Path
 from datetime import datetime
 from mcp.types import TextContent
 
+from .. import fileio
+
 
 async def init_planning(path: str, task: str, goals: list) -> list[TextContent]:
     """영속적 컨텍스트 초기화"""
     project_path = Path(path)
 
-    if not project_path.exists():
+    if not fileio.exists(project_path):
         return [TextContent(type="text", text=f"❌ 경로가 존재하지 않습니다: {path}")]
 
     planning_dir = project_path / ".claude" / "planning"
@@ -105,9 +107,9 @@ async def init_planning(path: str, task: str, goals: list) -> list[TextContent]:
 """
 
     # 파일 생성
-    (planning_dir / "task_plan.md").write_text(task_plan_content, encoding='utf-8')
-    (planning_dir / "findings.md").write_text(findings_content, encoding='utf-8')
-    (planning_dir / "progress.md").write_text(progress_content, encoding='utf-8')
+    fileio.write_text(planning_dir / "task_plan.md", task_plan_content)
+    fileio.write_text(planning_dir / "findings.md", findings_content)
+    fileio.write_text(planning_dir / "progress.md", progress_content)
 
     return [TextContent(type="text", text=f"""# 영속적 컨텍스트 초기화 완료
 
@@ -137,7 +139,7 @@ async def save_finding(path: str, topic: str, question: str, findings: str, sour
     project_path = Path(path)
     findings_file = project_path / ".claude" / "planning" / "findings.md"
 
-    if not findings_file.exists():
+    if not fileio.exists(findings_file):
         return [TextContent(type="text", text="❌ findings.md가 없습니다. 먼저 `init_planning` 도구로 초기화하세요.")]
 
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
@@ -160,8 +162,8 @@ async def save_finding(path: str, topic: str, question: str, findings: str, sour
 
 """
 
-    existing = findings_file.read_text(encoding='utf-8')
-    findings_file.write_text(existing + finding_entry, encoding='utf-8')
+    existing = fileio.read_text(findings_file)
+    fileio.write_text(findings_file, existing + finding_entry)
 
     return [TextContent(type="text", text=f"""# Finding 저장 완료
 
@@ -188,11 +190,11 @@ async def refresh_goals(path: str) -> list[TextContent]:
     task_plan_file = project_path / ".claude" / "planning" / "task_plan.md"
     progress_file = project_path / ".claude" / "planning" / "progress.md"
 
-    if not task_plan_file.exists():
+    if not fileio.exists(task_plan_file):
         return [TextContent(type="text", text="❌ task_plan.md가 없습니다. 먼저 `init_planning` 도구로 초기화하세요.")]
 
-    task_plan = task_plan_file.read_text(encoding='utf-8')
-    progress = progress_file.read_text(encoding='utf-8') if progress_file.exists() else "(없음)"
+    task_plan = fileio.read_text(task_plan_file)
+    progress = fileio.read_text(progress_file) if fileio.exists(progress_file) else "(없음)"
 
     # 목표 추출
     goals = []
@@ -240,10 +242,10 @@ async def update_progress(path: str, completed: list, in_progress: str, blockers
     project_path = Path(path)
     progress_file = project_path / ".claude" / "planning" / "progress.md"
 
-    if not progress_file.exists():
+    if not fileio.exists(progress_file):
         return [TextContent(type="text", text="❌ progress.md가 없습니다. 먼저 `init_planning` 도구로 초기화하세요.")]
 
-    existing = progress_file.read_text(encoding='utf-8')
+    existing = fileio.read_text(progress_file)
 
     # 기존 완료 항목 파싱
     existing_completed = []
@@ -298,7 +300,7 @@ async def update_progress(path: str, completed: list, in_progress: str, blockers
 > 💡 업데이트: `update_progress` 도구 호출
 """
 
-    progress_file.write_text(new_progress, encoding='utf-8')
+    fileio.write_text(progress_file, new_progress)
 
     return [TextContent(type="text", text=f"""# Progress 업데이트 완료
 
@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+"""PRD 제목(heading) 색인 / 섹션 트리
+
+수 MB짜리 PRD(로그/표 붙여넣기)도 본문을 파이썬 문자열로 읽지 않음
+- mmap 위에서 `#` 제목 줄과 코드 블록 경계만 한 번에 찾음 (코드 블록 안의 `#`은 무시)
+- 색인은 파일 내용 해시 기준으로 캐시 → 같은 내용이면 다시 스캔하지 않음
+- key(docs 폴더 fingerprint 등)를 주면 key가 같을 때 파일을 다시 읽고 해시하지도 않음
+- 섹션 규칙은 작은 제목 색인에만 적용
+- 섹션 트리: 제목 계층 + 바이트 범위 + 체크박스 항목 + 표 (섹션 본문은 필요할 때 그 범위만 읽음)
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+_INDEX_CACHE_SIZE = 64
+
+# 후보 줄 찾기: 줄바꿈 뒤 #, `, ~ 로 시작하는 줄
+# (^ + MULTILINE은 모든 위치에서 검사해서 수 MB 파일에선 몇 배 느림)
+_CANDIDATE_RE = re.compile(rb"\n {0,3}[#`~]")
+# 후보 줄 해석: 코드 블록 경계(``` / ~~~) 또는 제목(# ~ ######)
+_LINE_RE = re.compile(rb" {0,3}(?:(?P<fence>`{3,}|~{3,})|(?P<hashes>#{1,6})(?P<title>[^\r\n]*))")
+# 체크박스 항목(- [ ] / - [x]) 또는 표 줄(| ... |)
+# 첫 제목 앞의 항목은 어느 섹션에도 속하지 않으므로 첫 줄은 볼 필요 없음
+_ITEM_RE = re.compile(
+    rb"\n[ \t]*(?:[-*+][ \t]+\[(?P<mark>[ xX])\][ \t]+(?P<text>[^\r\n]*)"
+    rb"|(?P<table>\|[^\r\n]*(?:\r?\n[ \t]*\|[^\r\n]*)*))"  # 표는 이어지는 | 줄까지 한 번에
+)
+_TABLE_SEPARATOR_RE = re.compile(r"^\|?[\s:|-]+\|?$")
+
+
+@dataclass(frozen=True)
+class Heading:
+    """PRD 제목 한 줄"""
+    level: int
+    title: str
+    line: str    # 원래 줄 (섹션 규칙 검사용)
+    offset: int  # 제목 줄 시작 바이트 위치
+
+
+@dataclass(frozen=True)
+class HeadingIndex:
+    """PRD 하나의 제목 색인"""
+    digest: str
+    size: int
+    headings: tuple[Heading, ...]
+    fences: tuple[tuple[int, int], ...] = ()  # 코드 블록 바이트 범위
+
+
+@dataclass(frozen=True)
+class Checkbox:
+    """체크박스 항목"""
+    checked: bool
+    text: str
+    offset: int
+
+
+@dataclass(frozen=True)
+class Table:
+    """표 (행은 보관하지 않고 범위/머리글/행 수만)"""
+    offset: int
+    end: int
+    header: tuple[str, ...]
+    rows: int
+
+
+@dataclass(frozen=True)
+class Section:
+    """섹션 = 제목 + 다음 같은/상위 레벨 제목 전까지"""
+    heading: Heading
+    end: int                          # 하위 섹션 포함 끝 바이트 위치
+    parent: int | None                # SectionTree.sections 안의 번호
+    children: tuple[int, ...]
+    checkboxes: tuple[Checkbox, ...]  # 이 섹션 직속 (하위 섹션 제외)
+    tables: tuple[Table, ...]
+
+
+@dataclass(frozen=True)
+class SectionTree:
+    """PRD 하나의 섹션 트리 (sections는 문서 순서)"""
+    digest: str
+    size: int
+    sections: tuple[Section, ...]
+
+    @property
+    def roots(self) -> list[int]:
+        return [i for i, section in enumerate(self.sections) if section.parent is None]
+
+    def subtree(self, index: int) -> list[int]:
+        """섹션과 모든 하위 섹션 번호 (문서 순서)"""
+        end = self.sections[index].end
+        result = [index]
+        for i in range(index + 1, len(self.sections)):
+            if self.sections[i].heading.offset >= end:
+                break
+            result.append(i)
+        return result
+
+    def checkboxes(self, index: int) -> list[Checkbox]:
+        """하위 섹션까지 포함한 체크박스 항목"""
+        return [item for i in self.subtree(index) for item in self.sections[i].checkboxes]
+
+
+_index_cache: "OrderedDict[str, HeadingIndex]" = OrderedDict()
+_tree_cache: "OrderedDict[str, SectionTree]" = OrderedDict()
+# PRD 경로 → (호출한 쪽의 무효화 키, 그때 읽은 내용 해시)
+_keyed: "OrderedDict[str, tuple[str, str]]" = OrderedDict()
+_index_lock = threading.Lock()
+
+
+def _scan_headings(buffer) -> tuple[tuple[Heading, ...], tuple[tuple[int, int], ...]]:
+    """버퍼에서 제목 줄만 추출 (코드 블록 안은 건너뜀)
+    Returns: (제목들, 코드 블록 범위들)
+    """
+    headings = []
+    fences = []
+    fence = None
+    fence_start = 0
+    starts = [0] + [m.start() + 1 for m in _CANDIDATE_RE.finditer(buffer)]
+    for start in starts:
+        match = _LINE_RE.match(buffer, start)
+        if match is None:
+            continue
+        marker = match.group("fence")
+        if marker is not None:
+            if fence is None:
+                fence = marker
+                fence_start = start
+            elif marker[:1] == fence[:1] and len(marker) >= len(fence):
+                fence = None
+                fences.append((fence_start, match.end()))
+            continue
+        if fence is not None:
+            continue
+        hashes = match.group("hashes")
+        raw = match.group(0).decode("utf-8", errors="replace").strip()
+        title = match.group("title").decode("utf-8", errors="replace").strip().rstrip("#").strip()
+        headings.append(Heading(level=len(hashes), title=title, line=raw, offset=start))
+    if fence is not None:
+        # 닫히지 않은 코드 블록은 파일 끝까지
+        fences.append((fence_start, len(buffer)))
+    return tuple(headings), tuple(fences)
+
+
+def _cache_get(cache: OrderedDict, digest: str):
+    with _index_lock:
+        value = cache.get(digest)
+        if value is not None:
+            cache.move_to_end(digest)
+        return value
+
+
+def _cache_put(cache: OrderedDict, digest: str, value) -> None:
+    with _index_lock:
+        cache[digest] = value
+        cache.move_to_end(digest)
+        while len(cache) > _INDEX_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def _keyed_digest(prd_path: Path, key: str | None) -> str | None:
+    """key가 지난번과 같으면 그때의 내용 해시"""
+    if key is None:
+        return None
+    with _index_lock:
+        entry = _keyed.get(str(prd_path))
+        return entry[1] if entry is not None and entry[0] == key else None
+
+
+def _keyed_put(prd_path: Path, key: str | None, digest: str) -> None:
+    if key is None:
+        return
+    _cache_put(_keyed, str(prd_path), (key, digest))
+
+
+def _index_for(buffer, digest: str, size: int) -> HeadingIndex:
+    index = _cache_get(_index_cache, digest)
+    if index is None:
+        headings, fences = _scan_headings(buffer)
+        index = HeadingIndex(digest=digest, size=size, headings=headings, fences=fences)
+        _cache_put(_index_cache, digest, index)
+    return index
+
+
+def read_heading_index(prd_path: Path, key: str | None = None) -> HeadingIndex:
+    """PRD 제목 색인 (key가 같거나 내용 해시가 같으면 캐시 사용)
+    Raises: OSError - 파일을 읽을 수 없음
+    """
+    digest = _keyed_digest(prd_path, key)
+    if digest is not None:
+        index = _cache_get(_index_cache, digest)
+        if index is not None:
+            return index
+    with open(prd_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            # 빈 파일은 mmap 불가
+            return HeadingIndex(digest=hashlib.sha256().hexdigest(), size=0, headings=())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            index = _index_for(buffer, hashlib.sha256(buffer).hexdigest(), size)
+    _keyed_put(prd_path, key, index.digest)
+    return index
+
+
+def _split_row(line: str) -> tuple[str, ...]:
+    return tuple(cell.strip() for cell in line.strip().strip("|").split("|"))
+
+
+def _build_tree(buffer, index: HeadingIndex) -> SectionTree:
+    """제목 색인 + 체크박스/표 한 번 스캔 → 섹션 트리"""
+    headings = index.headings
+    offsets = [h.offset for h in headings]
+    fence_starts = [start for start, _ in index.fences]
+
+    def in_fence(offset: int) -> bool:
+        i = bisect_right(fence_starts, offset) - 1
+        return i >= 0 and offset < index.fences[i][1]
+
+    def owner(offset: int) -> int | None:
+        # 항목 바로 앞의 제목이 그 항목을 직접 포함하는 가장 깊은 섹션
+        i = bisect_right(offsets, offset) - 1
+        return i if i >= 0 else None
+
+    checkboxes: list[list[Checkbox]] = [[] for _ in headings]
+    tables: list[list[Table]] = [[] for _ in headings]
+
+    for match in _ITEM_RE.finditer(buffer):
+        start = match.start() + 1
+        if in_fence(start):
+            continue
+        section = owner(start)
+        if section is None:
+            continue
+        if match.group("table") is None:
+            text = match.group("text").decode("utf-8", errors="replace").strip()
+            checkboxes[section].append(Checkbox(checked=match.group("mark") != b" ", text=text, offset=start))
+            continue
+
+        # 행은 읽지 않고 머리글/구분선만 확인, 나머지는 줄 수로 셈
+        end = match.end()
+        rows = buffer[start:end].count(b"\n")  # mmap.count는 3.13+ (슬라이스 복사는 일시적)
+        first = buffer.find(b"\n", start, end)
+        header = _split_row(buffer[start:first if first != -1 else end].decode("utf-8", errors="replace"))
+        if first != -1:
+            second = buffer.find(b"\n", first + 1, end)
+            line = buffer[first + 1:second if second != -1 else end].decode("utf-8", errors="replace")
+            if _TABLE_SEPARATOR_RE.match(line.strip()):
+                rows -= 1
+        tables[section].append(Table(offset=start, end=end, header=header, rows=rows))
+
+    # 섹션 끝 = 다음 같은/상위 레벨 제목 (없으면 파일 끝)
+    ends = [len(buffer)] * len(headings)
+    parents: list[int | None] = [None] * len(headings)
+    children: list[list[int]] = [[] for _ in headings]
+    stack: list[int] = []
+    for i, heading in enumerate(headings):
+        while stack and headings[stack[-1]].level >= heading.level:
+            ends[stack.pop()] = heading.offset
+        if stack:
+            parents[i] = stack[-1]
+            children[stack[-1]].append(i)
+        stack.append(i)
+
+    sections = tuple(
+        Section(
+            heading=heading,
+            end=ends[i],
+            parent=parents[i],
+            children=tuple(children[i]),
+            checkboxes=tuple(checkboxes[i]),
+            tables=tuple(tables[i]),
+        )
+        for i, heading in enumerate(headings)
+    )
+    return SectionTree(digest=index.digest, size=index.size, sections=sections)
+
+
+def read_section_tree(prd_path: Path, key: str | None = None) -> SectionTree:
+    """PRD 섹션 트리 (key가 같거나 내용 해시가 같으면 캐시 사용)
+    Raises: OSError - 파일을 읽을 수 없음
+    """
+    digest = _keyed_digest(prd_path, key)
+    if digest is not None:
+        tree = _cache_get(_tree_cache, digest)
+        if tree is not None:
+            return tree
+    with open(prd_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return SectionTree(digest=hashlib.sha256().hexdigest(), size=0, sections=())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            digest = hashlib.sha256(buffer).hexdigest()
+            tree = _cache_get(_tree_cache, digest)
+            if tree is None:
+                tree = _build_tree(buffer, _index_for(buffer, digest, size))
+                _cache_put(_tree_cache, digest, tree)
+    _keyed_put(prd_path, key, digest)
+    return tree
+
+
+def read_section_text(prd_path: Path, section: Section, max_bytes: int | None = None) -> str:
+    """섹션 범위만 읽어서 반환 (max_bytes까지)"""
+    length = section.end - section.heading.offset
+    if max_bytes is not None:
+        length = min(length, max_bytes)
+    with open(prd_path, "rb") as f:
+        f.seek(section.heading.offset)
+        return f.read(length).decode("utf-8", errors="ignore")
+
+
+def compile_section_rules(sections: list[dict]) -> list[tuple[dict, re.Pattern]]:
+    """REQUIRED_PRD_SECTIONS 형식 → (섹션, 패턴 합친 정규식)"""
+    return [
+        (section, re.compile("|".join(f"(?:{p})" for p in section["patterns"]), re.IGNORECASE))
+        for section in sections
+    ]
+
+
+def find_sections(index: HeadingIndex, rules: list[tuple[dict, re.Pattern]]) -> set[str]:
+    """제목 색인에서 규칙에 맞는 섹션 이름들"""
+    found = set()
+    for section, regex in rules:
+        for heading in index.headings:
+            if regex.search(heading.line):
+                found.add(section["name"])
+                break
+    return found
+
+
+def find_section(tree: SectionTree, name: str, rules: list[tuple[dict, re.Pattern]]) -> int | None:
+    """이름으로 섹션 찾기
+    1) 섹션 규칙 이름(acceptance 등) → 규칙에 맞는 첫 제목
+    2) 제목이 같은 섹션 → 3) 제목에 포함된 섹션 (대소문자 무시)
+    """
+    key = name.strip().casefold()
+    if not key:
+        return None
+    for section, regex in rules:
+        if section["name"].casefold() == key:
+            for i, item in enumerate(tree.sections):
+                if regex.search(item.heading.line):
+                    return i
+            return None
+    for i, item in enumerate(tree.sections):
+        if item.heading.title.casefold() == key:
+            return i
+    for i, item in enumerate(tree.sections):
+        if key in item.heading.title.casefold():
+            return i
+    return None
+
+
+def clear_heading_cache() -> None:
+    """색인/섹션 트리 캐시 비우기 (테스트용)"""
+    with _index_lock:
+        _index_cache.clear()
+        _tree_cache.clear()
+        _keyed.clear()
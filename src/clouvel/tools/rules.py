@@ -2,16 +2,27 @@
 """Rules tools (v0.5): init_rules, get_rule, add_rule"""
 
 import json
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime
 from mcp.types import TextContent
 
+from .. import fileio
+from .fingerprint import cache_key
+
+_RULES_CACHE_SIZE = 32
+
+# rules 폴더 → (fingerprint, 읽은 규칙 목록)
+_rules_cache: "OrderedDict[str, tuple[str, list[str]]]" = OrderedDict()
+_rules_lock = threading.Lock()
+
 
 async def init_rules(path: str, template: str) -> list[TextContent]:
     """규칙 모듈화 초기화"""
     project_path = Path(path)
 
-    if not project_path.exists():
+    if not fileio.exists(project_path):
         return [TextContent(type="text", text=f"❌ 경로가 존재하지 않습니다: {path}")]
 
     rules_dir = project_path / ".claude" / "rules"
@@ -94,8 +105,8 @@ async def init_rules(path: str, template: str) -> list[TextContent]:
 
     for filename in files_to_create:
         file_path = rules_dir / filename
-        if not file_path.exists():
-            file_path.write_text(rule_contents.get(filename, f"# {filename}\n\n[규칙 작성]"), encoding='utf-8')
+        if not fileio.exists(file_path):
+            fileio.write_text(file_path, rule_contents.get(filename, f"# {filename}\n\n[규칙 작성]"))
             created.append(filename)
 
     # rules.index.json 생성
@@ -108,7 +119,7 @@ async def init_rules(path: str, template: str) -> list[TextContent]:
         ]
     }
     index_file = rules_dir / "rules.index.json"
-    index_file.write_text(json.dumps(index_content, indent=2, ensure_ascii=False), encoding='utf-8')
+    fileio.write_text(index_file, json.dumps(index_content, indent=2, ensure_ascii=False))
 
     created_list = "\n".join(f"- {f}" for f in created) if created else "없음 (이미 존재)"
 
@@ -136,12 +147,12 @@ async def get_rule(path: str, context: str) -> list[TextContent]:
     file_path = Path(path)
 
     # 프로젝트 루트 찾기
-    current = file_path if file_path.is_dir() else file_path.parent
+    current = file_path if fileio.is_dir(file_path) else file_path.parent
     rules_dir = None
 
     for _ in range(10):  # 최대 10레벨 상위까지
         potential = current / ".claude" / "rules"
-        if potential.exists():
+        if fileio.exists(potential):
             rules_dir = potential
             break
         if current.parent == current:
@@ -151,10 +162,23 @@ async def get_rule(path: str, context: str) -> list[TextContent]:
     if not rules_dir:
         return [TextContent(type="text", text="❌ .claude/rules/ 폴더를 찾을 수 없습니다. `init_rules`로 먼저 생성하세요.")]
 
-    # 규칙 파일 로딩
-    rules = []
-    for rule_file in rules_dir.glob("*.md"):
-        rules.append(f"## {rule_file.stem}\n\n{rule_file.read_text(encoding='utf-8')}")
+    # 규칙 파일 로딩 (폴더 fingerprint가 그대로면 이전에 읽은 내용 재사용)
+    key = cache_key(rules_dir, max_depth=0)
+    with _rules_lock:
+        cached = _rules_cache.get(str(rules_dir))
+        if cached is not None:
+            _rules_cache.move_to_end(str(rules_dir))
+    if cached is not None and cached[0] == key:
+        rules = cached[1]
+    else:
+        rules = []
+        for rule_file in rules_dir.glob("*.md"):
+            rules.append(f"## {rule_file.stem}\n\n{fileio.read_text(rule_file)}")
+        with _rules_lock:
+            _rules_cache[str(rules_dir)] = (key, rules)
+            _rules_cache.move_to_end(str(rules_dir))
+            while len(_rules_cache) > _RULES_CACHE_SIZE:
+                _rules_cache.popitem(last=False)
 
     if not rules:
         return [TextContent(type="text", text="❌ 규칙 파일이 없습니다.")]
@@ -176,7 +200,7 @@ async def add_rule(path: str, rule_type: str, content: str, category: str) -> li
     project_path = Path(path)
     rules_dir = project_path / ".claude" / "rules"
 
-    if not rules_dir.exists():
+    if not fileio.exists(rules_dir):
         return [TextContent(type="text", text="❌ .claude/rules/ 폴더가 없습니다. `init_rules`로 먼저 생성하세요.")]
 
     # 카테고리 파일 선택
@@ -190,19 +214,19 @@ async def add_rule(path: str, rule_type: str, content: str, category: str) -> li
     target_file = rules_dir / category_files.get(category, "global.md")
 
     # 파일이 없으면 생성
-    if not target_file.exists():
-        target_file.write_text(f"# {category.title()} Rules\n\n", encoding='utf-8')
+    if not fileio.exists(target_file):
+        fileio.write_text(target_file, f"# {category.title()} Rules\n\n")
 
     # 규칙 추가
-    existing = target_file.read_text(encoding='utf-8')
+    existing = fileio.read_text(target_file)
     rule_section = f"\n## {rule_type.upper()}\n- {content}\n"
 
     # 같은 타입 섹션이 있으면 거기에 추가
     if f"## {rule_type.upper()}" in existing:
         existing = existing.replace(f"## {rule_type.upper()}\n", f"## {rule_type.upper()}\n- {content}\n")
-        target_file.write_text(existing, encoding='utf-8')
+        fileio.write_text(target_file, existing)
     else:
-        target_file.write_text(existing + rule_section, encoding='utf-8')
+        fileio.write_text(target_file, existing + rule_section)
 
     return [TextContent(type="text", text=f"""# 규칙 추가 완료
 
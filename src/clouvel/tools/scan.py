@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""프로젝트 트리 탐색 (테스트 파일 검색용)
+
+os.scandir 기반 단일 패스 워커
+- node_modules, .git, .venv, 빌드 결과물 등은 들어가지 않음 (DEFAULT_PRUNE)
+- 각 디렉토리의 .gitignore 규칙 적용
+- 심볼릭 링크 디렉토리는 따라가지 않음, 최대 깊이 제한
+- 시간/항목 수 예산(ScanBudget)을 넘으면 멈추고, 나중에 이어서 탐색 가능
+"""
+
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .. import cancel, config, metrics
+
+# 항상 건너뛰는 디렉토리 이름
+DEFAULT_PRUNE = frozenset({
+    ".git", ".hg", ".svn",
+    "node_modules", "bower_components", ".pnpm-store", ".yarn",
+    ".venv", "venv", "__pycache__", ".tox", ".nox",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache",
+    "dist", "build", "target", "coverage", ".next", ".nuxt", ".turbo", ".cache",
+    ".clouvel",
+})
+
+# 테스트 파일 패턴 (하나의 정규식으로 합침)
+TEST_FILE_RE = re.compile(r"(?:test_.*\.py|.*_test\.py|.*\.test\.(?:ts|js)|.*\.spec\.(?:ts|js))$", re.IGNORECASE)
+
+
+# ============================================================
+# .gitignore
+# ============================================================
+
+def _glob_to_regex(pattern: str) -> str:
+    """gitignore glob → 정규식 (**, *, ?, [...] 지원)"""
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**/", i):
+                out.append("(?:.*/)?")
+                i += 3
+                continue
+            if pattern.startswith("**", i):
+                out.append(".*")
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+@dataclass
+class IgnoreRule:
+    """.gitignore 한 줄"""
+    regex: re.Pattern
+    negate: bool
+    dir_only: bool
+    anchored: bool  # 경로 전체와 비교 (아니면 이름만)
+
+
+def parse_gitignore(text: str) -> list[IgnoreRule]:
+    """.gitignore 내용 파싱"""
+    rules = []
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        line = line.lstrip("/")
+        rules.append(IgnoreRule(
+            regex=re.compile(_glob_to_regex(line) + "$"),
+            negate=negate,
+            dir_only=dir_only,
+            anchored=anchored,
+        ))
+    return rules
+
+
+def _is_ignored(rule_sets: list[tuple[str, list[IgnoreRule]]], rel_path: str, name: str, is_dir: bool) -> bool:
+    """상위 .gitignore부터 차례로 적용, 마지막으로 맞은 규칙이 결정"""
+    ignored = False
+    for base, rules in rule_sets:
+        sub_path = rel_path[len(base):] if base else rel_path
+        for rule in rules:
+            if rule.dir_only and not is_dir:
+                continue
+            target = sub_path if rule.anchored else name
+            if rule.regex.match(target):
+                ignored = not rule.negate
+    return ignored
+
+
+# ============================================================
+# 예산
+# ============================================================
+
+@dataclass
+class ScanBudget:
+    """탐색 예산 - 시간(ms) 또는 살펴본 항목 수가 넘으면 중단
+    하나의 도구 호출 안의 여러 탐색이 같은 예산을 나눠 씀
+    """
+    budget_ms: float | None = None
+    max_entries: int | None = None
+    entries: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def from_config(cls, budget_ms: float | None = None, max_entries: int | None = None) -> "ScanBudget":
+        """호출 인자가 없으면 서버 설정값 사용 (0 이하 = 무제한)"""
+        if budget_ms is None:
+            budget_ms = config.scan_budget_ms()
+        if max_entries is None:
+            max_entries = config.scan_max_entries()
+        return cls(
+            budget_ms=budget_ms if budget_ms > 0 else None,
+            max_entries=max_entries if max_entries > 0 else None,
+        )
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.started) * 1000
+
+    def charge(self, count: int) -> None:
+        self.entries += count
+
+    @property
+    def exhausted(self) -> bool:
+        if self.max_entries is not None and self.entries >= self.max_entries:
+            return True
+        return self.budget_ms is not None and self.elapsed_ms >= self.budget_ms
+
+
+def truncation_note(entries: int, elapsed_ms: float) -> str:
+    """부분 결과 표시 문구"""
+    return f"{entries:,}개 항목 / {elapsed_ms:.0f}ms 후 중단 (부분 결과)"
+
+
+# ============================================================
+# Walker
+# ============================================================
+
+@dataclass
+class ScanResult:
+    """테스트 탐색 결과"""
+    files: list[str] = field(default_factory=list)        # 프로젝트 기준 상대 경로 (중복 없음)
+    mtimes: dict[str, int] = field(default_factory=dict)   # 방문한 디렉토리/읽은 .gitignore → mtime_ns
+    markers: dict[str, list[str]] = field(default_factory=dict)  # 상대 디렉토리 → 찾은 표식 파일/폴더 이름
+    entries: int = 0                                       # 살펴본 항목 수
+    truncated: bool = False                                # 예산 초과로 중단됨
+    elapsed_ms: float = 0.0
+
+
+class ProjectWalker:
+    """프로젝트 트리를 한 번만 돌면서 테스트 파일 수집
+    markers: 같이 기록할 파일/폴더 이름 (예: pyproject.toml → 패키지 루트 찾기)
+    예산을 넘으면 남은 디렉토리를 보관하고 멈춤 → run()을 다시 부르면 이어서 탐색
+    """
+
+    def __init__(
+        self,
+        project_path: Path,
+        max_depth: int | None = None,
+        prune: frozenset[str] = DEFAULT_PRUNE,
+        use_gitignore: bool = True,
+        markers: frozenset[str] = frozenset(),
+    ):
+        self.project_path = project_path
+        self.max_depth = config.scan_max_depth() if max_depth is None else max_depth
+        self.prune = prune
+        self.use_gitignore = use_gitignore
+        self.markers = markers
+        self.result = ScanResult()
+        # (절대 경로, 상대 경로 접두사, 깊이, 적용할 .gitignore 규칙)
+        self._stack: list[tuple[str, str, int, list[tuple[str, list[IgnoreRule]]]]] = [
+            (str(project_path), "", 0, [])
+        ]
+
+    @property
+    def done(self) -> bool:
+        return not self._stack
+
+    def run(self, budget: ScanBudget | None = None) -> ScanResult:
+        """탐색 (budget이 없으면 끝까지)"""
+        started = time.monotonic()
+        result = self.result
+        stack = self._stack
+
+        while stack:
+            if budget is not None and budget.exhausted:
+                break
+            cancel.checkpoint()
+            dir_path, rel_prefix, depth, rule_sets = stack.pop()
+            metrics.touch(dir_path)
+            try:
+                result.mtimes[dir_path] = os.stat(dir_path).st_mtime_ns
+                with os.scandir(dir_path) as it:
+                    entries = list(it)
+            except OSError:
+                # 접근 권한 없음, 탐색 중 삭제됨 등 무시
+                continue
+            if budget is not None:
+                budget.charge(len(entries))
+
+            if self.use_gitignore:
+                for entry in entries:
+                    if entry.name == ".gitignore":
+                        metrics.touch(entry.path)
+                        try:
+                            result.mtimes[entry.path] = entry.stat().st_mtime_ns
+                            with open(entry.path, encoding="utf-8", errors="ignore") as f:
+                                rules = parse_gitignore(f.read())
+                        except OSError:
+                            rules = []
+                        if rules:
+                            rule_sets = rule_sets + [(rel_prefix, rules)]
+                        break
+
+            for entry in entries:
+                result.entries += 1
+                name = entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+
+                if is_dir and name in self.prune:
+                    continue
+                rel_path = rel_prefix + name
+                if rule_sets and _is_ignored(rule_sets, rel_path, name, is_dir):
+                    continue
+                if name in self.markers:
+                    result.markers.setdefault(rel_prefix.rstrip("/"), []).append(name)
+
+                if is_dir:
+                    if depth < self.max_depth:
+                        stack.append((entry.path, rel_path + "/", depth + 1, rule_sets))
+                elif TEST_FILE_RE.match(name):
+                    result.files.append(rel_path if os.sep == "/" else rel_path.replace("/", os.sep))
+
+        result.truncated = bool(stack)
+        elapsed_ms = (time.monotonic() - started) * 1000
+        result.elapsed_ms += elapsed_ms
+        metrics.record_scan("walk", elapsed_ms)
+        result.files.sort()
+        return result
+
+
+def find_test_files(
+    project_path: Path,
+    max_depth: int | None = None,
+    prune: frozenset[str] = DEFAULT_PRUNE,
+    use_gitignore: bool = True,
+    budget: ScanBudget | None = None,
+) -> ScanResult:
+    """프로젝트 트리를 한 번만 돌면서 테스트 파일 수집"""
+    return ProjectWalker(project_path, max_depth, prune, use_gitignore).run(budget)
@@ -5,6 +5,8 @@ import json
 from pathlib import Path
 from mcp.types import TextContent
 
+from .. import fileio
+
 
 async def init_clouvel(platform: str) -> list[TextContent]:
     """Clouvel 온보딩"""
@@ -74,7 +76,7 @@ async def setup_cli(path: str, level: str) -> list[TextContent]:
     """CLI 환경 설정"""
     project_path = Path(path).resolve()
 
-    if not project_path.exists():
+    if not fileio.exists(project_path):
         return [TextContent(type="text", text=f"❌ 경로가 존재하지 않습니다: {path}")]
 
     created_files = []
@@ -101,7 +103,7 @@ async def setup_cli(path: str, level: str) -> list[TextContent]:
             }
         }
         hooks_file = claude_dir / "hooks.json"
-        hooks_file.write_text(json.dumps(hooks_content, indent=2, ensure_ascii=False), encoding='utf-8')
+        fileio.write_text(hooks_file, json.dumps(hooks_content, indent=2, ensure_ascii=False))
         created_files.append(".claude/hooks.json")
 
     # 3. CLAUDE.md 규칙
@@ -117,19 +119,19 @@ async def setup_cli(path: str, level: str) -> list[TextContent]:
 3. **PRD가 법**: docs/PRD.md에 없는 기능은 구현하지 않음
 """
 
-    if claude_md.exists():
-        existing = claude_md.read_text(encoding='utf-8')
+    if fileio.exists(claude_md):
+        existing = fileio.read_text(claude_md)
         if "Clouvel 규칙" not in existing:
-            claude_md.write_text(existing + "\n" + clouvel_rule, encoding='utf-8')
+            fileio.write_text(claude_md, existing + "\n" + clouvel_rule)
             created_files.append("CLAUDE.md (규칙 추가)")
     else:
-        claude_md.write_text(f"# {project_path.name}\n" + clouvel_rule, encoding='utf-8')
+        fileio.write_text(claude_md, f"# {project_path.name}\n" + clouvel_rule)
         created_files.append("CLAUDE.md (생성)")
 
     # 4. pre-commit hook (strict, full)
     if level in ["strict", "full"]:
         git_hooks_dir = project_path / ".git" / "hooks"
-        if git_hooks_dir.exists():
+        if fileio.exists(git_hooks_dir):
             pre_commit = git_hooks_dir / "pre-commit"
             pre_commit_content = '''#!/bin/sh
 # Clouvel pre-commit hook
@@ -141,7 +143,7 @@ if ! ls "$DOCS_DIR"/*[Pp][Rr][Dd]* 1> /dev/null 2>&1; then
 fi
 echo "[Clouvel] Document check passed."
 '''
-            pre_commit.write_text(pre_commit_content, encoding='utf-8')
+            fileio.write_text(pre_commit, pre_commit_content)
             created_files.append(".git/hooks/pre-commit")
 
     files_list = "\n".join(f"- {f}" for f in created_files) if created_files else "없음"
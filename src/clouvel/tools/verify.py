@@ -5,6 +5,8 @@ from pathlib import Path
 from datetime import datetime
 from mcp.types import TextContent
 
+from .. import fileio
+
 
 async def verify(path: str, scope: str, checklist: list) -> list[TextContent]:
     """Context Bias 제거 검증"""
@@ -71,7 +73,7 @@ async def gate(path: str, steps: list, fix: bool) -> list[TextContent]:
     """Gate 검증 자동화"""
     project_path = Path(path)
 
-    if not project_path.exists():
+    if not fileio.exists(project_path):
         return [TextContent(type="text", text=f"❌ 경로가 존재하지 않습니다: {path}")]
 
     # 기본 단계
@@ -112,7 +114,7 @@ async def gate(path: str, steps: list, fix: bool) -> list[TextContent]:
 
     # EVIDENCE.md 생성
     evidence_file = project_path / "EVIDENCE.md"
-    evidence_file.write_text(evidence_template, encoding='utf-8')
+    fileio.write_text(evidence_file, evidence_template)
 
     return [TextContent(type="text", text=f"""# Gate 검증 시작
 
@@ -139,7 +141,7 @@ async def handoff(path: str, feature: str, decisions: str, warnings: str, next_s
     """의도 기록"""
     project_path = Path(path)
 
-    if not project_path.exists():
+    if not fileio.exists(project_path):
         return [TextContent(type="text", text=f"❌ 경로가 존재하지 않습니다: {path}")]
 
     handoffs_dir = project_path / ".claude" / "handoffs"
@@ -190,7 +192,7 @@ async def handoff(path: str, feature: str, decisions: str, warnings: str, next_s
 4. 커밋
 
 """
-    handoff_file.write_text(content, encoding='utf-8')
+    fileio.write_text(handoff_file, content)
 
     return [TextContent(type="text", text=f"""# Handoff 기록 완료
 
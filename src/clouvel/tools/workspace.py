@@ -0,0 +1,408 @@
+# -*- coding: utf-8 -*-
+"""모노레포 워크스페이스 모드 (can_code / analyze_docs)
+
+패키지마다 can_code를 따로 부르면 패키지 수만큼 트리 전체를 다시 탐색함.
+- 저장소를 한 번만 돌면서 패키지 루트(pyproject.toml, package.json, go.mod)와 테스트 파일을 같이 수집
+- pnpm-workspace.yaml(packages) 또는 루트 package.json(workspaces)이 있으면 JS 패키지는 그 glob에 맞는 것만
+  ("!"로 시작하는 항목은 제외 패턴)
+- 테스트 파일은 가장 가까운(깊은) 패키지에 귀속
+- 패키지별 docs/PRD 검사는 스레드 풀에서 동시에
+- 탐색 결과 / 패키지별 docs 판정은 프로젝트 fingerprint 기준으로 캐시
+  (트리가 바뀌어도 탐색한 디렉토리가 그대로면 재사용, docs 판정은 그 패키지 docs 하위 트리 digest가 키)
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from pathlib import Path
+
+from mcp.types import TextContent
+
+from .. import cancel, config, fileio
+from .core import (
+    REQUIRED_DOCS, _RACY_WINDOW_NS, _classify_docs, _find_prd_file, _check_prd_sections, _prd_key,
+    _warm_in_background, list_docs,
+)
+from .fingerprint import project_tree
+from .output import OUTPUT_MARKDOWN, error, join, output_mode, render
+from .scan import ProjectWalker, ScanBudget, truncation_note
+
+PACKAGE_MARKERS = frozenset({"pyproject.toml", "package.json", "go.mod"})
+WORKSPACE_FILES = ("pnpm-workspace.yaml", "package.json")
+
+_WORKSPACE_CACHE_SIZE = 16
+_PACKAGE_CACHE_SIZE = 256
+
+VERDICT_ICONS = {"BLOCK": "⛔ BLOCK", "WARN": "⚠️ WARN", "PASS": "✅ PASS"}
+
+
+@dataclass
+class Package:
+    """워크스페이스 안의 패키지 하나"""
+    root: Path
+    rel: str                  # 저장소 기준 상대 경로 ("" = 저장소 루트)
+    kinds: list[str]          # 찾은 표식 파일
+    has_docs: bool
+    test_count: int = 0
+
+    @property
+    def label(self) -> str:
+        return self.rel or "."
+
+
+@dataclass
+class PackageVerdict:
+    """패키지 하나의 can_code / analyze_docs 결과"""
+    package: Package
+    verdict: str
+    missing_critical: list[str] = field(default_factory=list)
+    warn_items: list[str] = field(default_factory=list)
+    detected: list[str] = field(default_factory=list)
+    missing: list[str] = field(default_factory=list)
+    coverage: float = 0.0
+
+
+@dataclass
+class Workspace:
+    """한 번의 탐색으로 찾은 패키지들"""
+    root: Path
+    packages: list[Package]
+    truncated: bool = False
+    entries: int = 0
+    elapsed_ms: float = 0.0
+    # 캐시 검사용: 탐색한 디렉토리 / .gitignore / 워크스페이스 설정 → mtime_ns, 마지막 확인 때 fingerprint
+    mtimes: dict[str, int] = field(default_factory=dict)
+    built_ns: int = 0
+    tree_digest: str | None = None
+
+
+# 저장소 루트 → 탐색 결과, 패키지 docs 경로 → (docs 하위 트리 digest, docs 판정)
+_workspaces: "OrderedDict[str, Workspace]" = OrderedDict()
+_package_docs: "OrderedDict[str, tuple[str, tuple]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_get(cache: OrderedDict, key: str):
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _cache_put(cache: OrderedDict, key: str, value, size: int) -> None:
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > size:
+            cache.popitem(last=False)
+
+
+def clear_workspace_cache() -> None:
+    with _cache_lock:
+        _workspaces.clear()
+        _package_docs.clear()
+
+
+def _pnpm_globs(root: Path) -> list[str] | None:
+    """pnpm-workspace.yaml의 packages 목록 (없으면 None, 단순한 목록 형식만 읽음)"""
+    try:
+        text = fileio.read_text(root / "pnpm-workspace.yaml")
+    except OSError:
+        return None
+    globs = []
+    in_packages = False
+    for line in text.splitlines():
+        content = line.split("#", 1)[0].rstrip()
+        if not content.strip():
+            continue
+        if not line[0].isspace():
+            in_packages = content == "packages:"
+            continue
+        item = content.strip()
+        if in_packages and item.startswith("-"):
+            globs.append(item[1:].strip().strip("'\""))
+    return globs
+
+
+def _workspace_globs(root: Path) -> list[str] | None:
+    """워크스페이스 glob - pnpm-workspace.yaml 우선, 없으면 루트 package.json의 workspaces (둘 다 없으면 None)"""
+    globs = _pnpm_globs(root)
+    if globs is not None:
+        return [_normalize_glob(g) for g in globs]
+    try:
+        data = json.loads(fileio.read_text(root / "package.json"))
+    except (OSError, ValueError):
+        return None
+    workspaces = data.get("workspaces") if isinstance(data, dict) else None
+    if isinstance(workspaces, dict):
+        workspaces = workspaces.get("packages")
+    if not isinstance(workspaces, list):
+        return None
+    return [_normalize_glob(g) for g in workspaces if isinstance(g, str)]
+
+
+def _normalize_glob(pattern: str) -> str:
+    negated = pattern.startswith("!")
+    pattern = pattern.removeprefix("!").removeprefix("./").rstrip("/")
+    return "!" + pattern if negated else pattern
+
+
+def _matches_workspace(rel: str, pattern: str) -> bool:
+    """workspaces glob 비교 (* 는 경로 한 단계, ** 는 여러 단계)"""
+    if "**" in pattern:
+        return fnmatch(rel, pattern)
+    parts = rel.split("/")
+    pattern_parts = pattern.split("/")
+    return len(parts) == len(pattern_parts) and all(fnmatch(a, b) for a, b in zip(parts, pattern_parts))
+
+
+def _in_workspace(rel: str, globs: list[str]) -> bool:
+    """포함 glob 중 하나에 맞고 제외("!") glob에는 안 맞는지"""
+    included = any(_matches_workspace(rel, g) for g in globs if not g.startswith("!"))
+    return included and not any(_matches_workspace(rel, g[1:]) for g in globs if g.startswith("!"))
+
+
+def _cached_workspace(root: Path) -> Workspace | None:
+    """프로젝트 fingerprint 기준으로 바뀌지 않은 이전 탐색 결과"""
+    cached = _cache_get(_workspaces, str(root))
+    if cached is None:
+        return None
+    tree = project_tree(root)
+    if not tree.digest:
+        _warm_in_background(f"tree:{tree.root}", tree.refresh)
+        return None
+    digest = tree.refresh()
+    if digest != cached.tree_digest:
+        if tree.deps_changed(cached.tree_digest, cached.mtimes, cached.built_ns - _RACY_WINDOW_NS):
+            return None
+        cached.tree_digest = digest
+    return cached
+
+
+def discover_workspace(root: Path, budget: ScanBudget | None = None) -> Workspace:
+    """저장소를 한 번 돌면서 패키지 루트 + 패키지별 테스트 수 수집 (바뀐 게 없으면 이전 결과)"""
+    cached = _cached_workspace(root)
+    if cached is not None:
+        return cached
+
+    built_ns = time.time_ns()
+    walker = ProjectWalker(root, markers=PACKAGE_MARKERS | {"docs"})
+    scan = walker.run(budget)
+    globs = _workspace_globs(root)
+
+    packages: dict[str, Package] = {}
+    for rel, names in scan.markers.items():
+        kinds = sorted(PACKAGE_MARKERS.intersection(names))
+        if not kinds:
+            continue
+        if rel and kinds == ["package.json"] and globs is not None and not _in_workspace(rel, globs):
+            continue
+        packages[rel] = Package(root=root / rel if rel else root, rel=rel, kinds=kinds, has_docs="docs" in names)
+
+    # 저장소 루트는 자체 docs가 있거나 다른 패키지가 없을 때만 패키지로 취급
+    if "" in packages and not packages[""].has_docs and len(packages) > 1:
+        del packages[""]
+    if not packages:
+        names = scan.markers.get("", [])
+        packages[""] = Package(root=root, rel="", kinds=[], has_docs="docs" in names)
+
+    # 테스트 파일 → 가장 깊은 패키지
+    for file_path in scan.files:
+        rel_dir = os.path.dirname(file_path.replace(os.sep, "/"))
+        while True:
+            if rel_dir in packages:
+                packages[rel_dir].test_count += 1
+                break
+            if not rel_dir:
+                break
+            rel_dir = os.path.dirname(rel_dir)
+
+    mtimes = dict(scan.mtimes)
+    for name in WORKSPACE_FILES:
+        st = fileio.stat(root / name)
+        if st is not None:
+            mtimes[str(root / name)] = st.st_mtime_ns
+    workspace = Workspace(
+        root=root,
+        packages=[packages[rel] for rel in sorted(packages)],
+        truncated=scan.truncated,
+        entries=scan.entries,
+        elapsed_ms=scan.elapsed_ms,
+        mtimes=mtimes,
+        built_ns=built_ns,
+    )
+    if not workspace.truncated:
+        _cache_put(_workspaces, str(root), workspace, _WORKSPACE_CACHE_SIZE)
+        tree = project_tree(root)
+        if not tree.digest:
+            _warm_in_background(f"tree:{tree.root}", tree.refresh)
+    return workspace
+
+
+def _check_package_docs(docs_path: Path) -> tuple:
+    """docs 목록 + PRD 섹션 → (detected_critical, detected_warn, missing_critical, missing_warn,
+    prd_missing_critical, prd_missing_warn)"""
+    listing = list_docs(docs_path)
+    detected_critical, detected_warn, missing_critical, missing_warn = _classify_docs(listing.file_names)
+
+    prd_missing_critical: list[str] = []
+    prd_missing_warn: list[str] = []
+    prd_file = _find_prd_file(docs_path, listing.file_names)
+    if prd_file:
+        _, prd_missing_critical, prd_missing_warn = _check_prd_sections(prd_file, key=_prd_key(prd_file))
+    return detected_critical, detected_warn, missing_critical, missing_warn, prd_missing_critical, prd_missing_warn
+
+
+def evaluate_package(package: Package, docs_key: str | None = None) -> PackageVerdict:
+    """패키지 하나의 docs/PRD 검사 (테스트 수는 공유 탐색 결과 사용)
+    docs_key: docs 하위 트리 digest - 지난번과 같으면 docs/PRD를 다시 읽지 않음
+    """
+    cancel.checkpoint()
+    docs_path = package.root / "docs"
+    if not package.has_docs or not fileio.is_dir(docs_path):
+        return PackageVerdict(
+            package=package,
+            verdict="BLOCK",
+            missing_critical=["docs 폴더"],
+            missing=[req["name"] for req in REQUIRED_DOCS],
+        )
+
+    cached = _cache_get(_package_docs, str(docs_path)) if docs_key is not None else None
+    if cached is not None and cached[0] == docs_key:
+        result = cached[1]
+    else:
+        result = _check_package_docs(docs_path)
+        if docs_key is not None:
+            _cache_put(_package_docs, str(docs_path), (docs_key, result), _PACKAGE_CACHE_SIZE)
+    detected_critical, detected_warn, missing_critical, missing_warn, prd_missing_critical, prd_missing_warn = result
+
+    warn_items = missing_warn + [f"PRD.{s}" for s in prd_missing_warn]
+    if package.test_count == 0:
+        warn_items.append("테스트")
+    blockers = missing_critical + [f"PRD의 {s} 섹션" for s in prd_missing_critical]
+
+    critical_total = len([req for req in REQUIRED_DOCS if req["priority"] == "critical"])
+
+    return PackageVerdict(
+        package=package,
+        verdict="BLOCK" if blockers else ("WARN" if warn_items else "PASS"),
+        missing_critical=blockers,
+        warn_items=warn_items,
+        detected=detected_critical + detected_warn,
+        missing=missing_critical + missing_warn,
+        coverage=(critical_total - len(missing_critical)) / critical_total if critical_total else 1.0,
+    )
+
+
+def evaluate_workspace(root: Path, budget: ScanBudget | None = None) -> tuple[Workspace, list[PackageVerdict]]:
+    """패키지 탐색 + 패키지별 검사 (동시 실행, 결과는 패키지 경로 순)"""
+    workspace = discover_workspace(root, budget)
+    # 탐색 결과를 fingerprint로 확인했으면 트리가 최신 → 패키지별 docs 하위 트리 digest를 키로
+    tree = project_tree(root)
+    keys = [
+        tree.subtree_digest(f"{package.rel}/docs" if package.rel else "docs") if workspace.tree_digest else None
+        for package in workspace.packages
+    ]
+    workers = min(config.io_workers(), max(len(workspace.packages), 1))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="clouvel-workspace") as executor:
+        verdicts = list(executor.map(cancel.bind(evaluate_package), workspace.packages, keys))
+    return workspace, verdicts
+
+
+def _partial_note(workspace: Workspace) -> str:
+    if not workspace.truncated:
+        return ""
+    note = truncation_note(workspace.entries, workspace.elapsed_ms)
+    return f"\n> ⏱️ {note} - 일부 패키지만 검사됨 (budget_ms / max_entries를 늘려서 다시 호출)\n"
+
+
+def _workspace_root(path: str) -> Path:
+    """저장소 루트 (습관처럼 docs 폴더를 넘겨도 그 상위를 루트로)"""
+    root = Path(path).absolute()
+    return root.parent if root.name == "docs" else root
+
+
+async def can_code_workspace(path: str, budget_ms: float | None = None, max_entries: int | None = None,
+                             output: str = OUTPUT_MARKDOWN) -> list[TextContent]:
+    """모노레포 전체 can_code - 패키지별 판정표 + BLOCK/WARN 상세"""
+    mode = output_mode(output)
+    root = _workspace_root(path)
+    if not fileio.is_dir(root):
+        return error(mode, "can_code", "not_found", f"경로 없음: {path}", path=path)
+
+    workspace, verdicts = evaluate_workspace(root, ScanBudget.from_config(budget_ms, max_entries))
+    counts = {name: len([v for v in verdicts if v.verdict == name]) for name in VERDICT_ICONS}
+    overall = "BLOCK" if counts["BLOCK"] else ("WARN" if counts["WARN"] else "PASS")
+
+    if mode != OUTPUT_MARKDOWN:
+        data = {
+            "tool": "can_code",
+            "status": overall,
+            "ok": overall != "BLOCK",
+            "partial": workspace.truncated,
+            "packages": [
+                {
+                    "package": v.package.label,
+                    "status": v.verdict,
+                    "missing_critical": v.missing_critical,
+                    "warn": v.warn_items,
+                    "tests": v.package.test_count,
+                }
+                for v in verdicts
+            ],
+        }
+        compact = f"{overall} | " + "; ".join(f"{v.package.label} {v.verdict}" for v in verdicts)
+        return render(mode, data, compact)
+
+    result = f"# {VERDICT_ICONS[overall]} | 워크스페이스 {len(verdicts)}개 패키지"
+    result += f" | ⛔ {counts['BLOCK']} ⚠️ {counts['WARN']} ✅ {counts['PASS']}\n\n"
+    result += "| 패키지 | 판정 | 필수 없음 | 권장 없음 | 테스트 |\n|---|---|---|---|---|\n"
+    for v in verdicts:
+        result += f"| {v.package.label} | {VERDICT_ICONS[v.verdict]} | {join(v.missing_critical)} | {join(v.warn_items)} | {v.package.test_count} |\n"
+
+    blocked = [v for v in verdicts if v.verdict == "BLOCK"]
+    if blocked:
+        result += "\n## ⛔ BLOCK 패키지\n"
+        for v in blocked:
+            result += f"\n### {v.package.label}\n- 없음 (필수): {join(v.missing_critical)}\n- 있음: {join(v.detected)}\n"
+        result += "\n**BLOCK 패키지는 코드를 작성하지 마세요. 해당 패키지의 문서를 먼저 작성하세요.**\n"
+
+    return [TextContent(type="text", text=result + _partial_note(workspace))]
+
+
+async def analyze_docs_workspace(path: str, budget_ms: float | None = None, max_entries: int | None = None,
+                                 output: str = OUTPUT_MARKDOWN) -> list[TextContent]:
+    """모노레포 전체 analyze_docs - 패키지별 커버리지 / 없는 문서"""
+    mode = output_mode(output)
+    root = _workspace_root(path)
+    if not fileio.is_dir(root):
+        return error(mode, "analyze_docs", "not_found", f"경로 없음: {path}", path=path)
+
+    workspace, verdicts = evaluate_workspace(root, ScanBudget.from_config(budget_ms, max_entries))
+
+    if mode != OUTPUT_MARKDOWN:
+        data = {
+            "tool": "analyze_docs",
+            "partial": workspace.truncated,
+            "packages": [
+                {"package": v.package.label, "coverage": round(v.coverage, 2), "detected": v.detected, "missing": v.missing}
+                for v in verdicts
+            ],
+        }
+        compact = "; ".join(f"{v.package.label} {v.coverage:.0%}" for v in verdicts)
+        return render(mode, data, compact)
+    complete = len([v for v in verdicts if not v.missing])
+
+    result = f"## 워크스페이스 분석: {path}\n\n"
+    result += f"패키지 {len(verdicts)}개 | 필수 문서 다 있음 {complete}개\n\n"
+    result += "| 패키지 | 커버리지 | 없음 (작성 필요) |\n|---|---|---|\n"
+    for v in verdicts:
+        result += f"| {v.package.label} | {v.coverage:.0%} | {join(v.missing)} |\n"
+
+    return [TextContent(type="text", text=result + _partial_note(workspace))]
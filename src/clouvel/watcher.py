@@ -0,0 +1,422 @@
+# -*- coding: utf-8 -*-
+"""
+파일 시스템 감시 (선택 기능)
+
+서버가 세션 내내 떠 있는 동안 can_code가 본 프로젝트의
+docs 폴더 / PRD / 테스트 탐색 디렉토리를 감시해서,
+바뀐 프로젝트의 캐시만 무효화하도록 알려줌.
+
+- Linux: inotify (ctypes, 추가 의존성 없음)
+- 그 외 / inotify 실패: 주기적으로 stat 비교 (polling)
+- 감시 디렉토리 수 상한 (초과 시 오래 안 쓴 프로젝트부터 해제)
+- 일정 시간 안 쓴 프로젝트는 감시 해제 (다음 호출부터 다시 stat 검사)
+- 리스너(add_listener): 이벤트가 온 디렉토리 / 감시가 풀린 디렉토리를 전달 (fingerprint 트리의 부분 갱신)
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from . import config
+
+BACKEND_INOTIFY = "inotify"
+BACKEND_POLLING = "polling"
+
+# inotify 이벤트 (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_DONT_FOLLOW = 0x02000000
+
+# 디렉토리 항목 변화 (= 디렉토리 mtime 변화)
+_ENTRY_EVENTS = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+# 파일 내용 변화 (감시 중인 파일일 때만 의미 있음)
+_CONTENT_EVENTS = IN_MODIFY | IN_CLOSE_WRITE | IN_ATTRIB
+_WATCH_MASK = _ENTRY_EVENTS | _CONTENT_EVENTS | IN_DONT_FOLLOW
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+OnChange = Callable[[str], None]
+# 바뀐 디렉토리 묶음 (None = 알 수 없음, 전부 다시 확인)
+Listener = Callable[[Optional[set[str]]], None]
+
+
+@dataclass
+class _Entry:
+    """감시 중인 프로젝트 하나"""
+    dirs: dict[str, int]                               # 디렉토리 → mtime_ns
+    files: dict[str, Optional[int]]                    # 파일 → mtime_ns (없던 파일이면 None)
+    on_change: OnChange
+    last_used: float = field(default_factory=time.monotonic)
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _changed(entry: _Entry) -> bool:
+    """기록된 mtime과 현재 mtime 비교"""
+    for path, mtime_ns in entry.dirs.items():
+        if _mtime_ns(path) != mtime_ns:
+            return True
+    for path, mtime_ns in entry.files.items():
+        if _mtime_ns(path) != mtime_ns:
+            return True
+    return False
+
+
+class _Inotify:
+    """inotify fd 하나 + 디렉토리별 watch descriptor (여러 프로젝트 공유는 Watcher가 관리)"""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify는 Linux 전용")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = [ctypes.c_int, ctypes.c_int]
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 실패")
+        self.fd = fd
+        self.wd_to_dir: dict[int, str] = {}
+        self.dir_to_wd: dict[str, int] = {}
+
+    def add(self, path: str) -> bool:
+        wd = self._add(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            return False
+        self.wd_to_dir[wd] = path
+        self.dir_to_wd[path] = wd
+        return True
+
+    def remove(self, path: str) -> None:
+        wd = self.dir_to_wd.pop(path, None)
+        if wd is not None:
+            self.wd_to_dir.pop(wd, None)
+            self._rm(self.fd, wd)
+
+    def wait(self, timeout: float) -> bool:
+        """읽을 이벤트가 있을 때까지 대기"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        return bool(ready)
+
+    def read(self, timeout: float) -> Optional[list[tuple[str, str, int]]]:
+        """이벤트 읽기 → [(디렉토리, 이름, mask)], 큐 넘침이면 None"""
+        if not self.wait(timeout):
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].split(b"\0", 1)[0]
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_IGNORED:
+                continue
+            directory = self.wd_to_dir.get(wd)
+            if directory is not None:
+                events.append((directory, os.fsdecode(name), mask))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class Watcher:
+    """프로젝트(key)별 감시 목록 관리 + 백그라운드 스레드"""
+
+    def __init__(
+        self,
+        backend: str = "auto",
+        max_dirs: int | None = None,
+        idle_seconds: float | None = None,
+        poll_seconds: float | None = None,
+    ):
+        self.max_dirs = config.watch_max_dirs() if max_dirs is None else max_dirs
+        self.idle_seconds = config.watch_idle_seconds() if idle_seconds is None else idle_seconds
+        self.poll_seconds = config.watch_poll_seconds() if poll_seconds is None else poll_seconds
+        self._inotify: _Inotify | None = None
+        if backend in ("auto", BACKEND_INOTIFY):
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError):
+                if backend == BACKEND_INOTIFY:
+                    raise
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._dir_keys: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self._read_lock = threading.Lock()     # inotify 읽기 + 처리 (백그라운드 스레드 / sync)
+        self._listeners: list[Listener] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def backend(self) -> str:
+        return BACKEND_INOTIFY if self._inotify is not None else BACKEND_POLLING
+
+    @property
+    def watched_dirs(self) -> int:
+        with self._lock:
+            return len(self._dir_keys)
+
+    # ---------- 등록 / 해제 ----------
+
+    def watch(
+        self,
+        key: str,
+        dirs: dict[str, int],
+        files: dict[str, Optional[int]],
+        on_change: OnChange,
+    ) -> bool:
+        """key의 감시 목록 교체
+        dirs / files: 경로 → 스냅샷 시점 mtime_ns
+        파일은 부모 디렉토리를 감시. 상한 초과 / 등록 후 이미 바뀌어 있으면 False
+        """
+        entry = _Entry(dirs=dict(dirs), files=dict(files), on_change=on_change)
+        needed = set(entry.dirs) | {os.path.dirname(path) for path in entry.files}
+        if len(needed) > self.max_dirs:
+            self.unwatch(key)
+            return False
+
+        with self._lock:
+            self._remove_locked(key)
+            # 오래 안 쓴 프로젝트부터 해제해서 자리 확보
+            while self._entries and len(set(self._dir_keys) | needed) > self.max_dirs:
+                self._remove_locked(next(iter(self._entries)))
+            for directory in needed:
+                if self._inotify is not None and directory not in self._dir_keys:
+                    if not self._inotify.add(directory):
+                        # 사라진 디렉토리 등 → 이미 바뀐 것
+                        self._entries[key] = entry
+                        self._remove_locked(key)
+                        return False
+                self._dir_keys.setdefault(directory, set()).add(key)
+            self._entries[key] = entry
+
+        # 스냅샷 생성 ~ 감시 등록 사이의 변경 확인
+        if _changed(entry):
+            self.unwatch(key)
+            return False
+        return True
+
+    def unwatch(self, key: str) -> None:
+        with self._lock:
+            self._remove_locked(key)
+
+    def _remove_locked(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        for directory in set(entry.dirs) | {os.path.dirname(path) for path in entry.files}:
+            keys = self._dir_keys.get(directory)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._dir_keys[directory]
+                if self._inotify is not None:
+                    self._inotify.remove(directory)
+                    # 감시가 풀린 뒤의 변경은 알림이 안 옴 → 리스너가 직접 확인하도록
+                    self._notify({directory})
+        return entry
+
+    def is_watched(self, key: str) -> bool:
+        """감시 중이고 변경 없음 (조회 = 사용으로 간주)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            entry.last_used = time.monotonic()
+            self._entries.move_to_end(key)
+            return True
+
+    def is_dir_watched(self, directory: str) -> bool:
+        """inotify로 감시 중인 디렉토리인지 (바뀌면 리스너에 알림이 옴)"""
+        with self._lock:
+            return self._inotify is not None and directory in self._dir_keys
+
+    def add_listener(self, listener: Listener) -> None:
+        """이벤트 디렉토리 알림 받기 (같은 리스너는 한 번만)
+        watcher 잠금 안에서 불릴 수 있음 → 빨리 끝나야 하고 watcher를 다시 부르면 안 됨
+        """
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def _notify(self, dirs: Optional[set[str]]) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(dirs)
+            except Exception:
+                pass
+
+    # ---------- 변경 처리 ----------
+
+    def _fire(self, keys: set[str]) -> None:
+        """바뀐 key는 감시 해제 후 콜백 (다시 만든 스냅샷으로 재등록)"""
+        callbacks = []
+        with self._lock:
+            for key in keys:
+                entry = self._remove_locked(key)
+                if entry is not None:
+                    callbacks.append((key, entry.on_change))
+        for key, on_change in callbacks:
+            try:
+                on_change(key)
+            except Exception:
+                pass
+
+    def _affected(self, directory: str, name: str, mask: int) -> set[str]:
+        with self._lock:
+            keys = self._dir_keys.get(directory, set())
+            if mask & _ENTRY_EVENTS:
+                return set(keys)
+            path = os.path.join(directory, name)
+            return {key for key in keys if path in self._entries[key].files}
+
+    def _expire_idle(self) -> None:
+        deadline = time.monotonic() - self.idle_seconds
+        with self._lock:
+            idle = [key for key, entry in self._entries.items() if entry.last_used < deadline]
+            for key in idle:
+                self._remove_locked(key)
+
+    def poll_once(self) -> None:
+        """polling: 모든 key의 stat 비교"""
+        with self._lock:
+            entries = list(self._entries.items())
+        changed = {key for key, entry in entries if _changed(entry)}
+        if changed:
+            self._fire(changed)
+
+    def _dispatch(self, events: Optional[list[tuple[str, str, int]]]) -> None:
+        """inotify 이벤트 처리: 리스너에 디렉토리 알림 → 바뀐 key 콜백"""
+        if events is None:
+            # 큐 넘침 → 전부 무효화
+            self._notify(None)
+            with self._lock:
+                keys = set(self._entries)
+            self._fire(keys)
+            return
+        if events:
+            self._notify({directory for directory, _, _ in events})
+        affected: set[str] = set()
+        for directory, name, mask in events:
+            affected |= self._affected(directory, name, mask)
+        if affected:
+            self._fire(affected)
+
+    def sync(self) -> bool:
+        """대기 중인 inotify 이벤트를 지금 처리
+        True면 이 호출 전의 변경은 모두 리스너에 전달됨. polling / 이벤트가 계속 밀려들면 False
+        """
+        with self._read_lock:
+            inotify = self._inotify
+            if inotify is None:
+                return False
+            try:
+                for _ in range(64):
+                    if not inotify.wait(0):
+                        return True
+                    self._dispatch(inotify.read(0))
+            except OSError:
+                return False
+        return False
+
+    def _run(self) -> None:
+        last_expire = time.monotonic()
+        while not self._stop.is_set():
+            inotify = self._inotify
+            if inotify is not None:
+                try:
+                    ready = inotify.wait(min(self.poll_seconds, 1.0))
+                except OSError:
+                    break
+                if ready:
+                    self.sync()
+            else:
+                self._stop.wait(self.poll_seconds)
+                self.poll_once()
+            now = time.monotonic()
+            if now - last_expire >= min(self.idle_seconds, 30):
+                self._expire_idle()
+                last_expire = now
+
+    def start(self) -> "Watcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="clouvel-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._lock:
+            for key in list(self._entries):
+                self._remove_locked(key)
+        with self._read_lock, self._lock:
+            inotify, self._inotify = self._inotify, None
+        if inotify is not None:
+            inotify.close()
+
+
+# ============================================================
+# 서버 전역 watcher
+# ============================================================
+
+_watcher: Watcher | None = None
+_watcher_lock = threading.Lock()
+
+
+def get_watcher() -> Watcher | None:
+    """실행 중인 watcher (없으면 None → 호출마다 stat 검사)"""
+    return _watcher
+
+
+def start_watcher(backend: str | None = None) -> Watcher | None:
+    """서버 시작 시 호출 (CLOUVEL_WATCH=off면 시작 안 함)"""
+    global _watcher
+    backend = backend or config.watch_mode()
+    if backend == "off":
+        return None
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = Watcher(backend=backend).start()
+        return _watcher
+
+
+def stop_watcher() -> None:
+    global _watcher
+    with _watcher_lock:
+        watcher, _watcher = _watcher, None
+    if watcher is not None:
+        watcher.stop()
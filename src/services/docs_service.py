@@ -1,6 +1,6 @@
-import re
 from pathlib import Path
 from datetime import datetime
+from src.clouvel.classifier import DocClassifier
 from src.models.docs import (
     DocFile,
     ScanResponse,
@@ -62,6 +62,7 @@ REQUIRED_DOCS = [
         "name": "API 스펙",
         "description": "API 명세서 (OpenAPI/Swagger)",
         "patterns": [r"api", r"swagger", r"openapi"],
+        "extensions": [".yaml", ".yml", ".json"],
         "priority": "critical",
     },
     {
@@ -69,6 +70,7 @@ REQUIRED_DOCS = [
         "name": "DB 스키마",
         "description": "데이터베이스 스키마 정의",
         "patterns": [r"schema", r"database", r"db", r"erd"],
+        "extensions": [".sql"],
         "priority": "critical",
     },
     {
@@ -90,6 +92,7 @@ REQUIRED_DOCS = [
         "name": "환경 설정",
         "description": "환경 변수 및 설정 예시",
         "patterns": [r"env", r"config", r"\.env"],
+        "extensions": [".env"],
         "priority": "recommended",
     },
     {
@@ -108,37 +111,30 @@ REQUIRED_DOCS = [
     },
 ]
 
+_DOC_CLASSIFIER = DocClassifier(REQUIRED_DOCS)
+
 
 def analyze_docs(path: str) -> AnalyzeResponse:
     """docs 디렉토리를 분석하여 필수 문서 존재 여부 확인"""
     scan_result = scan_docs(path)
 
-    detected: list[DetectedDoc] = []
-    detected_types: set[str] = set()
+    # 유형별로 신뢰도가 가장 높은 파일 (같으면 먼저 나온 파일)
+    best: dict[str, DetectedDoc] = {}
 
     for file in scan_result.files:
-        file_lower = file.name.lower()
-
-        for req in REQUIRED_DOCS:
-            for pattern in req["patterns"]:
-                if re.search(pattern, file_lower, re.IGNORECASE):
-                    # 이미 같은 타입이 감지되었으면 confidence 비교
-                    existing = next(
-                        (d for d in detected if d.type == req["type"]),
-                        None
-                    )
-                    confidence = _calculate_confidence(file, req)
-
-                    if existing is None or confidence > existing.confidence:
-                        if existing:
-                            detected.remove(existing)
-                        detected.append(DetectedDoc(
-                            type=req["type"],
-                            file=file,
-                            confidence=confidence,
-                        ))
-                        detected_types.add(req["type"])
-                    break
+        for match in _DOC_CLASSIFIER.classify(file.name):
+            existing = best.get(match.type)
+            if existing is None or match.confidence > existing.confidence:
+                # 교체된 항목은 뒤로 (기존 결과 순서 유지)
+                best.pop(match.type, None)
+                best[match.type] = DetectedDoc(
+                    type=match.type,
+                    file=file,
+                    confidence=match.confidence,
+                )
+
+    detected = list(best.values())
+    detected_types = set(best)
 
     # 빠진 문서 찾기
     missing: list[MissingDoc] = []
@@ -153,7 +149,7 @@ def analyze_docs(path: str) -> AnalyzeResponse:
 
     # 커버리지 계산 (critical 문서 기준)
     critical_docs = [r for r in REQUIRED_DOCS if r["priority"] == "critical"]
-    critical_detected = len([d for d in detected if d.type in [r["type"] for r in critical_docs]])
+    critical_detected = len([r for r in critical_docs if r["type"] in detected_types])
     coverage = critical_detected / len(critical_docs) if critical_docs else 1.0
 
     # 요약 생성
@@ -168,30 +164,6 @@ def analyze_docs(path: str) -> AnalyzeResponse:
     )
 
 
-def _calculate_confidence(file: DocFile, req: dict) -> float:
-    """파일이 해당 문서 유형과 얼마나 일치하는지 계산"""
-    confidence = 0.5
-    file_lower = file.name.lower()
-
-    # 파일명에 타입이 정확히 포함되면 높은 신뢰도
-    if req["type"].replace("_", "") in file_lower.replace("-", "").replace("_", ""):
-        confidence += 0.3
-
-    # 마크다운 파일이면 추가 점수
-    if file.extension in [".md", ".markdown"]:
-        confidence += 0.1
-
-    # YAML/SQL 등 특정 확장자면 추가 점수
-    if req["type"] == "api_spec" and file.extension in [".yaml", ".yml", ".json"]:
-        confidence += 0.2
-    if req["type"] == "db_schema" and file.extension == ".sql":
-        confidence += 0.2
-    if req["type"] == "env_config" and file.extension == ".env":
-        confidence += 0.2
-
-    return min(confidence, 1.0)
-
-
 def _generate_summary(
     detected: list[DetectedDoc],
     missing: list[MissingDoc],
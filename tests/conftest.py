@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""공용 fixture"""
+
+import sys
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_clouvel_home(tmp_path_factory, monkeypatch):
+    """머신 단위 데이터(프로젝트 레지스트리 등)가 실제 홈 폴더에 쌓이지 않도록
+    끝날 때 flush 안 한 analytics 버퍼도 버림 (종료 시 flush가 원래 홈에 쓰지 않도록)
+    """
+    monkeypatch.setenv("CLOUVEL_HOME", str(tmp_path_factory.mktemp("clouvel_home")))
+    yield
+    analytics = sys.modules.get("clouvel.analytics")
+    if analytics is not None:
+        analytics.reset_buffers()
@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-
+"""Analytics 테스트"""
+
+import pytest
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from clouvel import analytics
+from clouvel.analytics import (
+    log_tool_call, flush_analytics, load_analytics, save_analytics, get_stats, format_stats, run_flusher,
+)
+
+
+class TestEventLog:
+    """append-only 이벤트 로그"""
+
+    def test_log_is_buffered_until_flush(self, tmp_path):
+        """기록 시점에는 파일 I/O 없음"""
+        log_tool_call("can_code", project_path=str(tmp_path))
+        log_path = tmp_path / ".clouvel" / "analytics.jsonl"
+        assert not log_path.exists()
+
+        assert flush_analytics(str(tmp_path)) == 1
+        shards = list((tmp_path / ".clouvel" / "analytics.d").glob("*.jsonl"))
+        assert len(shards) == 1 and not log_path.exists()
+        lines = shards[0].read_text(encoding='utf-8').splitlines()
+        assert json.loads(lines[0])["tool"] == "can_code"
+
+    def test_flush_appends(self, tmp_path):
+        """flush는 기존 로그를 다시 쓰지 않고 이어 붙임"""
+        for _ in range(3):
+            log_tool_call("get_rule", project_path=str(tmp_path))
+            flush_analytics(str(tmp_path))
+        assert len(load_analytics(str(tmp_path))["events"]) == 3
+
+    def test_stats_see_unflushed_events(self, tmp_path):
+        """통계 조회 시 버퍼도 반영"""
+        log_tool_call("can_code", project_path=str(tmp_path))
+        log_tool_call("can_code", project_path=str(tmp_path))
+        log_tool_call("gate", project_path=str(tmp_path))
+        stats = get_stats(str(tmp_path))
+        assert stats["total_calls"] == 3
+        assert stats["by_tool"] == {"can_code": 2, "gate": 1}
+        assert "can_code" in format_stats(stats)
+
+    def test_legacy_json_is_migrated(self, tmp_path):
+        """v1.0 analytics.json 이벤트 유지"""
+        clouvel_dir = tmp_path / ".clouvel"
+        clouvel_dir.mkdir()
+        legacy = {"version": "1.0", "events": [{"tool": "old", "ts": "2020-01-01T00:00:00", "success": True}]}
+        (clouvel_dir / "analytics.json").write_text(json.dumps(legacy), encoding='utf-8')
+
+        log_tool_call("new", project_path=str(tmp_path))
+        flush_analytics(str(tmp_path))
+
+        tools = [e["tool"] for e in load_analytics(str(tmp_path))["events"]]
+        assert tools == ["old", "new"]
+        assert not (clouvel_dir / "analytics.json").exists()
+
+    def test_corrupt_line_is_skipped(self, tmp_path):
+        """깨진 줄 (비정상 종료 등)은 무시"""
+        log_tool_call("a", project_path=str(tmp_path))
+        flush_analytics(str(tmp_path))
+        log_path = tmp_path / ".clouvel" / "analytics.jsonl"
+        with open(log_path, "a", encoding='utf-8') as f:
+            f.write('{"tool": "b", "ts"')
+        assert [e["tool"] for e in load_analytics(str(tmp_path))["events"]] == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_flusher_flushes_on_cancel(self, tmp_path):
+        """백그라운드 flusher는 종료 시 남은 버퍼를 기록"""
+        task = asyncio.create_task(run_flusher(interval=60))
+        await asyncio.sleep(0)
+        log_tool_call("can_code", project_path=str(tmp_path))
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert (tmp_path / ".clouvel" / "analytics.jsonl").exists()
+        assert not analytics._pending
+
+    @pytest.mark.asyncio
+    async def test_periodic_flush_runs_on_background_lane(self, tmp_path):
+        """주기적 flush는 background 레인에서 (도구 호출 스레드와 분리)"""
+        from clouvel import scheduler
+
+        before = scheduler.lane_stats().get(scheduler.LANE_BACKGROUND, {}).get("completed", 0)
+        log_tool_call("can_code", project_path=str(tmp_path))
+        task = asyncio.create_task(run_flusher(interval=0.01))
+        for _ in range(100):
+            await asyncio.sleep(0.02)
+            if list((tmp_path / ".clouvel" / "analytics.d").glob("*.jsonl")):
+                break
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert scheduler.lane_stats()[scheduler.LANE_BACKGROUND]["completed"] > before
+
+
+class TestRollup:
+    """일별/시간별 집계"""
+
+    def test_stats_come_from_rollup(self, tmp_path):
+        """통계는 이벤트 로그가 아니라 집계 파일에서 계산"""
+        log_tool_call("can_code", project_path=str(tmp_path))
+        log_tool_call("can_code", success=False, project_path=str(tmp_path))
+        flush_analytics(str(tmp_path))
+        for log in (tmp_path / ".clouvel").rglob("*.jsonl"):
+            log.write_text("", encoding='utf-8')
+
+        stats = get_stats(str(tmp_path))
+        assert stats["total_calls"] == 2
+        assert stats["success_rate"] == 50.0
+
+    def test_rollup_rebuilt_from_log(self, tmp_path):
+        """집계 파일이 없으면 로그에서 한 번 재생성"""
+        save_analytics({"events": [
+            {"tool": "gate", "ts": datetime.now().isoformat(), "success": True},
+            {"tool": "old", "ts": (datetime.now() - timedelta(days=40)).isoformat(), "success": True},
+        ]}, str(tmp_path))
+        (tmp_path / ".clouvel" / "analytics_rollup.json").unlink()
+
+        assert get_stats(str(tmp_path), days=30)["by_tool"] == {"gate": 1}
+        assert get_stats(str(tmp_path), days=90)["total_calls"] == 2
+        assert (tmp_path / ".clouvel" / "analytics_rollup.json").exists()
+
+    def test_no_1000_event_cap(self, tmp_path):
+        """이벤트 1000개 제한 없음"""
+        for _ in range(1500):
+            log_tool_call("can_code", project_path=str(tmp_path))
+        flush_analytics(str(tmp_path))
+        assert get_stats(str(tmp_path))["total_calls"] == 1500
+
+
+class TestShards:
+    """프로세스별 shard + compaction"""
+
+    @staticmethod
+    def _foreign_shard(tmp_path, pid: int, tool: str, host: str | None = None) -> Path:
+        """다른 프로세스가 남긴 shard (집계 파일 없이 로그만, host="" 이면 호스트 ID 없는 이전 형식)"""
+        host = analytics._HOST_ID if host is None else host
+        name = f"{pid}-ffffff-{host}" if host else f"{pid}-ffffff"
+        shard = tmp_path / ".clouvel" / "analytics.d" / f"{name}.jsonl"
+        shard.parent.mkdir(parents=True, exist_ok=True)
+        event = {"tool": tool, "ts": datetime.now().isoformat(), "success": True}
+        shard.write_text(json.dumps(event) + "\n", encoding='utf-8')
+        return shard
+
+    @staticmethod
+    def _dead_pid() -> int:
+        import subprocess
+        proc = subprocess.Popen([sys.executable, "-c", "pass"])
+        proc.wait()
+        return proc.pid
+
+    def test_processes_write_separate_shards(self, tmp_path, monkeypatch):
+        """프로세스마다 자기 shard에만 쓰고, 통계는 전부 합산"""
+        log_tool_call("can_code", project_path=str(tmp_path))
+        flush_analytics(str(tmp_path))
+        monkeypatch.setattr(analytics, "_SHARD_TOKEN", "other")
+        log_tool_call("gate", project_path=str(tmp_path))
+        flush_analytics(str(tmp_path))
+
+        clouvel_dir = tmp_path / ".clouvel"
+        assert len(list((clouvel_dir / "analytics.d").glob("*.jsonl"))) == 2
+        assert not (clouvel_dir / "analytics.jsonl").exists()
+        assert not (clouvel_dir / "analytics.lock").exists()
+        assert get_stats(str(tmp_path))["by_tool"] == {"can_code": 1, "gate": 1}
+
+    def test_compaction_folds_own_and_abandoned_shards(self, tmp_path):
+        log_tool_call("can_code", project_path=str(tmp_path))
+        dead = self._foreign_shard(tmp_path, self._dead_pid(), "gate")
+        live = self._foreign_shard(tmp_path, os.getppid(), "get_rule")
+
+        assert analytics.compact_analytics(str(tmp_path)) == 2
+        assert not dead.exists() and live.exists()
+        base = (tmp_path / ".clouvel" / "analytics.jsonl").read_text(encoding='utf-8').splitlines()
+        assert sorted(json.loads(line)["tool"] for line in base) == ["can_code", "gate"]
+        assert get_stats(str(tmp_path))["by_tool"] == {"can_code": 1, "gate": 1, "get_rule": 1}
+
+        log_tool_call("can_code", project_path=str(tmp_path))
+        assert get_stats(str(tmp_path))["by_tool"]["can_code"] == 2
+
+    def test_unknown_owner_shards_are_never_compacted(self, tmp_path):
+        """다른 호스트/pid 네임스페이스, 이전 형식, 살아 있는 주인의 shard는 오래 안 쓰였어도 그대로"""
+        dead = self._dead_pid()
+        other = self._foreign_shard(tmp_path, dead, "gate", host="00000000")
+        legacy = self._foreign_shard(tmp_path, dead, "get_rule", host="")
+        live = self._foreign_shard(tmp_path, os.getppid(), "can_code")
+
+        old = time.time() - 30 * 24 * 3600
+        for shard in (other, legacy, live):
+            os.utime(shard, (old, old))
+        assert analytics.compact_analytics(str(tmp_path)) == 0
+        assert other.exists() and legacy.exists() and live.exists()
+        assert get_stats(str(tmp_path))["by_tool"] == {"gate": 1, "get_rule": 1, "can_code": 1}
+
+    def test_append_during_compaction_is_kept(self, tmp_path, monkeypatch):
+        """shard를 읽는 중에 추가된 이벤트는 새 shard로 가서 사라지지 않음"""
+        log_tool_call("can_code", project_path=str(tmp_path))
+        flush_analytics(str(tmp_path))
+        shard = analytics._shard_path(analytics.get_analytics_path(str(tmp_path)))
+
+        original = Path.read_bytes
+
+        def read_then_append(self):
+            data = original(self)
+            if ".compacting-" in self.name:
+                with open(shard, "a", encoding='utf-8') as f:
+                    f.write(json.dumps({"tool": "gate", "ts": datetime.now().isoformat(), "success": True}) + "\n")
+            return data
+
+        monkeypatch.setattr(Path, "read_bytes", read_then_append)
+        assert analytics.compact_analytics(str(tmp_path)) == 1
+        monkeypatch.undo()
+
+        assert shard.exists()
+        assert not list(shard.parent.glob("*.compacting-*"))
+        assert get_stats(str(tmp_path))["by_tool"] == {"can_code": 1, "gate": 1}
+
+    def test_compaction_skips_when_locked(self, tmp_path):
+        log_tool_call("can_code", project_path=str(tmp_path))
+        flush_analytics(str(tmp_path))
+        (tmp_path / ".clouvel" / "analytics.lock").touch()
+        assert analytics.compact_analytics(str(tmp_path)) == 0
+        assert get_stats(str(tmp_path))["total_calls"] == 1
+
+
+class TestSqliteBackend:
+    """CLOUVEL_ANALYTICS_BACKEND=sqlite"""
+
+    @pytest.fixture(autouse=True)
+    def sqlite_backend(self, monkeypatch):
+        from clouvel import analytics_db
+        monkeypatch.setenv("CLOUVEL_ANALYTICS_BACKEND", "sqlite")
+        yield
+        analytics_db.close_all()
+
+    def test_flush_goes_to_db(self, tmp_path):
+        import sqlite3
+        for ms in (1.0, 5.0, 80.0):
+            log_tool_call("can_code", project_path=str(tmp_path), duration_ms=ms, cpu_ms=1.0)
+        assert flush_analytics(str(tmp_path)) == 3
+
+        db = tmp_path / ".clouvel" / "analytics.db"
+        assert db.exists() and not (tmp_path / ".clouvel" / "analytics.jsonl").exists()
+        conn = sqlite3.connect(db)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(events)")}
+        assert "events_ts_tool_project" in indexes
+        conn.close()
+
+    def test_stats_match_json_backend(self, tmp_path, monkeypatch):
+        """같은 이벤트면 JSON 백엔드와 같은 통계"""
+        events = [
+            {"tool": "can_code", "ts": datetime.now().isoformat(), "success": True, "ms": ms, "cpu_ms": 1.0,
+             "bytes": 100, "files": 2}
+            for ms in (0.5, 3.0, 12.0, 250.0)
+        ] + [{"tool": "gate", "ts": datetime.now().isoformat(), "success": False, "ms": 9.0, "cpu_ms": 0.0,
+              "bytes": 0, "files": 0, "error": "Timeout"}]
+        sqlite_dir, json_dir = tmp_path / "s", tmp_path / "j"
+        save_analytics({"events": events}, str(sqlite_dir))
+        sqlite_stats = get_stats(str(sqlite_dir))
+
+        monkeypatch.setenv("CLOUVEL_ANALYTICS_BACKEND", "json")
+        save_analytics({"events": events}, str(json_dir))
+        assert sqlite_stats == get_stats(str(json_dir))
+        assert sqlite_stats["performance"]["gate"]["errors"] == {"Timeout": 1}
+
+    def test_period_filter(self, tmp_path):
+        save_analytics({"events": [
+            {"tool": "gate", "ts": datetime.now().isoformat(), "success": True},
+            {"tool": "old", "ts": (datetime.now() - timedelta(days=8)).isoformat(), "success": True},
+        ]}, str(tmp_path))
+        assert get_stats(str(tmp_path), days=7)["by_tool"] == {"gate": 1}
+        assert get_stats(str(tmp_path), days=30)["total_calls"] == 2
+
+    def test_existing_log_is_imported(self, tmp_path, monkeypatch):
+        """JSON으로 쌓인 기록은 DB를 처음 만들 때 가져옴"""
+        monkeypatch.setenv("CLOUVEL_ANALYTICS_BACKEND", "json")
+        log_tool_call("get_rule", project_path=str(tmp_path))
+        flush_analytics(str(tmp_path))
+
+        monkeypatch.setenv("CLOUVEL_ANALYTICS_BACKEND", "sqlite")
+        log_tool_call("can_code", project_path=str(tmp_path))
+        assert [e["tool"] for e in load_analytics(str(tmp_path))["events"]] == ["get_rule", "can_code"]
+
+
+class TestAggregate:
+    """머신 단위 프로젝트 레지스트리 + 전체 집계"""
+
+    @pytest.fixture
+    def projects(self, tmp_path):
+        a, b = tmp_path / "a", tmp_path / "b"
+        for _ in range(3):
+            log_tool_call("can_code", project_path=str(a), duration_ms=5.0)
+        log_tool_call("gate", success=False, project_path=str(b), duration_ms=500.0)
+        flush_analytics()
+        return a, b
+
+    def test_flushed_projects_are_registered(self, projects):
+        from clouvel import analytics_registry
+        assert set(projects) <= set(analytics_registry.projects())
+
+    def test_registry_stays_in_recorded_home(self, tmp_path, monkeypatch):
+        """flush가 나중에(종료 시 등) 돌아도 기록 당시 CLOUVEL_HOME에만 등록"""
+        from clouvel import analytics_registry
+        recorded = analytics_registry.registry_path()
+        fake_home = tmp_path / "home"
+        monkeypatch.setenv("HOME", str(fake_home))
+        monkeypatch.setenv("USERPROFILE", str(fake_home))
+
+        log_tool_call("can_code", project_path=str(tmp_path / "p"))
+        monkeypatch.delenv("CLOUVEL_HOME")
+        analytics._flush_at_exit()
+
+        assert str(tmp_path / "p") in json.loads(recorded.read_text(encoding='utf-8'))["projects"]
+        assert not fake_home.exists()
+
+    def test_per_project_and_global_totals(self, projects):
+        a, b = projects
+        stats = analytics.aggregate_stats()
+        assert stats["projects"][str(a)]["total_calls"] == 3
+        assert stats["projects"][str(b)]["success_rate"] == 0
+        assert stats["by_tool"]["can_code"] >= 3
+        assert stats["performance"]["gate"]["p95_ms"] >= 500
+
+        text = format_stats(stats)
+        assert "전체 프로젝트" in text
+        assert f"| {a} | 3 | 100.0% | can_code |" in text
+
+    def test_unchanged_projects_are_not_reread(self, projects, monkeypatch):
+        """analytics 파일 크기/mtime이 같으면 캐시 사용, 바뀐 프로젝트만 다시 읽음"""
+        a, b = projects
+        analytics.aggregate_stats()
+        reads = []
+        original = analytics.get_counts
+        monkeypatch.setattr(analytics, "get_counts", lambda path, days: reads.append(path) or original(path, days))
+
+        assert analytics.aggregate_stats()["aggregate"]["refreshed"] == 0
+        log_tool_call("can_code", project_path=str(a))
+        stats = analytics.aggregate_stats()
+        assert reads == [str(a)]
+        assert stats["projects"][str(a)]["total_calls"] == 4
+
+    def test_removed_project_is_forgotten(self, projects):
+        import shutil
+        from clouvel import analytics_registry
+        a, b = projects
+        shutil.rmtree(b / ".clouvel")
+        assert str(b) not in analytics.aggregate_stats()["projects"]
+        assert b not in analytics_registry.projects()
+
+
+class TestSessions:
+    """세션 단위 스트리밍 카운터"""
+
+    FLOW = ["init_planning", "can_code", "can_code", "update_progress", "can_code"]
+
+    def test_idle_gap_starts_new_session(self, monkeypatch):
+        from clouvel import sessions
+        monkeypatch.setenv("CLOUVEL_SESSION_IDLE_S", "60")
+        tracker, counters = sessions.SessionTracker(), {}
+        start = datetime(2026, 1, 1, 9, 0)
+        first = tracker.observe("p", "can_code", start, counters)
+        assert tracker.observe("p", "gate", start + timedelta(seconds=30), counters) == first
+        assert tracker.observe("p", "can_code", start + timedelta(minutes=10), counters) != first
+
+        assert counters["count"] == 1 and counters["duration_s"] == 30
+        assert counters["transitions"] == {"can_code": {"gate": 1}}  # 세션 사이는 이어지지 않음
+        summary = sessions.summarize(counters, tracker.open.values())
+        assert summary["sessions"] == 2
+        assert summary["median_can_code_per_coding_session"] == 1
+
+    def test_stats_report_session_flow(self, tmp_path):
+        for tool in self.FLOW:
+            log_tool_call(tool, project_path=str(tmp_path))
+        summary = get_stats(str(tmp_path))["sessions"]
+        assert summary["sessions"] == 1  # 열린 세션도 포함
+        assert summary["median_can_code_per_coding_session"] == 3
+        assert summary["plan_to_progress"]["count"] == 1
+        assert ("can_code", "can_code", 1) in summary["top_transitions"]
+        assert "## 세션" in format_stats(get_stats(str(tmp_path)))
+
+    def test_counters_match_replay(self, tmp_path, monkeypatch):
+        """스트리밍 카운터 = 기록된 이벤트를 다시 읽어 만든 카운터"""
+        for tool in self.FLOW:
+            log_tool_call(tool, project_path=str(tmp_path))
+        assert analytics.close_sessions() >= 1
+        monkeypatch.setattr(analytics, "_SHARD_TOKEN", "other")  # 재시작한 서버
+        log_tool_call("get_rule", project_path=str(tmp_path))
+        analytics.close_sessions()
+        flush_analytics(str(tmp_path))
+        streamed = get_stats(str(tmp_path))["sessions"]
+        assert streamed["sessions"] == 2
+
+        for rollup in (tmp_path / ".clouvel" / "analytics.d").glob("*.rollup.json"):
+            rollup.unlink()
+        analytics._shard_rollups.clear()
+        assert get_stats(str(tmp_path))["sessions"] == streamed
+
+    def test_sqlite_counters(self, tmp_path, monkeypatch):
+        from clouvel import analytics_db
+        monkeypatch.setenv("CLOUVEL_ANALYTICS_BACKEND", "sqlite")
+        try:
+            for tool in self.FLOW:
+                log_tool_call(tool, project_path=str(tmp_path))
+            analytics.close_sessions()
+            flush_analytics(str(tmp_path))
+            summary = get_stats(str(tmp_path))["sessions"]
+            assert summary["sessions"] == 1
+            assert summary["median_can_code_per_coding_session"] == 3
+            assert ("init_planning", "can_code", 1) in summary["top_transitions"]
+        finally:
+            analytics_db.close_all()
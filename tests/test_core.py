@@ -0,0 +1,456 @@
+# -*- coding: utf-8 -*-
+"""Core 도구 캐시/스캔 테스트"""
+
+import pytest
+import os
+import time
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from clouvel.tools import can_code, analyze_docs
+from clouvel.tools import core
+from clouvel.tools.scan import find_test_files, ProjectWalker, ScanBudget
+from clouvel.classifier import DocClassifier
+from clouvel.tools import prd, disk_cache, fingerprint
+
+
+def _age(*paths: Path, seconds: int = 10) -> None:
+    """mtime을 과거로 돌려서 racy 판정을 피함"""
+    past = time.time() - seconds
+    for p in paths:
+        os.utime(p, (past, past))
+
+
+@pytest.fixture
+def project(tmp_path):
+    """PRD + 테스트가 있는 프로젝트 (mtime은 과거로)"""
+    core.clear_snapshot_cache()
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "PRD.md").write_text("# PRD\n\n## Acceptance\n- [ ] 동작\n", encoding='utf-8')
+    tests = tmp_path / "tests"
+    tests.mkdir()
+    (tests / "test_a.py").write_text("", encoding='utf-8')
+    _age(docs / "PRD.md", docs, tests / "test_a.py", tests, tmp_path)
+    yield tmp_path
+    core.clear_snapshot_cache()
+
+
+class TestDocsSnapshot:
+    """can_code 스냅샷 캐시"""
+
+    def test_unchanged_project_reuses_snapshot(self, project):
+        """변경 없으면 같은 스냅샷 재사용"""
+        first = core.get_docs_snapshot(project / "docs")
+        assert core.get_docs_snapshot(project / "docs") is first
+
+    def test_prd_edit_invalidates(self, project):
+        """PRD 내용이 바뀌면 다시 검사"""
+        first = core.get_docs_snapshot(project / "docs")
+        assert first.prd_sections_missing_critical == []
+
+        prd = project / "docs" / "PRD.md"
+        prd.write_text("# PRD\n\n내용만 있음\n", encoding='utf-8')
+        second = core.get_docs_snapshot(project / "docs")
+        assert second is not first
+        assert second.prd_sections_missing_critical == ["acceptance"]
+
+    def test_new_test_file_invalidates(self, project):
+        """테스트 디렉토리에 파일이 추가되면 다시 검사"""
+        first = core.get_docs_snapshot(project / "docs")
+        (project / "tests" / "test_b.py").write_text("", encoding='utf-8')
+        assert core.get_docs_snapshot(project / "docs").test_count > first.test_count
+
+    def test_recent_change_is_not_cached(self, project):
+        """mtime 해상도 안의 변경을 놓치지 않도록 방금 바뀐 상태는 재사용 안 함"""
+        (project / "docs" / "API.md").write_text("# API", encoding='utf-8')
+        first = core.get_docs_snapshot(project / "docs")
+        assert core.get_docs_snapshot(project / "docs") is not first
+
+    def test_fresh_check_uses_project_fingerprint(self, project, monkeypatch):
+        """트리가 만들어진 뒤에는 바뀐 디렉토리만 확인 - 관계없는 소스 수정은 재사용"""
+        (project / "src").mkdir()
+        (project / "src" / "app.py").write_text("a", encoding='utf-8')
+        _age(project / "src" / "app.py", project / "src", project)
+        first = core.get_docs_snapshot(project / "docs")
+        fingerprint.project_tree(project).refresh()
+        monkeypatch.setattr(core.DocsSnapshot, "_stat_fresh", lambda self, racy_after: pytest.fail("stat 검사로 돌아감"))
+
+        (project / "src" / "app.py").write_text("changed", encoding='utf-8')
+        assert core.get_docs_snapshot(project / "docs") is first
+
+        (project / "tests" / "test_b.py").write_text("", encoding='utf-8')
+        assert core.get_docs_snapshot(project / "docs").test_count == 2
+
+    @pytest.mark.asyncio
+    async def test_can_code_uses_snapshot(self, project):
+        """can_code 결과는 캐시 전후 동일"""
+        first = await can_code(str(project / "docs"))
+        second = await can_code(str(project / "docs"))
+        assert first[0].text == second[0].text
+        assert "PASS" in first[0].text
+
+
+class TestScanWalker:
+    """테스트 파일 탐색 워커"""
+
+    def _touch(self, root: Path, *rel_paths: str) -> None:
+        for rel in rel_paths:
+            path = root / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("", encoding='utf-8')
+
+    def test_no_double_counting(self, tmp_path):
+        """tests/, src/ 아래 파일도 한 번만 셈"""
+        self._touch(tmp_path, "tests/test_a.py", "src/b.test.ts", "test_root.py")
+        scan = find_test_files(tmp_path)
+        assert scan.files == sorted(["test_root.py", str(Path("src/b.test.ts")), str(Path("tests/test_a.py"))])
+
+    def test_prunes_vendor_dirs(self, tmp_path):
+        """node_modules, .git, .venv 안으로 들어가지 않음"""
+        self._touch(
+            tmp_path,
+            "node_modules/lib/x.spec.js",
+            ".git/hooks/test_hook.py",
+            ".venv/lib/test_site.py",
+            "app/y.spec.js",
+        )
+        scan = find_test_files(tmp_path)
+        assert scan.files == [str(Path("app/y.spec.js"))]
+        assert str(tmp_path / "node_modules") not in scan.mtimes
+
+    def test_gitignore(self, tmp_path):
+        """.gitignore 규칙 (디렉토리, glob, 부정, 하위 .gitignore)"""
+        self._touch(
+            tmp_path,
+            "generated/test_gen.py",
+            "tmp_test.py",
+            "keep_test.py",
+            "pkg/fixtures/test_fixture.py",
+            "pkg/test_pkg.py",
+        )
+        (tmp_path / ".gitignore").write_text("generated/\n*_test.py\n!keep_test.py\n", encoding='utf-8')
+        (tmp_path / "pkg" / ".gitignore").write_text("/fixtures\n", encoding='utf-8')
+
+        scan = find_test_files(tmp_path)
+        assert scan.files == sorted(["keep_test.py", str(Path("pkg/test_pkg.py"))])
+
+    def test_max_depth(self, tmp_path):
+        """최대 깊이 아래는 탐색하지 않음"""
+        self._touch(tmp_path, "a/test_1.py", "a/b/c/test_3.py")
+        assert find_test_files(tmp_path, max_depth=1).files == [str(Path("a/test_1.py"))]
+
+
+class TestScanBudget:
+    """탐색 예산 / 부분 결과"""
+
+    @pytest.fixture
+    def big_project(self, project, monkeypatch):
+        monkeypatch.setattr(core, "_RACY_WINDOW_NS", 0)
+        for i in range(30):
+            d = project / "pkg" / f"m{i}"
+            d.mkdir(parents=True)
+            (d / f"test_m{i}.py").write_text("", encoding='utf-8')
+        return project
+
+    def _wait_for_warm(self, timeout: float = 5.0) -> None:
+        deadline = time.monotonic() + timeout
+        while core._warming and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_walker_resumes(self, big_project):
+        """예산 초과 시 멈추고, 이어서 끝까지 탐색 가능"""
+        walker = ProjectWalker(big_project)
+        partial = walker.run(ScanBudget(max_entries=5))
+        assert partial.truncated
+        assert not walker.done
+
+        complete = walker.run()
+        assert not complete.truncated
+        assert len(complete.files) == 31
+
+    @pytest.mark.asyncio
+    async def test_can_code_partial_then_warm(self, big_project):
+        """부분 결과 표시 → 백그라운드 완료 후 다음 호출은 전체 결과"""
+        first = await can_code(str(big_project / "docs"), max_entries=5)
+        assert "부분 결과" in first[0].text
+
+        self._wait_for_warm()
+        second = await can_code(str(big_project / "docs"), max_entries=5)
+        assert "부분 결과" not in second[0].text
+        assert "테스트 31개" in second[0].text
+
+    @pytest.mark.asyncio
+    async def test_analyze_docs_partial(self, project):
+        """docs 목록도 예산을 따름"""
+        for i in range(10):
+            (project / "docs" / f"note{i}.md").write_text("", encoding='utf-8')
+        result = await analyze_docs(str(project / "docs"), max_entries=3)
+        assert "부분 결과" in result[0].text
+
+
+class TestDocClassifier:
+    """파일명 분류기"""
+
+    def test_matches_legacy_pattern_loop(self):
+        """기존 유형 × 패턴 re.search 루프와 같은 결과"""
+        import re
+        names = ["PRD.md", "api-spec.yaml", "db_schema.sql", "architecture.md", "notes.txt",
+                 "Product_Requirements.md", "apidb.md", "test-plan.md", "README.md", "verify.md"]
+        classifier = DocClassifier(core.REQUIRED_DOCS)
+        for name in names:
+            expected = [
+                req["type"] for req in core.REQUIRED_DOCS
+                if any(re.search(p, name.lower(), re.IGNORECASE) for p in req["patterns"])
+            ]
+            assert [m.type for m in classifier.classify(name)] == expected
+        assert classifier.detect(names) == {r["type"] for r in core.REQUIRED_DOCS}
+
+    def test_confidence(self):
+        """유형 이름 / 마크다운 / 전용 확장자 가산"""
+        classifier = DocClassifier([
+            {"type": "db_schema", "patterns": [r"schema", r"db"], "extensions": [".sql"]},
+        ])
+        assert classifier.classify("db_schema.sql")[0].confidence == pytest.approx(1.0)
+        assert classifier.classify("schema.md")[0].confidence == pytest.approx(0.6)
+        assert classifier.classify("notes.md") == []
+
+    def test_http_service_uses_classifier(self, tmp_path):
+        """HTTP analyze_docs: 유형별 가장 신뢰도 높은 파일"""
+        from src.services.docs_service import analyze_docs as http_analyze_docs
+        for name in ["api.txt", "api_spec.yaml", "PRD.md"]:
+            (tmp_path / name).write_text("", encoding='utf-8')
+        result = http_analyze_docs(str(tmp_path))
+        by_type = {d.type: d.file.name for d in result.detected}
+        assert by_type["api_spec"] == "api_spec.yaml"
+        assert by_type["prd"] == "PRD.md"
+        assert "architecture" in {m.type for m in result.missing}
+
+    def test_http_service_does_not_load_mcp_server(self):
+        """classifier만 import해도 MCP 서버 / analytics가 로드되지 않음"""
+        import subprocess
+        code = (
+            "import sys; import src.services.docs_service; "
+            "loaded = [m for m in sys.modules if m == 'mcp' or m.endswith(('.server', '.analytics'))]; "
+            "assert not loaded, loaded"
+        )
+        root = Path(__file__).parent.parent
+        result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
+
+class TestPrdHeadingIndex:
+    """PRD 제목 색인"""
+
+    def test_sections_from_headings_only(self, tmp_path):
+        """본문/코드 블록 안의 '## ...'은 섹션으로 치지 않음"""
+        prd_file = tmp_path / "PRD.md"
+        prd_file.write_text(
+            "# PRD\n\n## Scope\n본문 ## acceptance 아님\n\n```\n## Acceptance\n```\n\n### 완료 기준\n- [ ] ok\n",
+            encoding='utf-8',
+        )
+        index = prd.read_heading_index(prd_file)
+        assert [(h.level, h.title) for h in index.headings] == [(1, "PRD"), (2, "Scope"), (3, "완료 기준")]
+        assert core._check_prd_sections(prd_file) == (["acceptance"], [], ["non_goals"])
+
+        prd_file.write_text("# PRD\n\n```\n## Acceptance\n```\n", encoding='utf-8')
+        assert core._check_prd_sections(prd_file)[1] == ["acceptance"]
+
+    def test_index_cached_by_content_hash(self, tmp_path, monkeypatch):
+        """같은 내용이면 다시 스캔하지 않음"""
+        prd.clear_heading_cache()
+        body = "## Acceptance\n" + "| log | line |\n" * 50_000
+        a = tmp_path / "a.md"
+        b = tmp_path / "b.md"
+        a.write_text(body, encoding='utf-8')
+        b.write_text(body, encoding='utf-8')
+
+        scans = []
+        original = prd._scan_headings
+        monkeypatch.setattr(prd, "_scan_headings", lambda buf: scans.append(1) or original(buf))
+        first = prd.read_heading_index(a)
+        assert prd.read_heading_index(b) is first
+        assert len(scans) == 1
+
+        b.write_text(body + "## Non-goals\n", encoding='utf-8')
+        assert [h.title for h in prd.read_heading_index(b).headings] == ["Acceptance", "Non-goals"]
+        assert len(scans) == 2
+
+    def test_empty_and_missing_prd(self, tmp_path):
+        """빈 파일 / 없는 파일"""
+        empty = tmp_path / "PRD.md"
+        empty.write_text("", encoding='utf-8')
+        assert core._check_prd_sections(empty)[1] == ["acceptance"]
+        assert core._check_prd_sections(tmp_path / "none.md") == ([], ["acceptance"], [])
+
+
+class TestPrdSectionTree:
+    """PRD 섹션 트리 / get_prd_section"""
+
+    PRD = (
+        "# PRD\n\n## Scope\nscope body\n\n### API\n| method | path |\n|---|---|\n| GET | /a |\n| POST | /b |\n\n"
+        "## Acceptance\n- [x] 로그인\n- [ ] 로그아웃\n\n```\n- [ ] 코드 블록 안\n```\n\n### Edge\n- [ ] 빈 입력\n\n"
+        "## Non-goals\n- 결제\n"
+    )
+
+    @pytest.fixture
+    def docs(self, tmp_path):
+        prd.clear_heading_cache()
+        docs = tmp_path / "docs"
+        docs.mkdir()
+        (docs / "PRD.md").write_text(self.PRD, encoding='utf-8')
+        return docs
+
+    def test_tree_structure(self, docs):
+        """제목 계층 / 범위 / 체크박스 / 표"""
+        tree = prd.read_section_tree(docs / "PRD.md")
+        titles = [s.heading.title for s in tree.sections]
+        assert titles == ["PRD", "Scope", "API", "Acceptance", "Edge", "Non-goals"]
+        assert tree.roots == [0]
+        assert [tree.sections[i].heading.title for i in tree.sections[0].children] == ["Scope", "Acceptance", "Non-goals"]
+
+        api = tree.sections[2]
+        assert api.tables[0].header == ("method", "path")
+        assert api.tables[0].rows == 2
+
+        acceptance = titles.index("Acceptance")
+        assert [(c.checked, c.text) for c in tree.checkboxes(acceptance)] == [
+            (True, "로그인"), (False, "로그아웃"), (False, "빈 입력"),
+        ]
+        text = prd.read_section_text(docs / "PRD.md", tree.sections[acceptance])
+        assert text.startswith("## Acceptance") and "Non-goals" not in text
+        assert prd.read_section_tree(docs / "PRD.md") is tree
+
+    @pytest.mark.asyncio
+    async def test_get_prd_section(self, docs):
+        """섹션 규칙 이름 / 제목으로 조회"""
+        from clouvel.tools import get_prd_section
+
+        items = (await get_prd_section(str(docs), "acceptance", items_only=True))[0].text
+        assert "(1/3 완료)" in items
+        assert "- [ ] 빈 입력" in items and "코드 블록" not in items
+
+        scope = (await get_prd_section(str(docs), "scope"))[0].text
+        assert "scope body" in scope and "로그인" not in scope
+        assert "(2행)" in scope
+
+        assert "- 결제" in (await get_prd_section(str(docs), "non_goals"))[0].text
+        assert "- 결제" in (await get_prd_section(str(docs), "non-goals"))[0].text
+
+        missing = (await get_prd_section(str(docs), "배포"))[0].text
+        assert "섹션 없음" in missing and "- Acceptance" in missing
+
+    @pytest.mark.asyncio
+    async def test_max_chars(self, docs):
+        """긴 섹션은 잘라서 반환"""
+        from clouvel.tools import get_prd_section
+        (docs / "PRD.md").write_text("## Acceptance\n" + "로그 한 줄\n" * 5000, encoding='utf-8')
+        text = (await get_prd_section(str(docs), "acceptance", max_chars=100))[0].text
+        assert "일부만 표시" in text
+        assert len(text) < 400
+
+
+class TestOutputMode:
+    """core 도구 output=compact/json"""
+
+    @pytest.mark.asyncio
+    async def test_can_code_json(self, project):
+        """json: 상태 / 없는 문서 / 테스트 수 / 캐시 나이"""
+        import json
+        data = json.loads((await can_code(str(project / "docs"), output="json"))[0].text)
+        assert data["status"] == "WARN" and data["ok"] is True
+        assert data["missing_critical"] == [] and data["tests"] == 1
+        assert "PRD.scope" in data["warn"] and "PRD" in data["detected"]
+        assert data["cache_age_s"] >= 0 and data["partial"] is False
+
+        (project / "docs" / "PRD.md").write_text("# PRD\n", encoding='utf-8')
+        data = json.loads((await can_code(str(project / "docs"), output="json"))[0].text)
+        assert data["status"] == "BLOCK" and data["missing_critical"] == ["PRD.acceptance"]
+
+        data = json.loads((await can_code(str(project / "없음"), output="json"))[0].text)
+        assert data["status"] == "BLOCK" and data["missing_critical"] == ["docs 폴더"]
+
+    @pytest.mark.asyncio
+    async def test_compact_is_one_line(self, project):
+        """compact: 한 줄 요약"""
+        text = (await can_code(str(project / "docs"), output="compact"))[0].text
+        assert text.startswith("WARN | 권장 없음: ") and "| 테스트 1 |" in text and "\n" not in text
+
+        text = (await analyze_docs(str(project / "docs"), output="compact"))[0].text
+        assert text.startswith("커버리지 100%") and "\n" not in text
+
+    @pytest.mark.asyncio
+    async def test_unknown_mode_is_markdown(self, project):
+        """모르는 값은 기존 markdown 출력"""
+        text = (await can_code(str(project / "docs"), output="xml"))[0].text
+        assert text.startswith("✅ PASS")
+        text = (await can_code(str(project / "docs"), output=1))[0].text  # batch 안에서는 스키마 검사 없음
+        assert text.startswith("✅ PASS")
+
+    @pytest.mark.asyncio
+    async def test_errors_are_structured(self, project):
+        """json/compact에서는 오류도 파싱 가능한 형태"""
+        import json
+        from clouvel.tools import scan_docs, get_prd_section
+        missing = str(project / "없음")
+        calls = [
+            (scan_docs(missing, output="json"), "scan_docs", "not_found"),
+            (scan_docs(str(project / "docs" / "PRD.md"), output="json"), "scan_docs", "not_a_directory"),
+            (analyze_docs(missing, output="json"), "analyze_docs", "not_found"),
+            (analyze_docs(missing, workspace=True, output="json"), "analyze_docs", "not_found"),
+            (can_code(missing, workspace=True, output="json"), "can_code", "not_found"),
+            (get_prd_section(missing, "acceptance", output="json"), "get_prd_section", "not_found"),
+            (get_prd_section(str(project / "tests"), "acceptance", output="json"), "get_prd_section", "prd_not_found"),
+        ]
+        for call, tool, code in calls:
+            data = json.loads((await call)[0].text)
+            assert (data["tool"], data["status"], data["error"]) == (tool, "error", code)
+
+        data = json.loads((await get_prd_section(str(project / "docs"), "없는 섹션", output="json"))[0].text)
+        assert data["error"] == "section_not_found" and data["sections"] == ["PRD", "Acceptance"]
+
+        text = (await scan_docs(missing, output="compact"))[0].text
+        assert text.startswith("ERROR | not_found | ") and "\n" not in text
+        assert (await scan_docs(missing))[0].text == f"경로 없음: {missing}"
+
+
+class TestDiskCache:
+    """.clouvel/cache 판정 캐시 (새 프로세스에서 재사용)"""
+
+    @pytest.fixture
+    def persisted(self, project):
+        (project / ".clouvel").mkdir()
+        _age(project / ".clouvel", project)
+        first = core.get_docs_snapshot(project / "docs")
+        cache_file = disk_cache.cache_file(project)
+        deadline = time.monotonic() + 5
+        while not cache_file.exists() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert cache_file.exists()
+        core.clear_snapshot_cache()  # 새 프로세스 흉내
+        return first
+
+    def test_new_process_loads_without_scanning(self, project, persisted, monkeypatch):
+        """저장된 판정은 탐색 없이 사용 (docs 목록도 같이)"""
+        def fail(*args, **kwargs):
+            raise AssertionError("다시 탐색함")
+        monkeypatch.setattr(ProjectWalker, "run", fail)
+        monkeypatch.setattr(core, "_read_listing", fail)
+
+        loaded = core.get_docs_snapshot(project / "docs")
+        assert loaded.test_count == persisted.test_count == 1
+        assert loaded.prd_sections_found == persisted.prd_sections_found
+        assert core.list_docs(project / "docs").file_names == ["PRD.md"]
+
+    def test_changed_project_is_rebuilt(self, project, persisted):
+        """저장 이후 바뀐 프로젝트는 다시 검사"""
+        (project / "docs" / "PRD.md").write_text("# PRD\n", encoding='utf-8')
+        assert core.get_docs_snapshot(project / "docs").prd_sections_missing_critical == ["acceptance"]
+
+    def test_no_clouvel_folder_no_write(self, project):
+        """.clouvel 폴더가 없으면 저장 안 함 (루트 mtime을 바꾸지 않도록)"""
+        core.get_docs_snapshot(project / "docs")
+        time.sleep(0.1)
+        assert not (project / ".clouvel").exists()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""메트릭 텍스트 파일 내보내기 테스트"""
+
+import pytest
+import asyncio
+import os
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from clouvel import exporter, metrics, server, scheduler
+
+LABEL = r'[a-z_]+="(?:[^"\\]|\\.)*"'
+SAMPLE_RE = re.compile(rf'^[a-z_]+(\{{{LABEL}(,{LABEL})*\}})? [0-9.e+-]+$')
+
+
+@pytest.fixture(autouse=True)
+def fresh_totals(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    metrics.reset_totals()
+    scheduler.clear_coalesced()
+    yield
+    metrics.reset_totals()
+
+
+def _samples(text: str) -> dict[str, float]:
+    return {line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if not line.startswith("#")}
+
+
+class TestRender:
+    @pytest.mark.asyncio
+    async def test_tool_calls_and_latency(self, tmp_path):
+        (tmp_path / "docs").mkdir()
+        for _ in range(2):
+            await server.call_tool("scan_docs", {"path": str(tmp_path / "docs")})
+        await server.call_tool("get_prd_guide", {})
+
+        text = exporter.render()
+        samples = _samples(text)
+        assert samples['clouvel_tool_calls_total{tool="scan_docs",outcome="ok"}'] == 2
+        assert samples['clouvel_tool_duration_seconds_count{tool="scan_docs"}'] == 2
+        assert samples['clouvel_tool_duration_seconds_bucket{tool="scan_docs",le="+Inf"}'] == 2
+        assert samples['clouvel_lane_queued{lane="interactive"}'] == 0
+        assert 'clouvel_file_cache_hits_total{cache="stat"}' in samples
+
+    def test_histogram_buckets_are_cumulative(self):
+        for ms in (1, 10, 100):
+            metrics.record_scan("walk", ms)
+        lines = [l for l in exporter.render().splitlines() if l.startswith('clouvel_scan_duration_seconds_bucket{kind="walk"')]
+        counts = [float(l.rsplit(" ", 1)[1]) for l in lines]
+        assert counts == sorted(counts) and counts[-1] == 3
+        assert _samples(exporter.render())['clouvel_scan_duration_seconds_sum{kind="walk"}'] == pytest.approx(0.111)
+
+    def test_text_format(self):
+        """모든 줄이 HELP/TYPE 주석이거나 `이름{라벨} 값`"""
+        metrics.record_call('weird"tool', False, 5.0)
+        for line in exporter.render().splitlines():
+            assert line.startswith(("# HELP ", "# TYPE ")) or SAMPLE_RE.match(line), line
+
+
+class TestTextfile:
+    def test_path_template(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("CLOUVEL_METRICS_TEXTFILE", raising=False)
+        assert exporter.textfile_path() is None
+        monkeypatch.setenv("CLOUVEL_METRICS_TEXTFILE", str(tmp_path / "clouvel_{pid}.prom"))
+        assert exporter.textfile_path() == tmp_path / f"clouvel_{os.getpid()}.prom"
+
+    def test_write_is_atomic(self, tmp_path):
+        path = tmp_path / "clouvel.prom"
+        exporter.write_textfile(path)
+        exporter.write_textfile(path)
+        assert [p.name for p in tmp_path.iterdir()] == ["clouvel.prom"]
+        assert "clouvel_file_cache_bytes" in path.read_text(encoding='utf-8')
+
+    @pytest.mark.asyncio
+    async def test_exporter_removes_file_on_stop(self, tmp_path):
+        path = tmp_path / "clouvel.prom"
+        task = asyncio.create_task(exporter.run_exporter(path, interval=0.01))
+        for _ in range(200):
+            if path.exists():
+                break
+            await asyncio.sleep(0.01)
+        assert path.exists()
+        await asyncio.sleep(0.005)  # 쓰기 도중 취소되는 경우도 포함
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not path.exists()
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""공용 파일 접근 계층 테스트"""
+
+import pytest
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from clouvel import fileio
+from clouvel.analytics import format_stats
+
+
+def _write_old(path: Path, text: str, seconds: int = 10) -> None:
+    """racy 판정을 피하도록 mtime을 과거로"""
+    path.write_text(text, encoding='utf-8')
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    fileio.clear()
+    yield
+    fileio.clear()
+
+
+class TestReadCache:
+    """내용 캐시"""
+
+    def test_unchanged_file_is_served_from_cache(self, tmp_path):
+        f = tmp_path / "progress.md"
+        _write_old(f, "# Progress")
+        assert fileio.read_text(f) == "# Progress"
+        assert fileio.read_text(f) == "# Progress"
+        stats = fileio.cache_stats()
+        assert (stats["read_hits"], stats["read_misses"]) == (1, 1)
+        assert stats["read_hit_rate"] == 50.0
+
+    def test_changed_file_is_reread(self, tmp_path):
+        """mtime/크기가 바뀌면 다시 읽음"""
+        f = tmp_path / "progress.md"
+        _write_old(f, "v1")
+        fileio.read_text(f)
+        _write_old(f, "v2 longer", seconds=5)
+        assert fileio.read_text(f) == "v2 longer"
+
+    def test_write_text_invalidates(self, tmp_path):
+        f = tmp_path / "task_plan.md"
+        _write_old(f, "old")
+        fileio.read_text(f)
+        fileio.write_text(f, "new")
+        assert fileio.read_text(f) == "new"
+
+    def test_recently_modified_file_not_cached(self, tmp_path):
+        """방금 바뀐 파일은 캐시하지 않음 (같은 mtime 안의 재수정 대비)"""
+        f = tmp_path / "a.md"
+        f.write_text("a", encoding='utf-8')
+        fileio.read_text(f)
+        assert fileio.cache_stats()["cached_files"] == 0
+
+    def test_lru_eviction_by_bytes(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("CLOUVEL_FILE_CACHE_KB", "16")  # 파일 하나 최대 1KB
+        for i in range(20):
+            f = tmp_path / f"{i}.md"
+            _write_old(f, str(i % 10) * 1000)
+            fileio.read_text(f)
+        stats = fileio.cache_stats()
+        assert stats["cached_bytes"] <= 16 * 1024
+        assert stats["evictions"] > 0
+
+        big = tmp_path / "big.md"
+        _write_old(big, "x" * 2000)
+        fileio.read_text(big)
+        assert fileio.cache_stats()["cached_files"] == stats["cached_files"]
+
+    def test_budget_counts_bytes_not_characters(self, tmp_path):
+        """한글 문서는 글자 수보다 바이트가 많음 → 바이트로 계산"""
+        f = tmp_path / "한글.md"
+        _write_old(f, "가" * 100)
+        fileio.read_text(f)
+        assert fileio.cache_stats()["cached_bytes"] == 300
+        fileio.write_text(f, "x")
+        assert fileio.cache_stats()["cached_bytes"] == 0
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            fileio.read_text(tmp_path / "없음.md")
+
+
+class TestStatScope:
+    """도구 호출 하나 동안의 stat 캐시"""
+
+    def test_stat_reused_only_inside_scope(self, tmp_path):
+        fileio.exists(tmp_path)
+        fileio.exists(tmp_path)
+        assert fileio.cache_stats()["stat_hits"] == 0
+
+        with fileio.call_scope():
+            assert fileio.is_dir(tmp_path)
+            assert fileio.exists(tmp_path)
+            assert not fileio.is_file(tmp_path)
+        assert fileio.cache_stats()["stat_hits"] == 2
+
+    def test_write_inside_scope_is_visible(self, tmp_path):
+        f = tmp_path / "new.md"
+        with fileio.call_scope():
+            assert not fileio.exists(f)
+            fileio.write_text(f, "x")
+            assert fileio.exists(f)
+
+    @pytest.mark.asyncio
+    async def test_refresh_goals_rereads_nothing(self, tmp_path):
+        """같은 계획 파일을 다시 읽지 않음"""
+        from clouvel.tools import init_planning, refresh_goals
+        await init_planning(str(tmp_path), "작업", ["목표 A"])
+        planning = tmp_path / ".claude" / "planning"
+        for name in ("task_plan.md", "progress.md"):
+            os.utime(planning / name, (time.time() - 10, time.time() - 10))
+
+        first = (await refresh_goals(str(tmp_path)))[0].text
+        before = fileio.cache_stats()["read_hits"]
+        assert (await refresh_goals(str(tmp_path)))[0].text == first
+        assert fileio.cache_stats()["read_hits"] - before == 2
+
+
+class TestAnalyticsReport:
+    def test_format_stats_shows_hit_rates(self):
+        stats = {"period_days": 30, "total_calls": 0, "success_rate": 0, "by_tool": {}, "by_date": {},
+                 "file_cache": {"stat_hits": 3, "stat_misses": 1, "read_hits": 1, "read_misses": 1, "evictions": 0,
+                                "stat_hit_rate": 75.0, "read_hit_rate": 50.0, "cached_files": 1, "cached_bytes": 10}}
+        text = format_stats(stats)
+        assert "## 파일 캐시" in text
+        assert "| stat | 3 | 1 | 75.0% |" in text
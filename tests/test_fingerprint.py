@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""프로젝트 fingerprint (Merkle 트리) 테스트"""
+
+import pytest
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from clouvel import watcher as watcher_module
+from clouvel.tools import fingerprint
+from clouvel.tools.fingerprint import FingerprintTree
+
+
+def _touch(path: Path, text: str) -> None:
+    """내용 변경 + mtime을 확실히 다르게 (미래 mtime은 racy로 취급되므로 과거로)"""
+    path.write_text(text, encoding='utf-8')
+    earlier = time.time() - 5
+    os.utime(path, (earlier, earlier))
+
+
+@pytest.fixture(autouse=True)
+def no_racy_window(monkeypatch):
+    """방금 만든 tmp 파일도 안정된 것으로 (racy 처리는 따로 테스트)"""
+    monkeypatch.setattr(fingerprint, "RACY_WINDOW_NS", 0)
+    fingerprint.clear_trees()
+    yield
+    fingerprint.clear_trees()
+
+
+@pytest.fixture
+def tree_root(tmp_path):
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "PRD.md").write_text("# PRD", encoding='utf-8')
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "pkg" / "a.py").write_text("a", encoding='utf-8')
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "node_modules" / "x.js").write_text("x", encoding='utf-8')
+    return tmp_path
+
+
+class TestFingerprintTree:
+    """digest 갱신"""
+
+    def test_unchanged_tree_keeps_digest(self, tree_root):
+        tree = FingerprintTree(tree_root)
+        first = tree.refresh()
+        assert first and tree.refresh() == first
+
+    def test_in_place_edit_changes_digest(self, tree_root):
+        """디렉토리 mtime이 그대로인 파일 내용 변경도 감지"""
+        tree = FingerprintTree(tree_root)
+        first = tree.refresh()
+        _touch(tree_root / "src" / "pkg" / "a.py", "changed")
+        second = tree.refresh()
+        assert second != first
+        assert second == FingerprintTree(tree_root).refresh()
+
+    def test_new_file_changes_digest(self, tree_root):
+        tree = FingerprintTree(tree_root)
+        first = tree.refresh()
+        (tree_root / "src" / "new").mkdir()
+        (tree_root / "src" / "new" / "b.py").write_text("b", encoding='utf-8')
+        assert tree.refresh() != first
+
+    def test_pruned_dirs_are_ignored(self, tree_root):
+        tree = FingerprintTree(tree_root)
+        first = tree.refresh()
+        _touch(tree_root / "node_modules" / "x.js", "y")
+        assert tree.refresh() == first
+
+    def test_unchanged_dirs_are_not_rescanned(self, tree_root):
+        """항목 목록이 그대로면 scandir 없이 stat만"""
+        tree = FingerprintTree(tree_root)
+        tree.refresh()
+        before = tree.stats
+        tree.refresh()
+        # 디렉토리 4개(루트, docs, src, src/pkg) + 파일 2개
+        assert tree.stats - before == 6
+
+    def test_recent_change_is_racy_until_stable(self, tree_root, monkeypatch):
+        """mtime 해상도 안의 변경이 있을 수 있는 동안은 refresh마다 다른 digest"""
+        monkeypatch.setattr(fingerprint, "RACY_WINDOW_NS", 2_000_000_000)
+        tree = FingerprintTree(tree_root)
+        assert tree.refresh() != tree.refresh()
+        past = time.time() - 10
+        for path in [tree_root, *tree_root.rglob("*")]:
+            os.utime(path, (past, past))
+        stable = tree.refresh()
+        assert tree.refresh() == stable
+
+
+class TestIncremental:
+    """changed_since / subtree_digest / 부분 갱신"""
+
+    def test_changed_since_reports_only_edited_dirs(self, tree_root):
+        tree = FingerprintTree(tree_root)
+        first = tree.refresh()
+        assert tree.changed_since(first) == []
+        _touch(tree_root / "src" / "pkg" / "a.py", "changed")
+        second = tree.refresh()
+        # 상위 디렉토리는 digest만 바뀌고 자기 항목은 그대로
+        assert tree.changed_since(first) == ["src/pkg"]
+        (tree_root / "docs" / "API.md").write_text("x", encoding='utf-8')
+        tree.refresh()
+        assert tree.changed_since(first) == ["docs", "src/pkg"]
+        assert tree.changed_since(second) == ["docs"]
+
+    def test_unknown_digest_is_none(self, tree_root):
+        tree = FingerprintTree(tree_root)
+        tree.refresh()
+        assert tree.changed_since("unknown") is None
+
+    def test_removed_dir_is_reported(self, tree_root):
+        tree = FingerprintTree(tree_root)
+        first = tree.refresh()
+        (tree_root / "src" / "pkg" / "a.py").unlink()
+        (tree_root / "src" / "pkg").rmdir()
+        tree.refresh()
+        assert tree.changed_since(first) == ["src", "src/pkg"]
+        assert tree.subtree_digest("src/pkg") is None
+
+    def test_subtree_digest_changes_only_in_edited_subtree(self, tree_root):
+        tree = FingerprintTree(tree_root)
+        tree.refresh()
+        docs, src = tree.subtree_digest("docs"), tree.subtree_digest("src")
+        _touch(tree_root / "src" / "pkg" / "a.py", "changed")
+        tree.refresh()
+        assert tree.subtree_digest("docs") == docs
+        assert tree.subtree_digest("src") != src
+
+    def test_dirty_refresh_visits_only_given_dirs(self, tree_root):
+        """호출한 쪽이 바뀐 디렉토리를 알려주면 그것만 다시 읽음"""
+        tree = FingerprintTree(tree_root)
+        first = tree.refresh()
+        _touch(tree_root / "src" / "pkg" / "a.py", "changed")
+        before = tree.stats
+        second = tree.refresh(dirty=[str(tree_root / "src" / "pkg")])
+        assert tree.stats - before == 2
+        assert second != first and second == FingerprintTree(tree_root).refresh()
+
+    def test_deps_changed_checks_only_changed_dirs(self, tree_root):
+        tree = FingerprintTree(tree_root)
+        first = tree.refresh()
+        deps = {str(tree_root / "src"): (tree_root / "src").stat().st_mtime_ns}
+        racy_after = time.time_ns()
+        _touch(tree_root / "docs" / "PRD.md", "# PRD 2")
+        tree.refresh()
+        assert not tree.deps_changed(first, deps, racy_after)
+        (tree_root / "src" / "b.py").write_text("b", encoding='utf-8')
+        tree.refresh()
+        assert tree.deps_changed(first, deps, racy_after)
+        assert tree.deps_changed(None, deps, racy_after)
+
+
+class TestProjectTree:
+    """TRACK_PROJECT: .gitignore 적용 + 도구가 읽는 파일만 내용 추적"""
+
+    def test_source_edit_does_not_change_digest(self, tree_root):
+        tree = fingerprint.project_tree(tree_root)
+        first = tree.refresh()
+        _touch(tree_root / "src" / "pkg" / "a.py", "changed")
+        assert tree.refresh() == first
+        _touch(tree_root / "docs" / "PRD.md", "# PRD 2")
+        assert tree.refresh() != first
+
+    def test_gitignored_dirs_are_skipped(self, tree_root):
+        (tree_root / "out").mkdir()
+        (tree_root / "out" / "gen.py").write_text("", encoding='utf-8')
+        (tree_root / ".gitignore").write_text("out/\n", encoding='utf-8')
+        tree = fingerprint.project_tree(tree_root)
+        first = tree.refresh()
+        assert tree.subtree_digest("out") is None
+        (tree_root / "out" / "more.py").write_text("", encoding='utf-8')
+        assert tree.refresh() == first
+
+        # 규칙이 바뀌면 다시 포함
+        _touch(tree_root / ".gitignore", "# none\n")
+        tree.refresh()
+        assert tree.subtree_digest("out") is not None
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify 전용")
+class TestWatchedTree:
+    """inotify로 감시 중인 디렉토리는 알림 온 것만 다시 확인"""
+
+    @pytest.fixture
+    def watched(self, tree_root):
+        w = watcher_module.start_watcher("inotify")
+        dirs = [tree_root, tree_root / "docs", tree_root / "src", tree_root / "src" / "pkg"]
+        assert w.watch("p", {str(d): d.stat().st_mtime_ns for d in dirs}, {}, lambda key: None)
+        yield w
+        watcher_module.stop_watcher()
+
+    def test_quiet_tree_needs_no_stat(self, tree_root, watched):
+        tree = fingerprint.project_tree(tree_root)
+        first = tree.refresh()
+        tree.refresh()  # 감시 중인 상태로 한 번 확인해야 믿음
+        before = tree.stats
+        assert tree.refresh() == first
+        assert tree.stats == before
+
+    def test_change_is_seen_without_waiting(self, tree_root, watched):
+        """방금 쓴 파일도 refresh에서 바로 반영 (대기 중인 이벤트를 먼저 처리)"""
+        tree = fingerprint.project_tree(tree_root)
+        first = tree.refresh()
+        tree.refresh()
+        (tree_root / "docs" / "API.md").write_text("x", encoding='utf-8')
+        second = tree.refresh()
+        assert second != first and tree.changed_since(first) == ["docs"]
+        # 바뀐 key는 감시가 풀림 → 그 디렉토리들은 다시 stat으로
+        assert not watched.is_watched("p")
+        assert tree.refresh() == second
+
+    def test_unwatched_dir_falls_back_to_stat(self, tree_root, watched):
+        tree = fingerprint.project_tree(tree_root)
+        first = tree.refresh()
+        tree.refresh()
+        watched.unwatch("p")
+        (tree_root / "src" / "b.py").write_text("b", encoding='utf-8')
+        assert tree.refresh() != first
+
+
+class TestSharedTrees:
+    """도구 캐시 무효화 키"""
+
+    @pytest.mark.asyncio
+    async def test_get_rule_reuses_until_rules_change(self, tmp_path, monkeypatch):
+        from clouvel.tools import get_rule
+        rules = tmp_path / ".claude" / "rules"
+        rules.mkdir(parents=True)
+        (rules / "global.md").write_text("# Global\n- A\n", encoding='utf-8')
+
+        assert "- A" in (await get_rule(str(tmp_path), "coding"))[0].text
+
+        reads = []
+        original = Path.read_text
+        monkeypatch.setattr(Path, "read_text", lambda self, *a, **k: reads.append(self) or original(self, *a, **k))
+        assert "- A" in (await get_rule(str(tmp_path), "coding"))[0].text
+        assert reads == []
+
+        _touch(rules / "global.md", "# Global\n- B\n")
+        assert "- B" in (await get_rule(str(tmp_path), "coding"))[0].text
+
+    def test_rules_cache_is_bounded(self, tmp_path):
+        from clouvel.tools import rules as rules_module
+        assert len(rules_module._rules_cache) <= rules_module._RULES_CACHE_SIZE
+
+    def test_prd_index_keyed_by_docs_fingerprint(self, tree_root, monkeypatch):
+        """docs 폴더 fingerprint가 같으면 PRD를 다시 열지 않음"""
+        from clouvel.tools import core, prd
+        core.clear_snapshot_cache()
+        prd_file = tree_root / "docs" / "PRD.md"
+        _touch(prd_file, "# PRD\n\n## Acceptance\n")
+        assert core._check_prd_sections(prd_file, key=core._prd_key(prd_file))[1] == []
+
+        opened = []
+        original = open
+        monkeypatch.setattr(prd, "open", lambda *a, **k: opened.append(a[0]) or original(*a, **k), raising=False)
+        assert core._check_prd_sections(prd_file, key=core._prd_key(prd_file))[1] == []
+        assert opened == []
+
+        _touch(prd_file, "# PRD\n\n## Scope\n")
+        assert core._check_prd_sections(prd_file, key=core._prd_key(prd_file))[1] == ["acceptance"]
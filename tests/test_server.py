@@ -0,0 +1,439 @@
+# -*- coding: utf-8 -*-
+"""서버 디스패치 테스트"""
+
+import pytest
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcp.types import TextContent
+
+from clouvel import server, scheduler, metrics, cancel
+from clouvel.analytics import load_analytics, get_stats, format_stats
+
+
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path, monkeypatch):
+    """path 없는 호출의 analytics가 저장소에 쌓이지 않도록"""
+    monkeypatch.chdir(tmp_path)
+    scheduler.clear_coalesced()
+    yield tmp_path
+    scheduler.clear_coalesced()
+
+
+class TestScheduler:
+    """도구 분류 / 스레드 풀 디스패치"""
+
+    def test_every_tool_is_classified(self):
+        """모든 핸들러에 분류가 있어야 함"""
+        names = set(server.TOOL_HANDLERS) | {"get_analytics"}
+        assert names <= set(scheduler.TOOL_KINDS)
+
+    @pytest.mark.asyncio
+    async def test_filesystem_tool_runs_off_loop(self, monkeypatch):
+        """filesystem 도구는 이벤트 루프 스레드 밖에서 실행"""
+        seen = {}
+
+        async def handler(args):
+            seen["thread"] = threading.current_thread().name
+            return [TextContent(type="text", text="ok")]
+
+        monkeypatch.setitem(server.TOOL_HANDLERS, "can_code", handler)
+        result = await server.call_tool("can_code", {"path": "."})
+        assert result[0].text == "ok"
+        assert seen["thread"].startswith("clouvel-interactive")
+
+    @pytest.mark.asyncio
+    async def test_slow_call_does_not_block_others(self, monkeypatch):
+        """느린 호출 뒤에 다른 호출이 줄서지 않음"""
+        async def slow(args):
+            time.sleep(0.5)
+            return [TextContent(type="text", text="slow")]
+
+        monkeypatch.setitem(server.TOOL_HANDLERS, "can_code", slow)
+
+        started = time.perf_counter()
+        slow_task = asyncio.create_task(server.call_tool("can_code", {"path": "."}))
+        await asyncio.sleep(0.05)
+        fast = await server.call_tool("get_prd_guide", {})
+        fast_elapsed = time.perf_counter() - started
+
+        assert "PRD" in fast[0].text
+        assert fast_elapsed < 0.4
+        assert (await slow_task)[0].text == "slow"
+
+
+class TestLanes:
+    """우선순위 레인"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_lanes(self, monkeypatch):
+        monkeypatch.setenv("CLOUVEL_LANE_INTERACTIVE_WORKERS", "1")
+        monkeypatch.setenv("CLOUVEL_LANE_HEAVY_WORKERS", "1")
+        scheduler.shutdown()
+        yield
+        scheduler.shutdown()
+
+    def test_lane_assignment(self):
+        assert scheduler.get_lane("get_prd_guide", {}) is None
+        assert scheduler.get_lane("can_code", {"path": "."}) == scheduler.LANE_INTERACTIVE
+        assert scheduler.get_lane("can_code", {"path": ".", "workspace": True}) == scheduler.LANE_HEAVY
+        assert scheduler.get_lane("gate", {"path": "."}) == scheduler.LANE_HEAVY
+
+    @pytest.mark.asyncio
+    async def test_heavy_work_does_not_block_cheap_checks(self, monkeypatch):
+        """heavy 레인이 꽉 차도 interactive 호출은 바로 실행"""
+        async def slow(args):
+            time.sleep(0.4)
+            return [TextContent(type="text", text="gate")]
+
+        async def cheap(args):
+            return [TextContent(type="text", text="ok")]
+
+        monkeypatch.setitem(server.TOOL_HANDLERS, "gate", slow)
+        monkeypatch.setitem(server.TOOL_HANDLERS, "can_code", cheap)
+
+        heavy = [asyncio.create_task(server.call_tool("gate", {"path": f"p{i}"})) for i in range(2)]
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        assert (await server.call_tool("can_code", {"path": "."}))[0].text == "ok"
+        assert time.perf_counter() - started < 0.2
+        await asyncio.gather(*heavy)
+
+        lanes = scheduler.lane_stats()
+        assert lanes["heavy"]["max_queued"] == 1
+        assert lanes["heavy"]["completed"] == 2
+        assert lanes["heavy"]["p95_wait_ms"] >= 100
+        assert lanes["interactive"]["avg_wait_ms"] < 100
+
+    @pytest.mark.asyncio
+    async def test_worker_reuses_event_loop(self, monkeypatch):
+        """워커 스레드는 호출마다 이벤트 루프를 새로 만들지 않음"""
+        loops = []
+
+        async def handler(args):
+            loops.append(asyncio.get_running_loop())
+            return [TextContent(type="text", text="ok")]
+
+        monkeypatch.setitem(server.TOOL_HANDLERS, "can_code", handler)
+        for i in range(3):
+            await server.call_tool("can_code", {"path": f"p{i}"})
+        assert len(set(map(id, loops))) == 1
+        assert loops[0] is not asyncio.get_running_loop()
+
+        scheduler.shutdown()
+        assert loops[0].is_closed()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_while_queued(self, monkeypatch):
+        """대기열에서 취소된 호출은 실행되지 않고 대기 수에서 빠짐"""
+        ran = []
+
+        async def slow(args):
+            ran.append(args["path"])
+            time.sleep(0.2)
+            return [TextContent(type="text", text="gate")]
+
+        monkeypatch.setitem(server.TOOL_HANDLERS, "gate", slow)
+        first = asyncio.create_task(server.call_tool("gate", {"path": "a"}))
+        second = asyncio.create_task(server.call_tool("gate", {"path": "b"}))
+        await asyncio.sleep(0.05)
+        second.cancel()
+        await first
+        await asyncio.sleep(0.05)
+        assert ran == ["a"]
+        assert scheduler.lane_stats()["heavy"]["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_wait_time_is_recorded(self, tmp_path, monkeypatch):
+        """레인 대기 시간이 analytics에 남음"""
+        async def slow(args):
+            time.sleep(0.2)
+            return [TextContent(type="text", text="gate")]
+
+        monkeypatch.setitem(server.TOOL_HANDLERS, "gate", slow)
+        await asyncio.gather(*(server.call_tool("gate", {"path": str(tmp_path)}) for _ in range(2)))
+
+        perf = get_stats(str(tmp_path))["performance"]["gate"]
+        assert perf["avg_wait_ms"] >= 50
+
+        text = format_stats({**get_stats(str(tmp_path)), "lanes": scheduler.lane_stats()})
+        assert "## 스케줄러 레인" in text
+        assert "| heavy | 1 |" in text
+
+
+class TestCancellation:
+    """시간 제한 / 클라이언트 취소"""
+
+    @staticmethod
+    def _cooperative(finished: threading.Event):
+        """취소될 때까지 checkpoint를 도는 핸들러"""
+        async def handler(args):
+            try:
+                for _ in range(300):
+                    cancel.checkpoint()
+                    time.sleep(0.01)
+                return [TextContent(type="text", text="done")]
+            finally:
+                finished.set()
+        return handler
+
+    @pytest.mark.asyncio
+    async def test_timeout_stops_worker(self, monkeypatch):
+        monkeypatch.setenv("CLOUVEL_TIMEOUT_CAN_CODE_MS", "100")
+        finished = threading.Event()
+        monkeypatch.setitem(server.TOOL_HANDLERS, "can_code", self._cooperative(finished))
+
+        started = time.perf_counter()
+        result = await server.call_tool("can_code", {"path": "."})
+        assert "⏱️" in result[0].text
+        assert time.perf_counter() - started < 1.0
+        assert await asyncio.to_thread(finished.wait, 1.0)
+
+    @pytest.mark.asyncio
+    async def test_client_cancel_reaches_worker(self, monkeypatch):
+        finished = threading.Event()
+        monkeypatch.setitem(server.TOOL_HANDLERS, "can_code", self._cooperative(finished))
+
+        task = asyncio.create_task(server.call_tool("can_code", {"path": "."}))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert await asyncio.to_thread(finished.wait, 1.0)
+
+    def test_static_tools_have_no_timeout(self):
+        assert scheduler.get_timeout_ms("get_prd_guide", {}) is None
+        assert scheduler.get_timeout_ms("gate", {}) > scheduler.get_timeout_ms("can_code", {})
+
+    def test_walk_checks_cancellation(self, tmp_path):
+        """탐색 루프는 디렉토리마다 취소 확인"""
+        from clouvel.tools.scan import ProjectWalker
+        (tmp_path / "tests").mkdir()
+        event = threading.Event()
+        event.set()
+        with cancel.scope(event), pytest.raises(cancel.ToolCancelled):
+            ProjectWalker(tmp_path).run()
+        assert ProjectWalker(tmp_path).run().entries == 1
+
+
+class TestCoalescing:
+    """동일 읽기 요청 합치기"""
+
+    @pytest.fixture
+    def counted(self, monkeypatch):
+        calls = []
+
+        async def handler(args):
+            calls.append(args)
+            time.sleep(0.2)
+            return [TextContent(type="text", text=f"result {len(calls)}")]
+
+        monkeypatch.setitem(server.TOOL_HANDLERS, "can_code", handler)
+        return calls
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_share_one_call(self, counted, tmp_path):
+        """같은 도구 + 같은 경로(표기만 다름)는 한 번만 실행"""
+        results = await asyncio.gather(
+            server.call_tool("can_code", {"path": str(tmp_path)}),
+            server.call_tool("can_code", {"path": str(tmp_path) + "/."}),
+            server.call_tool("can_code", {"path": str(tmp_path / "other")}),
+        )
+        assert len(counted) == 2
+        assert results[0][0].text == results[1][0].text
+
+    @pytest.mark.asyncio
+    async def test_memo_until_write_on_same_project(self, counted, tmp_path, monkeypatch):
+        """짧게 재사용하다가 같은 프로젝트에 쓰기 도구가 돌면 버림"""
+        async def write(args):
+            return [TextContent(type="text", text="written")]
+        monkeypatch.setitem(server.TOOL_HANDLERS, "init_docs", write)
+
+        docs = str(tmp_path / "docs")
+        first = await server.call_tool("can_code", {"path": docs})
+        assert (await server.call_tool("can_code", {"path": docs}))[0].text == first[0].text
+        assert len(counted) == 1
+
+        await server.call_tool("init_docs", {"path": str(tmp_path / "elsewhere"), "project_name": "x"})
+        await server.call_tool("can_code", {"path": docs})
+        assert len(counted) == 1
+
+        await server.call_tool("init_docs", {"path": str(tmp_path), "project_name": "x"})
+        await server.call_tool("can_code", {"path": docs})
+        assert len(counted) == 2
+
+    @pytest.mark.asyncio
+    async def test_write_tools_are_not_coalesced(self, tmp_path, monkeypatch):
+        calls = []
+
+        async def handler(args):
+            calls.append(args)
+            return [TextContent(type="text", text="ok")]
+        monkeypatch.setitem(server.TOOL_HANDLERS, "update_progress", handler)
+
+        args = {"path": str(tmp_path), "completed": ["a"]}
+        await asyncio.gather(server.call_tool("update_progress", args), server.call_tool("update_progress", args))
+        assert len(calls) == 2
+
+    def test_get_analytics_is_read_only(self):
+        assert not scheduler.is_writer("get_analytics")
+
+    @pytest.mark.asyncio
+    async def test_memo_is_bounded(self, monkeypatch):
+        """보관 결과는 MEMO_SIZE개까지, 만료된 것은 새로 넣을 때 버림"""
+        monkeypatch.setattr(scheduler, "MEMO_SIZE", 3)
+
+        async def compute():
+            return [TextContent(type="text", text="ok")]
+
+        for i in range(5):
+            await scheduler.coalesce("can_code", {"path": f"/p{i}"}, compute)
+        assert len(scheduler._memo) == 3
+        assert all(k.startswith("can_code") for k in scheduler._memo)
+
+        for key, (_, project, result) in list(scheduler._memo.items()):
+            scheduler._memo[key] = (0.0, project, result)
+        await scheduler.coalesce("can_code", {"path": "/fresh"}, compute)
+        assert len(scheduler._memo) == 1
+
+
+class TestBatch:
+    """batch 도구"""
+
+    @pytest.mark.asyncio
+    async def test_results_in_order_with_errors(self, tmp_path, monkeypatch):
+        async def broken(args):
+            raise RuntimeError("boom")
+        monkeypatch.setitem(server.TOOL_HANDLERS, "get_rule", broken)
+
+        import json
+        result = await server.call_tool("batch", {"output": "json", "calls": [
+            {"name": "get_prd_guide"},
+            {"name": "get_rule", "arguments": {"path": str(tmp_path)}},
+            {"name": "없는_도구"},
+            {"name": "batch", "arguments": {"calls": []}},
+        ]})
+        data = json.loads(result[0].text)
+        assert [c["name"] for c in data["calls"]] == ["get_prd_guide", "get_rule", "없는_도구", "batch"]
+        assert [c["ok"] for c in data["calls"]] == [True, False, False, False]
+        assert data["calls"][1]["error"] == "RuntimeError: boom"
+        assert data["failed"] == 3
+        assert all(c["ms"] >= 0 for c in data["calls"])
+
+    @pytest.mark.asyncio
+    async def test_writers_on_same_project_are_ordered(self, tmp_path, monkeypatch):
+        """같은 프로젝트 쓰기 → 뒤의 읽기는 기다림, 다른 프로젝트는 동시에"""
+        spans = {}
+
+        def recorder(label, seconds):
+            async def handler(args):
+                start = time.perf_counter()
+                time.sleep(seconds)
+                spans[f"{label}:{args['path']}"] = (start, time.perf_counter())
+                return [TextContent(type="text", text=label)]
+            return handler
+
+        monkeypatch.setitem(server.TOOL_HANDLERS, "update_progress", recorder("write", 0.3))
+        monkeypatch.setitem(server.TOOL_HANDLERS, "refresh_goals", recorder("read", 0.05))
+        a, b = str(tmp_path / "a"), str(tmp_path / "b")
+
+        text = (await server.call_tool("batch", {"calls": [
+            {"name": "update_progress", "arguments": {"path": a}},
+            {"name": "refresh_goals", "arguments": {"path": a}},
+            {"name": "refresh_goals", "arguments": {"path": b}},
+        ]}))[0].text
+        assert text.startswith("# Batch: 3개 호출 | 실패 0개")
+        assert spans[f"read:{a}"][0] >= spans[f"write:{a}"][1]
+        assert spans[f"read:{b}"][0] < spans[f"write:{a}"][1]
+
+    @pytest.mark.asyncio
+    async def test_inner_calls_are_recorded_once(self, tmp_path):
+        """하위 호출만 기록 - batch 자체는 analytics / 메트릭에 따로 세지 않음"""
+        metrics.reset_totals()
+        await server.call_tool("batch", {"calls": [
+            {"name": "get_prd_guide", "arguments": {"path": str(tmp_path)}},
+            {"name": "get_prd_template", "arguments": {"path": str(tmp_path)}},
+        ]})
+        assert get_stats(str(tmp_path))["by_tool"] == {"get_prd_guide": 1, "get_prd_template": 1}
+        assert set(metrics.process_totals()["calls"]) == {"get_prd_guide", "get_prd_template"}
+        metrics.reset_totals()
+
+    @pytest.mark.asyncio
+    async def test_limits(self):
+        assert "최대" in (await server.call_tool("batch", {"calls": [{"name": "get_prd_guide"}] * 33}))[0].text
+        assert "비어" in (await server.call_tool("batch", {"calls": []}))[0].text
+
+
+class TestInstrumentation:
+    """call_tool 계측"""
+
+    @pytest.mark.asyncio
+    async def test_call_is_measured(self, tmp_path):
+        """핸들러 실행 후 지연 시간 / 응답 크기 / 파일 접근 기록"""
+        docs = tmp_path / "docs"
+        docs.mkdir()
+        (docs / "PRD.md").write_text("# PRD\n\n## Acceptance\n- [ ] ok\n", encoding='utf-8')
+
+        result = await server.call_tool("can_code", {"path": str(tmp_path)})
+        event = load_analytics(str(tmp_path))["events"][-1]
+
+        assert event["tool"] == "can_code"
+        assert event["success"] is True
+        assert event["ms"] > 0
+        assert event["bytes"] == len(result[0].text.encode("utf-8"))
+        assert event["files"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_failure_is_recorded(self, tmp_path, monkeypatch):
+        """예외는 실패로 기록되고 그대로 전파"""
+        async def broken(args):
+            raise ValueError("boom")
+
+        monkeypatch.setitem(server.TOOL_HANDLERS, "gate", broken)
+        with pytest.raises(ValueError):
+            await server.call_tool("gate", {"path": str(tmp_path)})
+
+        stats = get_stats(str(tmp_path))
+        assert stats["success_rate"] == 0
+        assert stats["performance"]["gate"]["errors"] == {"ValueError": 1}
+        assert "p95" in format_stats(stats)
+
+    @pytest.mark.asyncio
+    async def test_get_analytics_scopes(self, tmp_path, isolated_cwd):
+        """path 없으면 현재 디렉토리임을 표시, scope=all이면 등록된 프로젝트 전체"""
+        other = tmp_path / "other"
+        await server.call_tool("get_prd_guide", {"path": str(other)})
+
+        text = (await server.call_tool("get_analytics", {}))[0].text
+        assert "path 미지정 → 현재 디렉토리" in text
+
+        text = (await server.call_tool("get_analytics", {"scope": "all"}))[0].text
+        assert "전체 프로젝트" in text
+        assert f"| {other} | 1 |" in text
+
+    def test_files_counted_only_inside_probe(self, tmp_path):
+        """파일 접근은 계측 중인 호출에만 기록 (프로세스 전역 audit hook 없음)"""
+        from clouvel import fileio
+        (tmp_path / "a.md").write_text("a", encoding='utf-8')
+        fileio.read_text(tmp_path / "a.md")
+
+        probe = metrics.ToolProbe()
+        with probe.track():
+            fileio.read_text(tmp_path / "a.md")
+            fileio.exists(tmp_path / "a.md")
+            fileio.exists(tmp_path / "b.md")
+        assert probe.files_touched == 2
+
+    def test_latency_percentiles(self):
+        """고정 크기 히스토그램 분위 값"""
+        histogram = metrics.empty_histogram()
+        for ms in [1] * 90 + [100] * 10:
+            histogram[metrics.latency_bucket(ms)] += 1
+        assert metrics.percentile(histogram, 0.5) == pytest.approx(1, rel=0.5)
+        assert metrics.percentile(histogram, 0.99) == pytest.approx(100, rel=0.5)
+        assert metrics.percentile(metrics.empty_histogram(), 0.5) is None
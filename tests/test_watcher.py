@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""파일 감시 테스트"""
+
+import pytest
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from clouvel import watcher as watcher_module
+from clouvel.watcher import Watcher
+from clouvel.tools import can_code, core
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def _age(*paths: Path, seconds: int = 10) -> None:
+    past = time.time() - seconds
+    for p in paths:
+        os.utime(p, (past, past))
+
+
+BACKENDS = ["polling"] + (["inotify"] if sys.platform.startswith("linux") else [])
+
+
+@pytest.fixture(params=BACKENDS)
+def running(request):
+    w = Watcher(backend=request.param, poll_seconds=0.05).start()
+    yield w
+    w.stop()
+
+
+class TestWatcher:
+    """감시 목록 / 변경 알림"""
+
+    def test_entry_change_fires_once(self, running, tmp_path):
+        """디렉토리 항목 변화 → 콜백 후 감시 해제"""
+        fired = []
+        assert running.watch("p", {str(tmp_path): tmp_path.stat().st_mtime_ns}, {}, fired.append)
+        (tmp_path / "new.md").write_text("x", encoding='utf-8')
+        assert _wait_for(lambda: fired == ["p"])
+        assert not running.is_watched("p")
+
+    def test_only_tracked_file_content_matters(self, running, tmp_path):
+        """같은 폴더라도 감시 대상이 아닌 파일 수정은 무시"""
+        prd = tmp_path / "PRD.md"
+        other = tmp_path / "notes.md"
+        prd.write_text("a", encoding='utf-8')
+        other.write_text("a", encoding='utf-8')
+        _age(prd, other, tmp_path)
+        fired = []
+        assert running.watch("p", {str(tmp_path): tmp_path.stat().st_mtime_ns}, {str(prd): prd.stat().st_mtime_ns}, fired.append)
+
+        other.write_text("b", encoding='utf-8')
+        time.sleep(0.3)
+        assert fired == []
+
+        prd.write_text("b", encoding='utf-8')
+        assert _wait_for(lambda: fired == ["p"])
+
+    def test_change_before_watch_is_detected(self, tmp_path):
+        """스냅샷 이후 ~ 등록 전 변경은 등록 시 바로 거절"""
+        w = Watcher(backend="polling")
+        stale = tmp_path.stat().st_mtime_ns - 1
+        assert not w.watch("p", {str(tmp_path): stale}, {}, lambda key: None)
+        assert not w.is_watched("p")
+
+    def test_max_dirs_evicts_least_recently_used(self, tmp_path):
+        """감시 디렉토리 상한 → 오래 안 쓴 프로젝트부터 해제"""
+        dirs = []
+        for name in "abcd":
+            d = tmp_path / name
+            d.mkdir()
+            dirs.append(d)
+        mtimes = {str(d): d.stat().st_mtime_ns for d in dirs}
+        w = Watcher(backend="polling", max_dirs=3)
+
+        assert w.watch("a", {str(dirs[0]): mtimes[str(dirs[0])], str(dirs[1]): mtimes[str(dirs[1])]}, {}, lambda k: None)
+        assert w.watch("b", {str(dirs[2]): mtimes[str(dirs[2])]}, {}, lambda k: None)
+        assert w.is_watched("a")  # a를 최근 사용으로
+        assert w.watch("c", {str(dirs[3]): mtimes[str(dirs[3])]}, {}, lambda k: None)
+        assert w.is_watched("a") and w.is_watched("c") and not w.is_watched("b")
+        assert w.watched_dirs == 3
+
+        assert not w.watch("big", mtimes, {}, lambda k: None)
+
+    def test_idle_projects_are_unwatched(self, tmp_path):
+        """일정 시간 안 쓴 프로젝트는 감시 해제"""
+        w = Watcher(backend="polling", idle_seconds=0.1, poll_seconds=0.05).start()
+        try:
+            assert w.watch("p", {str(tmp_path): tmp_path.stat().st_mtime_ns}, {}, lambda k: None)
+            time.sleep(0.15)
+            assert _wait_for(lambda: w.watched_dirs == 0)
+        finally:
+            w.stop()
+
+
+class TestCanCodeWatch:
+    """can_code 스냅샷 + watcher"""
+
+    @pytest.fixture(params=BACKENDS)
+    def project(self, request, tmp_path, monkeypatch):
+        monkeypatch.setattr(core, "_RACY_WINDOW_NS", 0)
+        core.clear_snapshot_cache()
+        docs = tmp_path / "docs"
+        docs.mkdir()
+        (docs / "PRD.md").write_text("# PRD\n\n## Acceptance\n- [ ] 동작\n", encoding='utf-8')
+        (tmp_path / "tests").mkdir()
+        (tmp_path / "tests" / "test_a.py").write_text("", encoding='utf-8')
+        w = watcher_module.start_watcher(request.param)
+        w.poll_seconds = 0.05
+        yield tmp_path
+        watcher_module.stop_watcher()
+        core.clear_snapshot_cache()
+
+    @pytest.mark.asyncio
+    async def test_write_then_call_sees_change(self, project):
+        """감시 중이어도 방금 쓴 PRD는 바로 반영 (watcher 알림을 기다리지 않음)"""
+        docs = project / "docs"
+        assert "PASS" in (await can_code(str(docs)))[0].text
+        assert watcher_module.get_watcher().is_watched(str(docs))
+
+        first = core.get_docs_snapshot(docs)
+        (docs / "PRD.md").write_text("# PRD\n\n## Scope\n", encoding='utf-8')
+        assert core.get_docs_snapshot(docs) is not first
+        assert "BLOCK" in (await can_code(str(docs)))[0].text
+
+    @pytest.mark.asyncio
+    async def test_change_invalidates_and_precomputes(self, project):
+        """PRD가 바뀌면 해당 프로젝트만 무효화 + 백그라운드에서 다시 계산"""
+        docs = project / "docs"
+        assert "PASS" in (await can_code(str(docs)))[0].text
+
+        (docs / "PRD.md").write_text("# PRD\n\n## Scope\n", encoding='utf-8')
+
+        def rebuilt():
+            snapshot = core._snapshots.get(str(docs))
+            return snapshot is not None and snapshot.prd_sections_missing_critical == ["acceptance"]
+        assert _wait_for(rebuilt)
+        assert _wait_for(lambda: watcher_module.get_watcher().is_watched(str(docs)))
+        assert "BLOCK" in (await can_code(str(docs)))[0].text
+
+    @pytest.mark.asyncio
+    async def test_new_test_file_is_seen(self, project):
+        """테스트 디렉토리 변화도 감시"""
+        docs = project / "docs"
+        await can_code(str(docs))
+        (project / "tests" / "test_b.py").write_text("", encoding='utf-8')
+
+        def counted():
+            snapshot = core._snapshots.get(str(docs))
+            return snapshot is not None and snapshot.test_count == 2
+        assert _wait_for(counted)
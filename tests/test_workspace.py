@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""모노레포 워크스페이스 모드 테스트"""
+
+import pytest
+import json
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from clouvel.tools import can_code, analyze_docs, core
+from clouvel.tools import fingerprint, workspace
+from clouvel.tools.scan import ProjectWalker
+
+
+def _package(root: Path, rel: str, marker: str, prd: str | None = None, tests: int = 0) -> Path:
+    pkg = root / rel
+    pkg.mkdir(parents=True, exist_ok=True)
+    (pkg / marker).write_text("{}" if marker == "package.json" else "", encoding='utf-8')
+    if prd is not None:
+        (pkg / "docs").mkdir()
+        (pkg / "docs" / "PRD.md").write_text(prd, encoding='utf-8')
+    for i in range(tests):
+        (pkg / "tests").mkdir(exist_ok=True)
+        (pkg / "tests" / f"test_{i}.py").write_text("", encoding='utf-8')
+    return pkg
+
+
+@pytest.fixture
+def monorepo(tmp_path):
+    core.clear_snapshot_cache()
+    workspace.clear_workspace_cache()
+    (tmp_path / "package.json").write_text(json.dumps({"workspaces": ["packages/*"]}), encoding='utf-8')
+    ok = "# PRD\n\n## Acceptance\n- [ ] ok\n"
+    _package(tmp_path, "packages/web", "package.json", prd=ok, tests=2)
+    _package(tmp_path, "packages/web/node_modules/dep", "package.json")
+    _package(tmp_path, "packages/api", "package.json", prd="# PRD\n\n## Scope\n")
+    _package(tmp_path, "services/worker", "go.mod")
+    _package(tmp_path, "tools/cli", "pyproject.toml", prd=ok, tests=1)
+    _package(tmp_path, "examples/demo", "package.json", prd=ok)  # workspaces 밖
+    yield tmp_path
+    core.clear_snapshot_cache()
+
+
+class TestDiscovery:
+    """패키지 루트 탐색"""
+
+    def test_packages_found_in_one_walk(self, monorepo):
+        """pyproject.toml / go.mod / workspaces 안의 package.json, node_modules 제외"""
+        found = workspace.discover_workspace(monorepo)
+        assert [p.rel for p in found.packages] == ["packages/api", "packages/web", "services/worker", "tools/cli"]
+        tests = {p.rel: p.test_count for p in found.packages}
+        assert tests == {"packages/api": 0, "packages/web": 2, "services/worker": 0, "tools/cli": 1}
+
+    def test_nested_tests_go_to_deepest_package(self, tmp_path):
+        """중첩 패키지의 테스트는 가장 가까운 패키지에 귀속"""
+        _package(tmp_path, "", "pyproject.toml", prd="## Acceptance\n", tests=1)
+        _package(tmp_path, "plugins/a", "pyproject.toml", tests=3)
+        found = {p.rel: p.test_count for p in workspace.discover_workspace(tmp_path).packages}
+        assert found == {"": 1, "plugins/a": 3}
+
+
+    def test_negated_workspace_globs_are_excluded(self, monorepo):
+        """package.json workspaces의 "!" 항목은 제외"""
+        (monorepo / "package.json").write_text(
+            json.dumps({"workspaces": ["packages/*", "!packages/api"]}), encoding='utf-8'
+        )
+        found = [p.rel for p in workspace.discover_workspace(monorepo).packages]
+        assert "packages/web" in found and "packages/api" not in found
+
+    def test_pnpm_workspace_file(self, monorepo):
+        """pnpm-workspace.yaml이 있으면 그 목록 사용 (제외 패턴 포함)"""
+        (monorepo / "pnpm-workspace.yaml").write_text(
+            "packages:\n  - 'examples/*'\n  - \"packages/*\"  # 앱\n  - '!packages/web'\n", encoding='utf-8'
+        )
+        found = [p.rel for p in workspace.discover_workspace(monorepo).packages]
+        assert "examples/demo" in found and "packages/api" in found
+        assert "packages/web" not in found
+
+
+class TestWorkspaceTools:
+    """can_code / analyze_docs workspace=True"""
+
+    @pytest.mark.asyncio
+    async def test_can_code_aggregates(self, monorepo):
+        """패키지별 판정표 + BLOCK 상세"""
+        text = (await can_code(str(monorepo), workspace=True))[0].text
+        assert text.startswith("# ⛔ BLOCK | 워크스페이스 4개 패키지")
+        assert "| packages/web | ⚠️ WARN | - | 아키텍처, API 스펙, DB 스키마, 검증 계획, PRD.scope, PRD.non_goals | 2 |" in text
+        assert "| packages/api | ⛔ BLOCK | PRD의 acceptance 섹션 |" in text
+        assert "| services/worker | ⛔ BLOCK | docs 폴더 |" in text
+        assert "### packages/api" in text
+
+    @pytest.mark.asyncio
+    async def test_analyze_docs_workspace(self, monorepo):
+        """패키지별 커버리지"""
+        text = (await analyze_docs(str(monorepo / "docs"), workspace=True))[0].text
+        assert "패키지 4개" in text
+        assert "| packages/web | 100% |" in text
+        assert "| services/worker | 0% |" in text
+
+    @pytest.mark.asyncio
+    async def test_single_package_mode_unchanged(self, monorepo):
+        """workspace 없이 부르면 기존 동작"""
+        text = (await can_code(str(monorepo / "packages" / "web" / "docs")))[0].text
+        assert "PASS" in text
+
+    @pytest.mark.asyncio
+    async def test_can_code_workspace_json(self, monorepo):
+        """json: 패키지별 판정 목록"""
+        import json
+        data = json.loads((await can_code(str(monorepo), workspace=True, output="json"))[0].text)
+        assert data["status"] == "BLOCK" and data["ok"] is False
+        packages = {p["package"]: p for p in data["packages"]}
+        assert packages["packages/web"]["status"] == "WARN" and packages["packages/web"]["tests"] == 2
+        assert packages["services/worker"]["missing_critical"] == ["docs 폴더"]
+
+
+class TestWorkspaceCache:
+    """프로젝트 fingerprint 기준 탐색 / 패키지 docs 판정 재사용"""
+
+    @pytest.fixture(autouse=True)
+    def stable(self, monkeypatch):
+        monkeypatch.setattr(fingerprint, "RACY_WINDOW_NS", 0)
+        monkeypatch.setattr(workspace, "_RACY_WINDOW_NS", 0)
+
+    def test_unchanged_repo_is_not_walked_again(self, monorepo, monkeypatch):
+        first = workspace.discover_workspace(monorepo)
+        fingerprint.project_tree(monorepo).refresh()
+        walks = []
+        original = ProjectWalker.run
+        monkeypatch.setattr(ProjectWalker, "run", lambda self, budget=None: walks.append(1) or original(self, budget))
+        assert workspace.discover_workspace(monorepo) is first
+
+        _package(monorepo, "packages/new", "package.json")
+        found = workspace.discover_workspace(monorepo)
+        assert walks == [1]
+        assert "packages/new" in [p.rel for p in found.packages]
+
+    def test_package_docs_reused_until_docs_change(self, monorepo, monkeypatch):
+        workspace.evaluate_workspace(monorepo)
+        fingerprint.project_tree(monorepo).refresh()
+        workspace.evaluate_workspace(monorepo)
+
+        listed = []
+        original = workspace.list_docs
+        monkeypatch.setattr(workspace, "list_docs", lambda path, *a: listed.append(path) or original(path, *a))
+        _, verdicts = workspace.evaluate_workspace(monorepo)
+        assert listed == []
+        assert {v.package.rel: v.verdict for v in verdicts}["packages/api"] == "BLOCK"
+
+        (monorepo / "packages" / "api" / "docs" / "PRD.md").write_text("# PRD\n\n## Acceptance\n", encoding='utf-8')
+        _, verdicts = workspace.evaluate_workspace(monorepo)
+        assert listed == [monorepo / "packages" / "api" / "docs"]
+        assert {v.package.rel: v.verdict for v in verdicts}["packages/api"] != "BLOCK"